@@ -0,0 +1,62 @@
+"""
+Helpers for native async views served under ASGI
+
+DRF views are sync-only, so LLM-bound endpoints that should not pin a
+threadpool slot are written as plain async Django views and wrapped here
+with JWT authentication and request parsing.
+"""
+import functools
+import json
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+
+
+def async_api_view(methods):
+    """
+    Decorate an async view with JWT auth and JSON/multipart parsing.
+
+    The wrapped view receives ``request.user`` and ``request.data`` like a
+    DRF view and must return a ``JsonResponse``.
+    """
+    allowed = [method.upper() for method in methods]
+
+    def decorator(view):
+        @functools.wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if request.method not in allowed:
+                return JsonResponse(
+                    {'detail': f'Method "{request.method}" not allowed.'},
+                    status=405
+                )
+
+            try:
+                auth = await sync_to_async(JWTAuthentication().authenticate)(request)
+            except (InvalidToken, AuthenticationFailed) as e:
+                return JsonResponse({'detail': str(e)}, status=401)
+
+            if auth is None:
+                return JsonResponse(
+                    {'detail': 'Authentication credentials were not provided.'},
+                    status=401
+                )
+            request.user, request.auth = auth
+
+            if request.content_type == 'application/json':
+                try:
+                    request.data = json.loads(request.body or b'{}')
+                except ValueError:
+                    return JsonResponse({'detail': 'JSON parse error.'}, status=400)
+            else:
+                request.data = {**request.POST.dict(), **request.FILES.dict()}
+
+            return await view(request, *args, **kwargs)
+
+        # Token-authenticated API; set directly because csrf_exempt() does
+        # not preserve coroutine functions on Django 4.2
+        wrapper.csrf_exempt = True
+        return wrapper
+
+    return decorator
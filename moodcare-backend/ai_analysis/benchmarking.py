@@ -0,0 +1,215 @@
+"""
+Local fake OpenAI server for benchmarks
+
+Serves canned chat completions after a configurable delay so throughput
+of the AI call paths can be measured without network access or API spend.
+Point the OpenAI clients at it with ``OPENAI_BASE_URL``.
+"""
+import json
+import socket
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Settings overrides so benchmarks need neither a real API key nor Redis
+BENCHMARK_SETTINGS = {
+    'OPENAI_API_KEY': 'sk-benchmark',
+    'CACHES': {
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    },
+}
+
+# One payload that satisfies every parser (analysis, insights, story, chapter)
+FAKE_COMPLETION_CONTENT = {
+    'primary_emotion': 'joy',
+    'intensity': 6,
+    'secondary_emotions': ['trust'],
+    'triggers': ['friends'],
+    'insight': 'Benchmark insight',
+    'suggestions': [],
+    'overall_state': 'stable',
+    'patterns': [],
+    'indicators': [],
+    'recommendations': [],
+    'concerns': [],
+    'title': 'Benchmark Story',
+    'content': 'Once upon a time ' * 50,
+    'chapters': [{'number': 1, 'title': 'Start', 'text': 'Once upon a time'}],
+    'emotional_arc': ['calm'],
+    'chapter_number': 2,
+    'chapter_title': 'Next',
+    'emotional_tone': 'hopeful',
+}
+
+
+# Characters per streamed token, roughly what GPT tokenizers average on English
+TOKEN_CHARS = 4
+
+
+class _FakeOpenAIHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        super().setup()
+        # Headers and body go out in separate writes; avoid Nagle stalls
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        request = json.loads(self.rfile.read(length) or b'{}') if length else {}
+
+        latency = self.server.latency
+        time.sleep(latency() if callable(latency) else latency)
+        self.server.record_request(length)
+
+        if self.server.failing:
+            self._reply(500, {'error': {'message': 'Benchmark outage', 'type': 'server_error'}})
+            return
+
+        content = json.dumps(self.server.content)
+        tokens = [content[i:i + TOKEN_CHARS] for i in range(0, len(content), TOKEN_CHARS)]
+        if request.get('stream'):
+            self._stream(tokens)
+            return
+        # Without streaming the whole completion is generated before replying
+        time.sleep(self.server.token_interval * len(tokens))
+
+        self._reply(200, {
+            'id': f'chatcmpl-{uuid.uuid4().hex}',
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': 'gpt-4-turbo-preview',
+            'choices': [{
+                'index': 0,
+                'message': {
+                    'role': 'assistant',
+                    'content': content,
+                },
+                'finish_reason': 'stop',
+            }],
+            'usage': {'prompt_tokens': 100, 'completion_tokens': 100, 'total_tokens': 200},
+        })
+
+    def _stream(self, tokens):
+        """Server-sent chat.completion.chunk events, one token at a time"""
+        completion_id = f'chatcmpl-{uuid.uuid4().hex}'
+
+        def chunk(delta, finish_reason=None):
+            return {
+                'id': completion_id,
+                'object': 'chat.completion.chunk',
+                'created': int(time.time()),
+                'model': 'gpt-4-turbo-preview',
+                'choices': [{'index': 0, 'delta': delta, 'finish_reason': finish_reason}],
+            }
+
+        try:
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+            events = [chunk({'role': 'assistant', 'content': ''})]
+            events += [chunk({'content': token}) for token in tokens]
+            events.append(chunk({}, 'stop'))
+            for index, event in enumerate(events):
+                if index > 1:
+                    time.sleep(self.server.token_interval)
+                self._write_chunk(f'data: {json.dumps(event)}\n\n')
+            self._write_chunk('data: [DONE]\n\n')
+            self.wfile.write(b'0\r\n\r\n')
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # the client stopped reading
+
+    def _write_chunk(self, text: str):
+        data = text.encode('utf-8')
+        self.wfile.write(f'{len(data):x}\r\n'.encode('ascii') + data + b'\r\n')
+
+    def _reply(self, status: int, payload: dict):
+        body = json.dumps(payload).encode('utf-8')
+        try:
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # the client gave up (deadline or cancelled hedge)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+
+class FakeOpenAIServer:
+    """
+    Context manager running a fake OpenAI API on a background thread.
+
+        with FakeOpenAIServer(latency=0.5) as server:
+            os.environ['OPENAI_BASE_URL'] = server.base_url
+
+    ``latency`` may be a callable returning seconds per request (to model a
+    latency tail); ``failing`` makes every response an HTTP 500.
+    ``token_interval`` models generation time: a streamed response
+    (``stream=True``) sends a token every interval after ``latency``, a
+    regular one waits for all tokens before replying.
+    """
+
+    def __init__(self, latency=0.5, content: dict = None, port: int = 0, failing: bool = False,
+                 token_interval: float = 0.0):
+        self.latency = latency
+        self.token_interval = token_interval
+        self.content = content or FAKE_COMPLETION_CONTENT
+        self.port = port
+        self.failing = failing
+        self._server = None
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}/v1'
+
+    def set_latency(self, latency):
+        self.latency = self._server.latency = latency
+
+    def set_failing(self, failing: bool):
+        self.failing = self._server.failing = failing
+
+    @property
+    def request_count(self) -> int:
+        return self._server.request_count
+
+    @property
+    def request_bytes(self) -> int:
+        """Request body bytes received, a stand-in for prompt size"""
+        return self._server.request_bytes
+
+    def __enter__(self):
+        self._server = _Server(('127.0.0.1', self.port), _FakeOpenAIHandler)
+        self._server.latency = self.latency
+        self._server.content = self.content
+        self._server.failing = self.failing
+        self._server.token_interval = self.token_interval
+        self._server.request_count = 0
+        self._server.request_bytes = 0
+        lock = threading.Lock()
+
+        def record_request(length=0):
+            with lock:
+                self._server.request_count += 1
+                self._server.request_bytes += length
+
+        self._server.record_request = record_request
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
@@ -0,0 +1,155 @@
+"""
+Two-tier response cache for AI calls
+"""
+import copy
+import hashlib
+import json
+import logging
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_text(text: str) -> str:
+    """Normalize text so trivially different inputs share a cache entry"""
+    text = unicodedata.normalize('NFC', text or '')
+    return ' '.join(text.split())
+
+
+class LRUCache:
+    """Thread-safe in-process LRU cache with a per-entry TTL"""
+
+    def __init__(self, max_entries: int = 1024, ttl: int = 300):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None):
+        expires_at = time.monotonic() + (ttl if ttl is not None else self.ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class ResponseCache:
+    """
+    Content-addressed cache with an in-process LRU/TTL tier in front of
+    the shared Django cache (django-redis in production).
+
+    Values must be JSON-serializable dicts. Callers always receive a copy,
+    so mutating a returned value never affects the cached entry.
+    """
+
+    def __init__(self, namespace: str, ttl: Optional[int] = None,
+                 local_ttl: Optional[int] = None,
+                 max_local_entries: Optional[int] = None,
+                 alias: str = 'default'):
+        self.namespace = namespace
+        self.ttl = ttl if ttl is not None else getattr(settings, 'AI_CACHE_TTL', 60 * 60 * 24)
+        self.alias = alias
+        self.local = LRUCache(
+            max_entries=max_local_entries or getattr(settings, 'AI_CACHE_LOCAL_MAX_ENTRIES', 1024),
+            ttl=local_ttl if local_ttl is not None else getattr(settings, 'AI_CACHE_LOCAL_TTL', 300)
+        )
+
+        self._lock = threading.Lock()
+        self._counters = {'local_hits': 0, 'shared_hits': 0, 'misses': 0, 'errors': 0}
+
+    def make_key(self, *parts) -> str:
+        """Build a stable key from arbitrary JSON-serializable parts"""
+        payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+        digest = hashlib.sha256(payload.encode('utf-8')).hexdigest()
+        return f"ai:{self.namespace}:{digest}"
+
+    def get(self, key: str) -> Optional[dict]:
+        value = self.local.get(key)
+        if value is not None:
+            self._incr('local_hits')
+            return copy.deepcopy(value)
+
+        try:
+            value = caches[self.alias].get(key)
+        except Exception as e:
+            logger.warning(f"Shared cache read failed for {key}: {e}")
+            self._incr('errors')
+            value = None
+
+        if value is None:
+            self._incr('misses')
+            return None
+
+        self._incr('shared_hits')
+        self.local.set(key, value)
+        return copy.deepcopy(value)
+
+    def set(self, key: str, value: dict):
+        value = copy.deepcopy(value)
+        self.local.set(key, value)
+        try:
+            caches[self.alias].set(key, value, timeout=self.ttl)
+        except Exception as e:
+            logger.warning(f"Shared cache write failed for {key}: {e}")
+            self._incr('errors')
+
+    def delete(self, key: str):
+        self.local.delete(key)
+        try:
+            caches[self.alias].delete(key)
+        except Exception as e:
+            logger.warning(f"Shared cache delete failed for {key}: {e}")
+
+    def stats(self) -> dict:
+        """Hit/miss counters for this process"""
+        with self._lock:
+            counters = dict(self._counters)
+
+        lookups = counters['local_hits'] + counters['shared_hits'] + counters['misses']
+        hits = counters['local_hits'] + counters['shared_hits']
+        counters['hits'] = hits
+        counters['hit_rate'] = round(hits / lookups, 4) if lookups else 0.0
+        counters['local_entries'] = len(self.local)
+        return counters
+
+    def reset_stats(self):
+        with self._lock:
+            for name in self._counters:
+                self._counters[name] = 0
+
+    def _incr(self, name: str):
+        with self._lock:
+            self._counters[name] += 1
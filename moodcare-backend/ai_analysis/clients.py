@@ -0,0 +1,154 @@
+"""
+Process-wide registry of shared upstream clients
+
+Analyzers, generators and recommenders used to build a fresh OpenAI (and
+Spotify) client per request, so HTTP connection pools and TLS sessions were
+never reused. Everything handed out here is created once per process and is
+safe to share between threads. After a fork (gunicorn/celery prefork
+workers) the registry is emptied so children never reuse the parent's
+sockets.
+"""
+import asyncio
+import logging
+import os
+import threading
+import weakref
+from typing import TYPE_CHECKING, Callable, TypeVar
+
+from django.conf import settings
+
+if TYPE_CHECKING:
+    import httpx
+    import openai
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+
+class ClientRegistry:
+    """Thread-safe, fork-aware store of lazily created shared instances"""
+
+    def __init__(self):
+        self._instances = {}
+        # Re-entrant: factories may fetch other shared instances (a generator its client)
+        self._lock = threading.RLock()
+        self._pid = os.getpid()
+
+    def get(self, name: str, factory: Callable[[], T]) -> T:
+        if self._pid != os.getpid():
+            self.reset()
+
+        instance = self._instances.get(name)
+        if instance is None:
+            with self._lock:
+                instance = self._instances.get(name)
+                if instance is None:
+                    instance = factory()
+                    self._instances[name] = instance
+        return instance
+
+    def discard(self, name: str):
+        """Drop one instance, e.g. after it broke; the next get() rebuilds it"""
+        with self._lock:
+            self._instances.pop(name, None)
+
+    def reset(self):
+        """Drop every instance; the next get() builds fresh ones"""
+        # The lock may have been held by another thread at fork time
+        self._lock = threading.RLock()
+        self._instances = {}
+        self._pid = os.getpid()
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._instances
+
+
+registry = ClientRegistry()
+
+# Async clients are bound to the event loop their connections were opened on
+_async_openai_clients = weakref.WeakKeyDictionary()
+
+
+def _http_limits() -> 'httpx.Limits':
+    import httpx
+
+    return httpx.Limits(
+        max_connections=getattr(settings, 'OPENAI_MAX_CONNECTIONS', 100),
+        max_keepalive_connections=getattr(settings, 'OPENAI_MAX_KEEPALIVE_CONNECTIONS', 20),
+        keepalive_expiry=getattr(settings, 'OPENAI_KEEPALIVE_EXPIRY', 30.0),
+    )
+
+
+def get_openai_client() -> 'openai.OpenAI':
+    """Shared sync OpenAI client with a keep-alive connection pool"""
+    def build():
+        import httpx
+        import openai
+
+        return openai.OpenAI(
+            api_key=settings.OPENAI_API_KEY,
+            http_client=httpx.Client(limits=_http_limits()),
+        )
+
+    return registry.get('openai', build)
+
+
+def get_async_openai_client() -> 'openai.AsyncOpenAI':
+    """Shared async OpenAI client for the running event loop"""
+    loop = asyncio.get_running_loop()
+    client = _async_openai_clients.get(loop)
+    if client is None:
+        import httpx
+        import openai
+
+        client = openai.AsyncOpenAI(
+            api_key=settings.OPENAI_API_KEY,
+            http_client=httpx.AsyncClient(limits=_http_limits()),
+        )
+        _async_openai_clients[loop] = client
+    return client
+
+
+def get_spotify_client():
+    """
+    Shared Spotify client, or None when credentials are not configured.
+
+    The client-credentials token is fetched once and refreshed by spotipy
+    when it expires; refreshes are serialized across threads.
+    """
+    if not getattr(settings, 'SPOTIFY_CLIENT_ID', None):
+        return None
+
+    def build():
+        import spotipy
+        from spotipy.oauth2 import SpotifyClientCredentials
+
+        class LockedClientCredentials(SpotifyClientCredentials):
+            _token_lock = threading.Lock()
+
+            def get_access_token(self, *args, **kwargs):
+                with self._token_lock:
+                    return super().get_access_token(*args, **kwargs)
+
+        auth = LockedClientCredentials(
+            client_id=settings.SPOTIFY_CLIENT_ID,
+            client_secret=settings.SPOTIFY_CLIENT_SECRET
+        )
+        return spotipy.Spotify(auth_manager=auth)
+
+    return registry.get('spotify', build)
+
+
+def reset_clients():
+    """
+    Forget every shared client. Runs automatically in forked children;
+    also safe to call from a gunicorn ``post_fork`` hook.
+    """
+    registry.reset()
+    _async_openai_clients.clear()
+    logger.debug(f"Shared AI clients reset in process {os.getpid()}")
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=reset_clients)
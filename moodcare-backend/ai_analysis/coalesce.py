@@ -0,0 +1,318 @@
+"""
+Single-flight coalescing of identical AI calls
+
+A double-submitted form, or several widgets loading at once, used to start
+one upstream call each for the same input. ``SingleFlight.do(key, fn)``
+runs ``fn`` once per key at a time:
+
+* within a process, concurrent callers with the same key wait for the
+  first caller (the leader) and share its result or its exception
+* across workers, the leader holds a lock in the shared Django cache
+  (Redis in production) and publishes the result there. Callers in
+  other processes poll for it instead of calling upstream themselves.
+
+Followers give up with ``CoalesceTimeout`` after ``timeout`` seconds. A
+lock left by a crashed leader expires after ``lock_ttl``, and the next
+caller takes over. If the shared cache is unavailable the call simply
+runs locally, coalesced within the process only. Results must be
+JSON-serializable to be shared across workers.
+"""
+import asyncio
+import copy
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+
+logger = logging.getLogger(__name__)
+
+# Followers poll every poll_interval, so a published result is read long before this
+RESULT_TTL = 30
+
+
+class CoalesceTimeout(TimeoutError):
+    """Raised to followers when the shared call did not finish in time"""
+
+
+class CoalescedCallError(Exception):
+    """A leader in another worker failed; carries its error message"""
+
+    def __init__(self, message: str, error_type: str = ''):
+        super().__init__(message)
+        self.error_type = error_type
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Coalesce concurrent calls that share a key, in-process and across workers"""
+
+    def __init__(self, namespace: str, timeout: Optional[float] = None,
+                 lock_ttl: Optional[int] = None, poll_interval: Optional[float] = None,
+                 alias: str = 'default'):
+        self.namespace = namespace
+        self.timeout = timeout if timeout is not None else getattr(
+            settings, 'AI_SINGLE_FLIGHT_TIMEOUT', 90.0
+        )
+        self.lock_ttl = lock_ttl if lock_ttl is not None else getattr(
+            settings, 'AI_SINGLE_FLIGHT_LOCK_TTL', 120
+        )
+        self.poll_interval = poll_interval if poll_interval is not None else getattr(
+            settings, 'AI_SINGLE_FLIGHT_POLL_INTERVAL', 0.05
+        )
+        self.alias = alias
+
+        self._calls = {}
+        self._async_calls = {}
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._counters = {
+            'leaders': 0, 'local_followers': 0, 'remote_followers': 0,
+            'timeouts': 0, 'errors': 0,
+        }
+
+    # Keys
+
+    def make_key(self, *parts) -> str:
+        """Stable key from arbitrary JSON-serializable parts"""
+        payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _lock_key(self, key: str) -> str:
+        return f"sf:{self.namespace}:lock:{key}"
+
+    def _result_key(self, key: str) -> str:
+        return f"sf:{self.namespace}:result:{key}"
+
+    # Sync
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        """Return ``fn()``, sharing one execution among concurrent callers of ``key``"""
+        if self._pid != os.getpid():
+            self._reset()
+
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            self._incr('local_followers')
+            if not call.done.wait(self.timeout):
+                self._incr('timeouts')
+                raise CoalesceTimeout(f"Timed out waiting for in-flight call {key}")
+            if call.error is not None:
+                raise call.error
+            return copy.deepcopy(call.result)
+
+        try:
+            call.result = self._run_shared(key, fn)
+            # Followers may join until the call is popped below, so the
+            # leader never hands out the shared object either
+            return copy.deepcopy(call.result)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    def _run_shared(self, key: str, fn: Callable[[], Any]) -> Any:
+        cache = caches[self.alias]
+        deadline = time.monotonic() + self.timeout
+        while True:
+            token = uuid.uuid4().hex
+            try:
+                acquired = cache.add(self._lock_key(key), token, timeout=self.lock_ttl)
+                holder = None if acquired else cache.get(self._lock_key(key))
+            except Exception as e:
+                logger.warning(f"Single-flight lock unavailable for {key}: {e}")
+                acquired = None
+            if acquired is None:
+                # Shared cache down (IGNORE_EXCEPTIONS returns None): run locally
+                self._incr('leaders')
+                return fn()
+            if acquired:
+                return self._lead(cache, key, token, fn)
+            if holder is None:
+                continue  # released between add() and get(); try again
+
+            self._incr('remote_followers')
+            while time.monotonic() < deadline:
+                time.sleep(self.poll_interval)
+                outcome = self._poll(cache, key, holder)
+                if outcome is not None:
+                    return self._unwrap(outcome)
+                if cache.get(self._lock_key(key)) != holder:
+                    break  # leader gone without publishing; take over
+            else:
+                self._incr('timeouts')
+                raise CoalesceTimeout(f"Timed out waiting for another worker's call {key}")
+
+    def _lead(self, cache, key: str, token: str, fn: Callable[[], Any]) -> Any:
+        self._incr('leaders')
+        try:
+            result = fn()
+        except Exception as e:
+            self._incr('errors')
+            self._publish(cache, key, {
+                'token': token, 'error': str(e), 'error_type': type(e).__name__,
+            })
+            raise
+        else:
+            self._publish(cache, key, {'token': token, 'result': result})
+            return result
+        finally:
+            self._release(cache, key, token)
+
+    def _publish(self, cache, key: str, outcome: dict):
+        try:
+            cache.set(self._result_key(key), outcome, timeout=RESULT_TTL)
+        except Exception as e:
+            logger.warning(f"Single-flight result not shared for {key}: {e}")
+
+    def _release(self, cache, key: str, token: str):
+        try:
+            if cache.get(self._lock_key(key)) == token:
+                cache.delete(self._lock_key(key))
+        except Exception as e:
+            logger.warning(f"Single-flight lock not released for {key}: {e}")
+
+    def _poll(self, cache, key: str, holder: str) -> Optional[dict]:
+        outcome = cache.get(self._result_key(key))
+        if outcome is not None and outcome.get('token') == holder:
+            return outcome
+        return None
+
+    @staticmethod
+    def _unwrap(outcome: dict) -> Any:
+        if 'error' in outcome:
+            raise CoalescedCallError(outcome['error'], outcome.get('error_type', ''))
+        return outcome['result']
+
+    # Async
+
+    async def ado(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Async counterpart of do(); in-process sharing is per event loop"""
+        loop = asyncio.get_running_loop()
+        flight_key = (id(loop), key)
+        future = self._async_calls.get(flight_key)
+        if future is not None:
+            self._incr('local_followers')
+            try:
+                result = await asyncio.wait_for(asyncio.shield(future), self.timeout)
+            except asyncio.TimeoutError:
+                self._incr('timeouts')
+                raise CoalesceTimeout(f"Timed out waiting for in-flight call {key}")
+            return copy.deepcopy(result)
+
+        future = self._async_calls[flight_key] = loop.create_future()
+        try:
+            result = await self._arun_shared(key, fn)
+            future.set_result(result)
+            return copy.deepcopy(result)
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark retrieved so an unawaited failure is not logged as lost
+            future.exception()
+            raise
+        finally:
+            self._async_calls.pop(flight_key, None)
+
+    async def _arun_shared(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        cache = caches[self.alias]
+        deadline = time.monotonic() + self.timeout
+        while True:
+            token = uuid.uuid4().hex
+            try:
+                acquired = await cache.aadd(self._lock_key(key), token, timeout=self.lock_ttl)
+                holder = None if acquired else await cache.aget(self._lock_key(key))
+            except Exception as e:
+                logger.warning(f"Single-flight lock unavailable for {key}: {e}")
+                acquired = None
+            if acquired is None:
+                self._incr('leaders')
+                return await fn()
+            if acquired:
+                return await self._alead(cache, key, token, fn)
+            if holder is None:
+                continue
+
+            self._incr('remote_followers')
+            while time.monotonic() < deadline:
+                await asyncio.sleep(self.poll_interval)
+                outcome = await cache.aget(self._result_key(key))
+                if outcome is not None and outcome.get('token') == holder:
+                    return self._unwrap(outcome)
+                if await cache.aget(self._lock_key(key)) != holder:
+                    break
+            else:
+                self._incr('timeouts')
+                raise CoalesceTimeout(f"Timed out waiting for another worker's call {key}")
+
+    async def _alead(self, cache, key: str, token: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        self._incr('leaders')
+        try:
+            result = await fn()
+        except Exception as e:
+            self._incr('errors')
+            await self._apublish(cache, key, {
+                'token': token, 'error': str(e), 'error_type': type(e).__name__,
+            })
+            raise
+        else:
+            await self._apublish(cache, key, {'token': token, 'result': result})
+            return result
+        finally:
+            try:
+                if await cache.aget(self._lock_key(key)) == token:
+                    await cache.adelete(self._lock_key(key))
+            except Exception as e:
+                logger.warning(f"Single-flight lock not released for {key}: {e}")
+
+    async def _apublish(self, cache, key: str, outcome: dict):
+        try:
+            await cache.aset(self._result_key(key), outcome, timeout=RESULT_TTL)
+        except Exception as e:
+            logger.warning(f"Single-flight result not shared for {key}: {e}")
+
+    # Stats
+
+    def stats(self) -> dict:
+        with self._lock:
+            counters = dict(self._counters)
+        calls = counters['leaders'] + counters['local_followers'] + counters['remote_followers']
+        counters['coalesced_rate'] = round(
+            (calls - counters['leaders']) / calls, 4
+        ) if calls else 0.0
+        return counters
+
+    def reset_stats(self):
+        with self._lock:
+            for name in self._counters:
+                self._counters[name] = 0
+
+    def _reset(self):
+        """After fork: in-flight calls belong to the parent"""
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._async_calls = {}
+        self._pid = os.getpid()
+
+    def _incr(self, name: str):
+        with self._lock:
+            self._counters[name] += 1
@@ -0,0 +1,226 @@
+"""
+Incremental JSON parser for streamed LLM output
+
+JSON-mode completions arrive a few characters at a time. ``feed`` accepts
+any chunk boundary (even inside an escape sequence) and returns what
+became known in that chunk:
+
+* ``delta`` events with newly decoded text of string values, so prose can
+  be shown while the model is still writing it
+* ``value`` events when a value completes at a depth up to ``max_depth``
+  (top-level fields and the elements of top-level arrays by default)
+
+Paths are tuples of object keys and array indexes, e.g.
+``('chapters', 0, 'text')``. The parsed document is available as
+``value`` once ``close()`` succeeds.
+"""
+import json
+import re
+from collections import namedtuple
+from typing import List
+
+JSONEvent = namedtuple('JSONEvent', ['kind', 'path', 'value'])
+
+# Parser states
+_VALUE = 'value'               # expecting any value
+_VALUE_OR_END = 'value_or_end'  # just after '['
+_KEY_OR_END = 'key_or_end'      # just after '{' or ','
+_COLON = 'colon'
+_AFTER_VALUE = 'after_value'    # expecting ',' or a closing bracket
+_STRING = 'string'
+_SCALAR = 'scalar'              # number, true, false or null
+_DONE = 'done'
+
+_WHITESPACE = ' \t\r\n'
+_SCALAR_START = '-0123456789tfn'
+_SCALAR_CHARS = re.compile(r'[-+.0-9eEtruefalsn]*')
+_STRING_RUN = re.compile(r'[^"\\]+')
+_ESCAPES = {'"': '"', '\\': '\\', '/': '/', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+
+
+class IncrementalJSONParser:
+    """Parse one JSON document from arbitrary text chunks"""
+
+    def __init__(self, max_depth: int = 2):
+        self.max_depth = max_depth
+        self.value = None
+        self._state = _VALUE
+        self._stack = []          # [container, key or next index]
+        self._string = []         # decoded parts of the current string
+        self._string_is_key = False
+        self._escape = None       # pending escape sequence after a backslash
+        self._high_surrogate = None
+        self._scalar = ''
+        self._delta = []          # string text decoded during this feed()
+
+    @property
+    def done(self) -> bool:
+        return self._state == _DONE
+
+    def feed(self, text: str) -> List[JSONEvent]:
+        events = []
+        i, n = 0, len(text)
+        while i < n:
+            state = self._state
+            if state == _STRING:
+                i = self._read_string(text, i, events)
+                continue
+            if state == _SCALAR:
+                run = _SCALAR_CHARS.match(text, i).end()
+                self._scalar += text[i:run]
+                i = run
+                if i < n:
+                    self._finish_scalar(events)
+                continue
+
+            char = text[i]
+            i += 1
+            if char in _WHITESPACE:
+                continue
+            if state == _DONE:
+                raise ValueError(f"Unexpected {char!r} after the JSON document")
+
+            if state == _COLON:
+                if char != ':':
+                    raise ValueError(f"Expected ':' but got {char!r}")
+                self._state = _VALUE
+            elif state == _KEY_OR_END:
+                if char == '"':
+                    self._start_string(is_key=True)
+                elif char == '}' and isinstance(self._stack[-1][0], dict):
+                    self._close(events)
+                else:
+                    raise ValueError(f"Expected an object key but got {char!r}")
+            elif state == _AFTER_VALUE:
+                container = self._stack[-1][0]
+                if char == ',':
+                    self._state = _KEY_OR_END if isinstance(container, dict) else _VALUE
+                elif char == ('}' if isinstance(container, dict) else ']'):
+                    self._close(events)
+                else:
+                    raise ValueError(f"Expected ',' or a closing bracket but got {char!r}")
+            elif state == _VALUE_OR_END and char == ']':
+                self._close(events)
+            else:
+                self._start_value(char)
+        self._flush_delta(events)
+        return events
+
+    def close(self):
+        """Finish the document; raises ValueError when it is incomplete"""
+        if self._state == _SCALAR and not self._stack:
+            self._finish_scalar([])
+        if self._state != _DONE:
+            raise ValueError('Incomplete JSON document')
+        return self.value
+
+    # Values
+
+    def _start_value(self, char: str):
+        if char == '{':
+            self._stack.append([{}, None])
+            self._state = _KEY_OR_END
+        elif char == '[':
+            self._stack.append([[], 0])
+            self._state = _VALUE_OR_END
+        elif char == '"':
+            self._start_string(is_key=False)
+        elif char in _SCALAR_START:
+            self._scalar = char
+            self._state = _SCALAR
+        else:
+            raise ValueError(f"Unexpected {char!r}")
+
+    def _finish_scalar(self, events: List[JSONEvent]):
+        literal, self._scalar = self._scalar, ''
+        self._complete(json.loads(literal), events)
+
+    def _close(self, events: List[JSONEvent]):
+        container, _ = self._stack.pop()
+        self._complete(container, events)
+
+    def _complete(self, value, events: List[JSONEvent]):
+        self._flush_delta(events)
+        if not self._stack:
+            self.value = value
+            self._state = _DONE
+            return
+        path = self._path()
+        frame = self._stack[-1]
+        if isinstance(frame[0], dict):
+            frame[0][frame[1]] = value
+        else:
+            frame[0].append(value)
+            frame[1] += 1
+        self._state = _AFTER_VALUE
+        if len(path) <= self.max_depth:
+            events.append(JSONEvent('value', path, value))
+
+    def _path(self) -> tuple:
+        return tuple(key for _, key in self._stack)
+
+    # Strings
+
+    def _start_string(self, is_key: bool):
+        self._string = []
+        self._string_is_key = is_key
+        self._state = _STRING
+
+    def _read_string(self, text: str, i: int, events: List[JSONEvent]) -> int:
+        """Consume string content from ``text[i:]``; returns the new position"""
+        n = len(text)
+        while i < n:
+            if self._escape is not None:
+                i = self._read_escape(text, i)
+                continue
+            run = _STRING_RUN.match(text, i)
+            if run:
+                self._append(run.group())
+                i = run.end()
+                continue
+            char = text[i]
+            i += 1
+            if char == '\\':
+                self._escape = ''
+                continue
+            # Closing quote
+            string = ''.join(self._string)
+            if self._string_is_key:
+                self._stack[-1][1] = string
+                self._state = _COLON
+            else:
+                self._complete(string, events)
+            return i
+        return i
+
+    def _read_escape(self, text: str, i: int) -> int:
+        self._escape += text[i]
+        i += 1
+        escape = self._escape
+        if escape[0] != 'u':
+            if escape not in _ESCAPES:
+                raise ValueError(f"Invalid escape \\{escape}")
+            self._escape = None
+            self._append(_ESCAPES[escape])
+        elif len(escape) == 5:
+            self._escape = None
+            code = int(escape[1:], 16)
+            if 0xD800 <= code < 0xDC00:
+                self._high_surrogate = code
+                return i
+            if 0xDC00 <= code < 0xE000 and self._high_surrogate is not None:
+                code = 0x10000 + ((self._high_surrogate - 0xD800) << 10) + (code - 0xDC00)
+            self._high_surrogate = None
+            self._append(chr(code))
+        return i
+
+    def _append(self, part: str):
+        self._string.append(part)
+        if not self._string_is_key:
+            self._delta.append(part)
+
+    def _flush_delta(self, events: List[JSONEvent]):
+        """Report string text decoded since the last event, under its path"""
+        if self._delta:
+            events.append(JSONEvent('delta', self._path(), ''.join(self._delta)))
+            self._delta = []
@@ -0,0 +1,72 @@
+import asyncio
+import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+
+from ai_analysis.benchmarking import BENCHMARK_SETTINGS, FakeOpenAIServer
+
+
+class Command(BaseCommand):
+    help = 'Compare sync (threadpool) and async LLM call throughput against a local fake OpenAI server'
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help='Analyses per run')
+        parser.add_argument('--latency', type=float, default=0.5, help='Fake upstream latency in seconds')
+        parser.add_argument('--threads', type=int, default=10,
+                            help='Sync worker threads (size of the ASGI sync threadpool)')
+        parser.add_argument('--concurrency', type=int, default=200, help='In-flight async calls')
+
+    def handle(self, *args, **options):
+        total = options['requests']
+
+        with override_settings(**BENCHMARK_SETTINGS), \
+                FakeOpenAIServer(latency=options['latency']) as server:
+            os.environ['OPENAI_BASE_URL'] = server.base_url
+
+            # Imported late so the clients pick up the fake base URL
+            from emotions.ai_analyzer import EmotionAnalyzer, AsyncEmotionAnalyzer
+
+            sync_elapsed = self._run_sync(EmotionAnalyzer(), total, options['threads'])
+            async_elapsed = asyncio.run(
+                self._run_async(AsyncEmotionAnalyzer(), total, options['concurrency'])
+            )
+            upstream_calls = server.request_count
+
+        self.stdout.write(f"Fake upstream latency: {options['latency'] * 1000:.0f} ms, "
+                          f"{total} analyses per run, {upstream_calls} upstream calls")
+        self._report(f"sync  ({options['threads']} threads)", total, sync_elapsed)
+        self._report(f"async ({options['concurrency']} in flight)", total, async_elapsed)
+        self.stdout.write(self.style.SUCCESS(
+            f'Async speedup: {sync_elapsed / async_elapsed:.1f}x'
+        ))
+
+    def _run_sync(self, analyzer, total, threads):
+        texts = self._texts(total)
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            list(executor.map(analyzer.analyze_text, texts))
+        return time.perf_counter() - start
+
+    async def _run_async(self, analyzer, total, concurrency):
+        texts = self._texts(total)
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def analyze(text):
+            async with semaphore:
+                return await analyzer.analyze_text(text)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(analyze(text) for text in texts))
+        return time.perf_counter() - start
+
+    def _texts(self, total):
+        # Unique texts so the response cache never short-circuits a call
+        return [f'benchmark note {uuid.uuid4()}' for _ in range(total)]
+
+    def _report(self, label, total, elapsed):
+        self.stdout.write(f'{label:<24} {elapsed:7.2f} s  {total / elapsed:8.1f} req/s')
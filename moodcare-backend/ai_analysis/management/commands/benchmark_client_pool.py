@@ -0,0 +1,64 @@
+import os
+import statistics
+import time
+import uuid
+
+import openai
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+
+from ai_analysis.benchmarking import BENCHMARK_SETTINGS, FakeOpenAIServer
+
+
+class Command(BaseCommand):
+    help = 'Compare per-request OpenAI clients with the shared pooled client against a local fake server'
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help='Sequential calls per run')
+        parser.add_argument('--latency', type=float, default=0.0, help='Fake upstream latency in seconds')
+
+    def handle(self, *args, **options):
+        total = options['requests']
+
+        with override_settings(**BENCHMARK_SETTINGS), \
+                FakeOpenAIServer(latency=options['latency']) as server:
+            os.environ['OPENAI_BASE_URL'] = server.base_url
+
+            from ai_analysis.clients import get_openai_client, reset_clients
+            from emotions.ai_analyzer import EmotionAnalyzer
+
+            reset_clients()
+            request = EmotionAnalyzer()._text_analysis_request('benchmark note', None)
+
+            def fresh_client():
+                # What every request paid before the registry existed
+                return openai.OpenAI(api_key=settings.OPENAI_API_KEY)
+
+            cold = self._run(fresh_client, request, total)
+            warm = self._run(get_openai_client, request, total)
+
+        self.stdout.write(f'{total} sequential calls, fake upstream latency '
+                          f"{options['latency'] * 1000:.0f} ms")
+        self._report('per-request client', cold)
+        self._report('shared pooled client', warm)
+        saved = statistics.mean(cold) - statistics.mean(warm)
+        self.stdout.write(self.style.SUCCESS(f'Saved per request: {saved * 1000:.2f} ms'))
+
+    def _run(self, client_factory, request, total):
+        timings = []
+        for _ in range(total):
+            # Vary the prompt so nothing upstream could be short-circuited
+            request['messages'][-1]['content'] = f'benchmark note {uuid.uuid4()}'
+            start = time.perf_counter()
+            client_factory().chat.completions.create(**request)
+            timings.append(time.perf_counter() - start)
+        return timings
+
+    def _report(self, label, timings):
+        timings = sorted(timings)
+        p50 = timings[len(timings) // 2] * 1000
+        p95 = timings[int(len(timings) * 0.95) - 1] * 1000
+        self.stdout.write(f'{label:<22} mean {statistics.mean(timings) * 1000:7.2f} ms  '
+                          f'p50 {p50:7.2f} ms  p95 {p95:7.2f} ms')
@@ -0,0 +1,89 @@
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Modules every web worker imports while loading URLconfs
+DEFAULT_TARGETS = (
+    'emotions.ai_analyzer',
+    'stories.ai_generator',
+    'music.recommender',
+)
+
+MARKER = '--moodcare-import-start--'
+
+PROBE = """
+import sys
+import django
+django.setup()
+sys.stderr.write({marker!r} + '\\n')
+sys.stderr.flush()
+for name in {targets!r}:
+    __import__(name)
+"""
+
+
+class Command(BaseCommand):
+    help = 'Measure import time of the AI modules (python -X importtime) and fail past a budget'
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('modules', nargs='*', help='Modules to import (default: AI analyzers)')
+        parser.add_argument('--budget-ms', type=float, default=None,
+                            help='Fail when cumulative import time exceeds this (default: IMPORT_TIME_BUDGET_MS)')
+        parser.add_argument('--top', type=int, default=15, help='Number of slowest modules to list')
+
+    def handle(self, *args, **options):
+        targets = tuple(options['modules']) or DEFAULT_TARGETS
+        budget = options['budget_ms']
+        if budget is None:
+            budget = getattr(settings, 'IMPORT_TIME_BUDGET_MS', 100)
+
+        rows = self._profile(targets)
+        # Top-level entries (depth 0) are what the targets pulled in directly
+        total_ms = sum(cumulative for _, cumulative, depth, _ in rows if depth == 0) / 1000
+        slowest = sorted(rows, key=lambda row: row[0], reverse=True)[:options['top']]
+
+        self.stdout.write(f"Imported: {', '.join(targets)}")
+        self.stdout.write(f"{'self ms':>10} {'cumul ms':>10}  module")
+        for self_us, cumulative_us, _, name in slowest:
+            self.stdout.write(f"{self_us / 1000:>10.1f} {cumulative_us / 1000:>10.1f}  {name}")
+
+        self.stdout.write(f"Total import time: {total_ms:.1f} ms (budget {budget:.0f} ms)")
+        if total_ms > budget:
+            raise CommandError(
+                f"Import time {total_ms:.1f} ms exceeds budget of {budget:.0f} ms"
+            )
+        self.stdout.write(self.style.SUCCESS('Within budget'))
+
+    def _profile(self, targets):
+        """Run the imports in a fresh interpreter and parse -X importtime output"""
+        env = os.environ.copy()
+        env.setdefault('DJANGO_SETTINGS_MODULE', settings.SETTINGS_MODULE)
+
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', PROBE.format(marker=MARKER, targets=targets)],
+            env=env,
+            cwd=settings.BASE_DIR,
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode != 0:
+            raise CommandError(f"Import probe failed:\n{result.stderr[-2000:]}")
+
+        _, _, output = result.stderr.partition(MARKER)
+        rows = []
+        for line in output.splitlines():
+            if not line.startswith('import time:'):
+                continue
+            try:
+                self_us, cumulative_us, name = line[len('import time:'):].split('|')
+                self_us, cumulative_us = int(self_us), int(cumulative_us)
+            except ValueError:
+                # Column header line
+                continue
+            depth = (len(name) - len(name.lstrip()) - 1) // 2
+            rows.append((self_us, cumulative_us, depth, name.strip()))
+        return rows
@@ -0,0 +1,112 @@
+import asyncio
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+
+from ai_analysis.benchmarking import BENCHMARK_SETTINGS, FakeOpenAIServer
+from ai_analysis.coalesce import CoalesceTimeout, SingleFlight
+
+
+class Command(BaseCommand):
+    help = 'Upstream calls for bursts of identical AI requests with single-flight coalescing'
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('--burst', type=int, default=50, help='Identical concurrent requests')
+        parser.add_argument('--latency', type=float, default=0.3, help='Fake upstream latency in seconds')
+
+    def handle(self, *args, **options):
+        burst, latency = options['burst'], options['latency']
+
+        with override_settings(**BENCHMARK_SETTINGS), \
+                FakeOpenAIServer(latency=latency) as server:
+            os.environ['OPENAI_BASE_URL'] = server.base_url
+
+            # Imported late so the clients pick up the fake base URL
+            from emotions.ai_analyzer import AsyncEmotionAnalyzer, EmotionAnalyzer
+
+            text = f'double submitted note {uuid.uuid4()}'
+            analyzer = EmotionAnalyzer()
+            with ThreadPoolExecutor(max_workers=burst) as executor:
+                results = list(executor.map(lambda _: analyzer.analyze_text(text, mode='llm'),
+                                            range(burst)))
+            self._check('sync analyze_text', burst, server.request_count, results)
+
+            before = server.request_count
+            text = f'double submitted note {uuid.uuid4()}'
+            analyzer = AsyncEmotionAnalyzer()
+
+            async def async_burst():
+                return await asyncio.gather(*(
+                    analyzer.analyze_text(text, mode='llm') for _ in range(burst)
+                ))
+
+            results = asyncio.run(async_burst())
+            self._check('async analyze_text', burst, server.request_count - before, results)
+
+            self._cross_worker(burst)
+
+    def _check(self, label, burst, upstream, results):
+        if any('error' in result for result in results):
+            raise CommandError(f"{label}: some requests failed")
+        self.stdout.write(f"{label:<28} {burst} requests -> {upstream} upstream call(s)")
+        if upstream != 1:
+            raise CommandError(f"{label}: expected 1 upstream call, got {upstream}")
+
+    def _cross_worker(self, burst):
+        """Two SingleFlight instances stand in for two workers sharing the cache"""
+        workers = [SingleFlight('bench', poll_interval=0.01), SingleFlight('bench', poll_interval=0.01)]
+        calls = []
+        lock = threading.Lock()
+
+        def upstream(value=None, error=None, delay=0.2):
+            def fn():
+                with lock:
+                    calls.append(1)
+                time.sleep(delay)
+                if error:
+                    raise error
+                return value
+            return fn
+
+        def run(fn, key):
+            def call(i):
+                try:
+                    return workers[i % 2].do(key, fn)
+                except Exception as e:
+                    return e
+            with ThreadPoolExecutor(max_workers=burst) as executor:
+                return list(executor.map(call, range(burst)))
+
+        results = run(upstream({'ok': True}), 'shared')
+        if len(calls) != 1 or any(result != {'ok': True} for result in results):
+            raise CommandError(f"Cross-worker: {len(calls)} upstream calls, results {results[:3]}")
+        self.stdout.write(f"{'cross-worker':<28} {burst} requests -> {len(calls)} upstream call(s)")
+
+        calls.clear()
+        results = run(upstream(error=ValueError('upstream 500')), 'failing')
+        kinds = {type(result).__name__ for result in results}
+        if len(calls) != 1 or not kinds <= {'ValueError', 'CoalescedCallError'}:
+            raise CommandError(f"Error propagation: {len(calls)} calls, {kinds}")
+        self.stdout.write(
+            f"{'error propagation':<28} {burst} failures from {len(calls)} call ({', '.join(sorted(kinds))})"
+        )
+
+        calls.clear()
+        for worker in workers:
+            worker.timeout = 0.1
+        results = run(upstream({'ok': True}, delay=0.5), 'slow')
+        timeouts = sum(isinstance(result, CoalesceTimeout) for result in results)
+        if len(calls) != 1 or timeouts != burst - 1:
+            raise CommandError(f"Timeouts: {len(calls)} calls, {timeouts} timeouts")
+        self.stdout.write(f"{'follower timeout':<28} {timeouts} followers timed out, leader finished")
+
+        stats = workers[0].stats()
+        self.stdout.write(self.style.SUCCESS(
+            f"Duplicate upstream calls: 0 (worker 0 stats: {stats})"
+        ))
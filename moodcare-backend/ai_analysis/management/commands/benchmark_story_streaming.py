@@ -0,0 +1,92 @@
+import asyncio
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+
+from ai_analysis.benchmarking import BENCHMARK_SETTINGS, FAKE_COMPLETION_CONTENT, FakeOpenAIServer
+
+PARAGRAPH = ' '.join(['The lantern swayed as she walked toward the quiet river.'] * 8)
+
+
+def story_content(paragraphs):
+    """A medium-length story in the shape the story prompt asks for"""
+    text = '\n\n'.join([PARAGRAPH] * paragraphs)
+    return {
+        **FAKE_COMPLETION_CONTENT,
+        'title': 'The Lantern by the River',
+        'content': text,
+        'chapters': [
+            {'number': number, 'title': f'Chapter {number}', 'text': PARAGRAPH}
+            for number in range(1, 4)
+        ],
+    }
+
+
+class Command(BaseCommand):
+    help = 'Time to title and first paragraph for streamed vs. one-shot story generation'
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('--latency', type=float, default=0.5, help='Fake time to first token (s)')
+        parser.add_argument('--token-interval', type=float, default=0.003, help='Seconds per token')
+        parser.add_argument('--paragraphs', type=int, default=20)
+
+    def handle(self, *args, **options):
+        content = story_content(options['paragraphs'])
+        with override_settings(**BENCHMARK_SETTINGS), FakeOpenAIServer(
+            latency=options['latency'], content=content, token_interval=options['token_interval']
+        ) as server:
+            os.environ['OPENAI_BASE_URL'] = server.base_url
+
+            # Imported late so the clients pick up the fake base URL
+            from stories.ai_generator import AsyncStoryGenerator
+
+            generator = AsyncStoryGenerator()
+            arguments = dict(story_type='healing', current_emotion='sadness', emotion_intensity=6)
+
+            start = time.perf_counter()
+            one_shot = asyncio.run(generator.generate_story(**arguments))
+            one_shot_seconds = time.perf_counter() - start
+            if one_shot.get('title') != content['title']:
+                raise CommandError(f"One-shot generation failed: {one_shot.get('title')}")
+
+            streamed, marks = asyncio.run(self._stream(generator, arguments))
+
+        if streamed['fallback'] or streamed['story']['content'] != content['content']:
+            raise CommandError('Streamed story does not match the completion')
+        if streamed['story']['word_count'] != one_shot['word_count']:
+            raise CommandError('Streamed and one-shot metadata differ')
+
+        self.stdout.write(f"{'one-shot: story returned':<34} {one_shot_seconds * 1000:7.0f} ms")
+        for label, key in (('streamed: title', 'title'),
+                           ('streamed: first paragraph', 'paragraph'),
+                           ('streamed: first chapter', 'chapter'),
+                           ('streamed: complete', 'story')):
+            self.stdout.write(f"{label:<34} {marks[key] * 1000:7.0f} ms")
+        self.stdout.write(f"{'events sent':<34} {marks['events']:7d}")
+
+        if marks['paragraph'] >= one_shot_seconds / 4:
+            raise CommandError('Streaming did not bring the first paragraph forward')
+        self.stdout.write(self.style.SUCCESS(
+            f"First paragraph {one_shot_seconds / marks['paragraph']:.0f}x sooner than the one-shot story"
+        ))
+
+    async def _stream(self, generator, arguments):
+        start = time.perf_counter()
+        marks = {'events': 0}
+        content = ''
+        final = None
+        async for event in generator.stream_story(**arguments):
+            marks['events'] += 1
+            elapsed = time.perf_counter() - start
+            if event['type'] == 'content_delta':
+                content += event['text']
+                if '\n\n' in content:
+                    marks.setdefault('paragraph', elapsed)
+            elif event['type'] in ('title', 'chapter', 'story'):
+                marks.setdefault(event['type'], elapsed)
+            if event['type'] == 'story':
+                final = event
+        return final, marks
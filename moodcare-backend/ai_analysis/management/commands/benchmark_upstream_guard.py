@@ -0,0 +1,182 @@
+import asyncio
+import os
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+
+from ai_analysis.benchmarking import BENCHMARK_SETTINGS, FakeOpenAIServer
+
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class TailLatency:
+    """Mostly fast responses with a slow tail, reproducible across runs"""
+
+    def __init__(self, fast, slow, slow_share, seed=7):
+        self.fast, self.slow, self.slow_share = fast, slow, slow_share
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        with self._lock:
+            return self.slow if self._rng.random() < self.slow_share else self.fast
+
+
+class Command(BaseCommand):
+    help = 'Tail latency of AI calls with and without the upstream SLO guard (deadline, hedging, breaker)'
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('--calls', type=int, default=300)
+        parser.add_argument('--concurrency', type=int, default=10)
+        parser.add_argument('--fast', type=float, default=0.05, help='Typical upstream latency (s)')
+        parser.add_argument('--slow', type=float, default=2.0, help='Tail upstream latency (s)')
+        parser.add_argument('--slow-share', type=float, default=0.03, help='Share of slow responses; keep below 5%% so p95 is fast')
+
+    def handle(self, *args, **options):
+        policies = {
+            'emotion-analysis': {'deadline': 1.0, 'hedge': True, 'hedge_min_delay': 0.05},
+            'bench-deadline': {'deadline': 0.3},
+            'bench-breaker': {'deadline': 1.0, 'min_calls': 5, 'window': 10, 'cooldown': 0.5},
+        }
+        with override_settings(**BENCHMARK_SETTINGS, AI_UPSTREAM_POLICIES=policies), \
+                FakeOpenAIServer(latency=options['fast']) as server:
+            os.environ['OPENAI_BASE_URL'] = server.base_url
+
+            # Imported late so the clients pick up the fake base URL
+            from ai_analysis import upstream
+            from ai_analysis.clients import get_async_openai_client, get_openai_client
+            from emotions.ai_analyzer import EmotionAnalyzer
+
+            self._tail(server, options, get_openai_client(), upstream, EmotionAnalyzer())
+            self._deadline(server, get_openai_client(), upstream)
+            self._breaker(server, get_openai_client(), upstream, EmotionAnalyzer())
+            self._async(server, options, get_async_openai_client, upstream)
+
+    def _request(self):
+        # Unique content so nothing is served from a cache
+        return {
+            'model': 'gpt-4-turbo-preview',
+            'messages': [{'role': 'user', 'content': f'benchmark {uuid.uuid4()}'}],
+        }
+
+    def _timed(self, fn, calls, concurrency):
+        def one(_):
+            start = time.perf_counter()
+            try:
+                fn()
+            except Exception:
+                pass
+            return time.perf_counter() - start
+
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            return list(executor.map(one, range(calls)))
+
+    def _report(self, label, samples):
+        p50, p95, p99 = (percentile(samples, q) * 1000 for q in (0.5, 0.95, 0.99))
+        self.stdout.write(f"{label:<34} p50 {p50:7.0f} ms  p95 {p95:7.0f} ms  p99 {p99:7.0f} ms")
+        return p99
+
+    def _tail(self, server, options, client, upstream, analyzer):
+        calls, concurrency = options['calls'], options['concurrency']
+        server.set_latency(TailLatency(options['fast'], options['slow'], options['slow_share']))
+
+        direct = self._report('direct client call', self._timed(
+            lambda: client.chat.completions.create(**self._request()), calls, concurrency
+        ))
+
+        guard = upstream.guard_for('emotion-analysis')
+        guarded = self._report('guarded, hedged after p95', self._timed(
+            lambda: analyzer.analyze_text(f'benchmark {uuid.uuid4()}', mode='llm'),
+            calls, concurrency
+        ))
+        stats = guard.stats()
+        self.stdout.write(
+            f"{'':<34} {stats['hedges']} hedges ({stats['hedges'] * 100 / calls:.1f}% extra calls), "
+            f"{stats['hedge_wins']} won, {stats['deadline_exceeded']} past the deadline"
+        )
+        if guarded >= direct / 2:
+            raise CommandError(f"Hedging did not cut the tail: p99 {guarded:.0f} vs {direct:.0f} ms")
+        server.set_latency(options['fast'])
+
+    def _deadline(self, server, client, upstream):
+        server.set_latency(3.0)
+        guard = upstream.guard_for('bench-deadline')
+        start = time.perf_counter()
+        try:
+            upstream.create_completion(client, self._request(), 'bench-deadline')
+        except upstream.DeadlineExceeded:
+            pass
+        else:
+            raise CommandError('A 3 s upstream call finished within a 0.3 s deadline')
+        elapsed = time.perf_counter() - start
+        self.stdout.write(f"{'deadline 0.3 s, upstream 3 s':<34} caller released after {elapsed * 1000:.0f} ms")
+        if elapsed > guard.deadline + 0.2:
+            raise CommandError(f"Deadline not enforced: {elapsed:.2f}s")
+        server.set_latency(0.01)
+
+    def _breaker(self, server, client, upstream, analyzer):
+        server.set_failing(True)
+        guard = upstream.guard_for('bench-breaker')
+        before = server.request_count
+        outcomes = []
+        for _ in range(30):
+            try:
+                upstream.create_completion(client, self._request(), 'bench-breaker')
+                outcomes.append('ok')
+            except upstream.UpstreamUnavailable:
+                outcomes.append('rejected')
+            except Exception:
+                outcomes.append('error')
+        sent = server.request_count - before
+        self.stdout.write(
+            f"{'outage, 30 calls':<34} {sent} reached upstream, "
+            f"{outcomes.count('rejected')} failed fast (breaker {guard.breaker.state})"
+        )
+        if guard.breaker.state != 'open' or sent > 10:
+            raise CommandError(f"Breaker did not open: {guard.stats()}")
+
+        # Fallback path end to end: the analyzer still answers during an outage
+        start = time.perf_counter()
+        result = analyzer.analyze_text(f'benchmark {uuid.uuid4()}', mode='llm')
+        elapsed = (time.perf_counter() - start) * 1000
+        self.stdout.write(
+            f"{'analyzer during outage':<34} {result['primary_emotion']} fallback in {elapsed:.0f} ms"
+        )
+
+        server.set_failing(False)
+        time.sleep(guard.breaker.cooldown)
+        upstream.create_completion(client, self._request(), 'bench-breaker')
+        self.stdout.write(f"{'after cooldown':<34} probe succeeded, breaker {guard.breaker.state}")
+        if guard.breaker.state != 'closed':
+            raise CommandError('Breaker did not close after a successful probe')
+
+    def _async(self, server, options, get_client, upstream):
+        server.set_latency(TailLatency(options['fast'], options['slow'], options['slow_share'], seed=11))
+
+        async def run():
+            client = get_client()
+            semaphore = asyncio.Semaphore(options['concurrency'])
+
+            async def one():
+                async with semaphore:
+                    start = time.perf_counter()
+                    await upstream.acreate_completion(client, self._request(), 'emotion-analysis')
+                    return time.perf_counter() - start
+
+            return await asyncio.gather(*(one() for _ in range(options['calls'])))
+
+        p99 = self._report('async guarded, hedged after p95', asyncio.run(run()))
+        self.stdout.write(self.style.SUCCESS(
+            f"Upstream stats: {upstream.all_stats()['emotion-analysis']}"
+        ))
+        if p99 > options['slow'] * 1000 / 2:
+            raise CommandError(f"Async hedging did not cut the tail: p99 {p99:.0f} ms")
@@ -1,3 +1,49 @@
-from django.test import TestCase
+import asyncio
 
-# Create your tests here.
+from django.test import SimpleTestCase
+
+from .upstream import CircuitBreaker, UpstreamGuard
+
+
+class CircuitBreakerTests(SimpleTestCase):
+    """Half-open probes after the cooldown"""
+
+    def open_guard(self):
+        guard = UpstreamGuard('test', deadline=5.0, min_calls=1, cooldown=0.0, hedge=False)
+        guard.breaker.record(failed=True, slow=False)
+        self.assertEqual(guard.breaker.state, CircuitBreaker.OPEN)
+        return guard
+
+    def test_cancelled_probe_frees_the_slot(self):
+        guard = self.open_guard()
+
+        async def hang(timeout):
+            await asyncio.sleep(60)
+
+        async def ok(timeout):
+            return 'ok'
+
+        async def scenario():
+            probe = asyncio.ensure_future(guard.acall(hang))
+            await asyncio.sleep(0.01)
+            self.assertEqual(guard.breaker.state, CircuitBreaker.HALF_OPEN)
+            # Another call while the probe is in flight is rejected
+            self.assertFalse(guard.breaker.allow())
+            probe.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await probe
+            return await guard.acall(ok)
+
+        self.assertEqual(asyncio.run(scenario()), 'ok')
+        self.assertEqual(guard.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_failed_probe_reopens(self):
+        guard = self.open_guard()
+
+        async def fail(timeout):
+            raise ConnectionError('still down')
+
+        with self.assertRaises(ConnectionError):
+            asyncio.run(guard.acall(fail))
+        self.assertEqual(guard.breaker.state, CircuitBreaker.OPEN)
+        self.assertEqual(guard.breaker.opened, 2)
@@ -0,0 +1,367 @@
+"""
+Latency-SLO guard for upstream AI calls
+
+Every OpenAI/Spotify call goes through an ``UpstreamGuard`` for its
+endpoint, which gives it:
+
+* a deadline: the OpenAI request gets the remaining time as its timeout
+  and no client retries, and the caller stops waiting once the deadline
+  passes (``DeadlineExceeded``)
+* optional hedging: when the first attempt is still running after the
+  endpoint's observed p95 latency, a second identical attempt starts and
+  the first success wins
+* a circuit breaker: once errors or slow calls make up too much of the
+  recent window, calls fail fast with ``UpstreamUnavailable`` for a
+  cooldown. A single probe then decides whether to close it again.
+
+Callers keep their existing ``except Exception`` fallbacks (neutral
+analysis, fallback story, mock recommendations), so tail latency is
+bounded even during upstream incidents. Policies come from
+AI_UPSTREAM_POLICIES; breakers and latency windows are per process.
+"""
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POLICY = {
+    'deadline': 30.0,        # seconds the caller waits in total
+    'slow_after': None,      # a call slower than this counts against the breaker (default deadline / 2)
+    'hedge': False,          # start a second attempt after the p95 latency
+    'hedge_quantile': 0.95,
+    'hedge_min_delay': 0.2,
+}
+BREAKER_DEFAULTS = {
+    'window': 20,            # recent calls considered
+    'min_calls': 10,         # calls needed before the breaker can open
+    'failure_rate': 0.5,     # errors/timeouts that open it
+    'slow_rate': 0.8,        # slow calls that open it
+    'cooldown': 30.0,        # seconds open before a probe is allowed
+}
+LATENCY_SAMPLES = 200
+MIN_HEDGE_SAMPLES = 20
+
+
+class UpstreamUnavailable(Exception):
+    """The endpoint's circuit breaker is open; use the fallback"""
+
+
+class DeadlineExceeded(TimeoutError):
+    """The call did not finish within the endpoint's deadline"""
+
+
+class LatencyWindow:
+    """Latencies of the most recent successful calls"""
+
+    def __init__(self, size: int = LATENCY_SAMPLES):
+        self._samples = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def quantile(self, q: float) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._samples)
+        if len(samples) < MIN_HEDGE_SAMPLES:
+            return None
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+
+class CircuitBreaker:
+    """Closed -> open on error/slow spikes -> half-open probe after a cooldown"""
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, window: int, min_calls: int, failure_rate: float,
+                 slow_rate: float, cooldown: float):
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_rate = slow_rate
+        self.cooldown = cooldown
+        self.state = self.CLOSED
+        self.opened = 0
+        self._outcomes = deque(maxlen=window)  # (failed, slow)
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.cooldown:
+                self.state = self.HALF_OPEN
+            if self.state == self.HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record(self, failed: bool, slow: bool):
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self._probing = False
+                if failed or slow:
+                    self._open()
+                else:
+                    self.state = self.CLOSED
+                    self._outcomes.clear()
+                return
+            if self.state == self.OPEN:
+                return  # a straggler from before the breaker opened
+
+            self._outcomes.append((failed, slow))
+            calls = len(self._outcomes)
+            if calls < self.min_calls:
+                return
+            failures = sum(1 for f, _ in self._outcomes if f)
+            slows = sum(1 for _, s in self._outcomes if s)
+            if failures / calls >= self.failure_rate or slows / calls >= self.slow_rate:
+                self._open()
+
+    def release(self):
+        """A call ended without an outcome (cancelled); a half-open breaker may probe again"""
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self._probing = False
+
+    def _open(self):
+        self.state = self.OPEN
+        self.opened += 1
+        self._opened_at = time.monotonic()
+        self._outcomes.clear()
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _thread_pool() -> ThreadPoolExecutor:
+    """Threads for sync attempts, so callers can stop waiting at the deadline"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, 'AI_UPSTREAM_MAX_THREADS', 64),
+                    thread_name_prefix='upstream'
+                )
+    return _executor
+
+
+def _reset_after_fork():
+    """A forked worker cannot use the parent's threads; start a fresh pool"""
+    global _executor, _executor_lock
+    _executor = None
+    _executor_lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+class UpstreamGuard:
+    """Deadline, hedging and circuit breaker for one upstream endpoint"""
+
+    def __init__(self, name: str, **policy):
+        self.name = name
+        settings_policy = getattr(settings, 'AI_UPSTREAM_POLICIES', {}).get(name, {})
+        merged = {**DEFAULT_POLICY, **settings_policy, **policy}
+        self.deadline = float(merged['deadline'])
+        self.slow_after = float(merged['slow_after'] or self.deadline / 2)
+        self.hedge = bool(merged['hedge'])
+        self.hedge_quantile = merged['hedge_quantile']
+        self.hedge_min_delay = merged['hedge_min_delay']
+
+        breaker = {
+            **BREAKER_DEFAULTS,
+            **getattr(settings, 'AI_UPSTREAM_BREAKER', {}),
+            **{key: merged[key] for key in BREAKER_DEFAULTS if key in merged},
+        }
+        self.breaker = CircuitBreaker(**breaker)
+        self.latency = LatencyWindow()
+        self._lock = threading.Lock()
+        self._counters = {
+            'calls': 0, 'rejected': 0, 'deadline_exceeded': 0, 'errors': 0,
+            'hedges': 0, 'hedge_wins': 0,
+        }
+
+    def hedge_delay(self) -> Optional[float]:
+        """Seconds to wait before hedging, or None when hedging is off or uncalibrated"""
+        if not self.hedge:
+            return None
+        p = self.latency.quantile(self.hedge_quantile)
+        if p is None:
+            return None
+        return max(p, self.hedge_min_delay)
+
+    # Sync
+
+    def call(self, fn: Callable[[float], Any]) -> Any:
+        """
+        Run ``fn(timeout)`` under the endpoint policy.
+
+        ``fn`` receives the seconds left until the deadline and should pass
+        them to the client as its request timeout.
+        """
+        self._admit()
+        start = time.monotonic()
+        deadline = start + self.deadline
+        pool = _thread_pool()
+
+        primary = pool.submit(fn, self.deadline)
+        attempts = [primary]
+        delay = self.hedge_delay()
+        error = None
+        try:
+            while attempts:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise DeadlineExceeded(f"{self.name}: no response within {self.deadline:.1f}s")
+                wait_for = remaining
+                if delay is not None:
+                    wait_for = min(remaining, max(start + delay - time.monotonic(), 0))
+                done, _ = wait(attempts, timeout=wait_for, return_when=FIRST_COMPLETED)
+                for future in done:
+                    attempts.remove(future)
+                    if future.exception() is None:
+                        self._succeeded(start, hedge_won=future is not primary)
+                        return future.result()
+                    error = future.exception()
+                if not done and delay is not None:
+                    # Primary still running at the p95 latency: hedge once
+                    delay = None
+                    self._incr('hedges')
+                    attempts.append(pool.submit(fn, max(deadline - time.monotonic(), 0.01)))
+            raise error
+        except BaseException as e:
+            self._failed(e)
+            raise
+
+    # Async
+
+    async def acall(self, fn: Callable[[float], Awaitable[Any]]) -> Any:
+        """Async counterpart of call(); losing attempts are cancelled"""
+        self._admit()
+        start = time.monotonic()
+        deadline = start + self.deadline
+
+        primary = asyncio.ensure_future(fn(self.deadline))
+        attempts = {primary}
+        delay = self.hedge_delay()
+        error = None
+        try:
+            while attempts:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise DeadlineExceeded(f"{self.name}: no response within {self.deadline:.1f}s")
+                wait_for = remaining
+                if delay is not None:
+                    wait_for = min(remaining, max(start + delay - time.monotonic(), 0))
+                done, attempts = await asyncio.wait(
+                    attempts, timeout=wait_for, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        self._succeeded(start, hedge_won=task is not primary)
+                        return task.result()
+                    error = task.exception()
+                if not done and delay is not None:
+                    delay = None
+                    self._incr('hedges')
+                    attempts.add(asyncio.ensure_future(fn(max(deadline - time.monotonic(), 0.01))))
+            raise error
+        except BaseException as e:
+            self._failed(e)
+            raise
+        finally:
+            for task in attempts:
+                task.cancel()
+
+    # Bookkeeping
+
+    def _admit(self):
+        self._incr('calls')
+        if not self.breaker.allow():
+            self._incr('rejected')
+            raise UpstreamUnavailable(f"{self.name}: circuit open, serving fallback")
+
+    def _succeeded(self, start: float, hedge_won: bool = False):
+        if hedge_won:
+            self._incr('hedge_wins')
+        elapsed = time.monotonic() - start
+        self.latency.record(elapsed)
+        self.breaker.record(failed=False, slow=elapsed > self.slow_after)
+
+    def stream_failed(self, error: BaseException):
+        """A streamed response broke after the call itself had succeeded"""
+        self._failed(error)
+
+    def _failed(self, error: BaseException):
+        if isinstance(error, asyncio.CancelledError):
+            # Says nothing about the upstream, but must not hold the probe slot
+            self.breaker.release()
+            return
+        self._incr('deadline_exceeded' if isinstance(error, DeadlineExceeded) else 'errors')
+        self.breaker.record(failed=True, slow=isinstance(error, DeadlineExceeded))
+        logger.warning(f"Upstream {self.name} failed: {error}")
+
+    def stats(self) -> Dict:
+        with self._lock:
+            counters = dict(self._counters)
+        counters['state'] = self.breaker.state
+        counters['opened'] = self.breaker.opened
+        p50, p95 = self.latency.quantile(0.5), self.latency.quantile(0.95)
+        counters['p50_ms'] = round(p50 * 1000, 1) if p50 is not None else None
+        counters['p95_ms'] = round(p95 * 1000, 1) if p95 is not None else None
+        return counters
+
+    def _incr(self, name: str):
+        with self._lock:
+            self._counters[name] += 1
+
+
+_guards = {}
+_guards_lock = threading.Lock()
+
+
+def guard_for(name: str) -> UpstreamGuard:
+    """Process-wide guard for an endpoint named in AI_UPSTREAM_POLICIES"""
+    guard = _guards.get(name)
+    if guard is None:
+        with _guards_lock:
+            guard = _guards.get(name)
+            if guard is None:
+                guard = _guards[name] = UpstreamGuard(name)
+    return guard
+
+
+def all_stats() -> Dict[str, Dict]:
+    return {name: guard.stats() for name, guard in list(_guards.items())}
+
+
+def create_completion(client, request: Dict, endpoint: str):
+    """``client.chat.completions.create(**request)`` under the endpoint's guard"""
+    return guard_for(endpoint).call(
+        lambda timeout: client.with_options(max_retries=0, timeout=timeout)
+        .chat.completions.create(**request)
+    )
+
+
+async def acreate_completion(client, request: Dict, endpoint: str):
+    """Async counterpart of create_completion"""
+    return await guard_for(endpoint).acall(
+        lambda timeout: client.with_options(max_retries=0, timeout=timeout)
+        .chat.completions.create(**request)
+    )
@@ -0,0 +1,53 @@
+"""
+Optional preloading of heavy AI dependencies
+
+The analyzers import openai, numpy, audio and Spotify libraries on first
+use so management commands, migrations and cold workers start quickly.
+Long-running servers can opt back into paying that cost once, in the
+gunicorn master before workers fork, so the modules are shared
+copy-on-write and no request sees the first-import latency.
+"""
+import importlib
+import logging
+import time
+from typing import Dict, Iterable
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+HEAVY_MODULES = (
+    'httpx',
+    'openai',
+    'numpy',
+    'speech_recognition',
+    'pydub',
+    'spotipy',
+)
+
+
+def warmup(modules: Iterable[str] = HEAVY_MODULES) -> Dict[str, float]:
+    """
+    Import ``modules`` now and return the milliseconds spent on each.
+
+    Missing optional packages are skipped rather than failing startup.
+    """
+    timings = {}
+    for name in modules:
+        start = time.perf_counter()
+        try:
+            importlib.import_module(name)
+        except ImportError as e:
+            logger.info(f"Warmup skipped {name}: {e}")
+            continue
+        timings[name] = round((time.perf_counter() - start) * 1000, 2)
+
+    logger.info(f"Warmed up AI dependencies: {timings}")
+    return timings
+
+
+def warmup_if_enabled() -> Dict[str, float]:
+    """Run :func:`warmup` when ``AI_WARMUP`` is on"""
+    if not getattr(settings, 'AI_WARMUP', False):
+        return {}
+    return warmup()
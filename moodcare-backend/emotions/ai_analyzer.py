@@ -1,23 +1,44 @@
 """
 AI-powered emotion analysis module
 """
-import openai
 import json
-import numpy as np
+import logging
 from typing import Dict, List, Optional
 from django.conf import settings
-import speech_recognition as sr
-from pydub import AudioSegment
-import io
-import tempfile
-import os
+from django.utils import timezone
+from asgiref.sync import sync_to_async
+from datetime import datetime
+
+from ai_analysis.cache import ResponseCache, normalize_text
+from ai_analysis.clients import get_async_openai_client, get_openai_client, registry
+from ai_analysis.coalesce import SingleFlight
+from ai_analysis.upstream import acreate_completion, create_completion
+from . import history
+from .audio import DecodedAudio, decode_audio
+from .lexicon import LexiconClassifier
+
+logger = logging.getLogger(__name__)
+
+# Shared across analyzer instances so every request in the process benefits
+analysis_cache = ResponseCache('emotion-analysis')
+# Identical concurrent requests share one upstream call
+analysis_flights = SingleFlight('emotion-analysis')
+insight_flights = SingleFlight('emotion-insights')
+
 
 class EmotionAnalyzer:
     """Advanced emotion analysis using GPT-4 and speech recognition"""
     
+    MODEL = "gpt-4-turbo-preview"
+    # Bump whenever the analysis prompt changes so stale cache entries are ignored
+    PROMPT_VERSION = 1
+    # local: lexicon only; llm: GPT only; local-then-llm: GPT only when the
+    # lexicon is unsure, and the lexicon result when GPT is unavailable
+    ANALYSIS_MODES = ('local', 'llm', 'local-then-llm')
+    
     def __init__(self):
-        self.client = openai.OpenAI(api_key=settings.OPENAI_API_KEY)
-        self.recognizer = sr.Recognizer()
+        self.client = get_openai_client()
+        self._recognizer = None
         
         # Emotion categories and their characteristics
         self.emotion_categories = {
@@ -30,98 +51,195 @@ class EmotionAnalyzer:
             'trust': ['trusting', 'secure', 'confident', 'comfortable'],
             'anticipation': ['excited', 'eager', 'hopeful', 'expectant']
         }
+        self.lexicon = LexiconClassifier(self.emotion_categories)
     
-    def analyze_text(self, text: str, context: Optional[Dict] = None) -> Dict:
+    @property
+    def recognizer(self):
+        """Speech recognizer, created (and its library imported) on first voice note"""
+        if self._recognizer is None:
+            import speech_recognition as sr
+            self._recognizer = sr.Recognizer()
+            self._recognizer.operation_timeout = getattr(settings, 'VOICE_TRANSCRIBE_TIMEOUT', 30)
+        return self._recognizer
+    
+    def analyze_text(self, text: str, context: Optional[Dict] = None,
+                     mode: Optional[str] = None) -> Dict:
         """
-        Analyze emotions from text input using GPT-4
+        Analyze emotions from text input using GPT-4 and/or the local lexicon
         
         Args:
             text: Input text to analyze
             context: Optional context information (location, activity, etc.)
+            mode: One of ANALYSIS_MODES (default: EMOTION_ANALYSIS_MODE)
         
         Returns:
             Dictionary containing emotion analysis results
         """
+        local = self._local_first(text, mode)
+        if local is not None and local.get('analysis_tier') == 'local':
+            return self._stamp_analysis(local, text, context)
+        
+        cache_key = self._text_cache_key(text, context)
+        cached = analysis_cache.get(cache_key)
+        if cached is not None:
+            return self._stamp_analysis(cached, text, context)
+        
         try:
-            # Prepare context for better analysis
-            context_str = ""
-            if context:
-                context_str = f"\nContext: Location: {context.get('location', 'unknown')}, "
-                context_str += f"Activity: {context.get('activity', 'unknown')}, "
-                context_str += f"Weather: {context.get('weather', 'unknown')}"
-            
-            # Create prompt for GPT-4
-            prompt = f"""
-            Analyze the following text for emotional content. {context_str}
-            
-            Text: "{text}"
-            
-            Please provide:
-            1. Primary emotion (from: joy, sadness, anger, fear, surprise, disgust, trust, anticipation)
-            2. Emotion intensity (1-10 scale)
-            3. Secondary emotions present
-            4. Emotional triggers identified
-            5. Brief psychological insight
-            6. Suggested coping strategies (if negative emotions)
-            
-            Return the analysis in JSON format with keys:
-            primary_emotion, intensity, secondary_emotions[], triggers[], insight, suggestions[]
-            """
-            
-            response = self.client.chat.completions.create(
-                model="gpt-4-turbo-preview",
-                messages=[
-                    {"role": "system", "content": "You are an expert psychologist and emotion analyst."},
-                    {"role": "user", "content": prompt}
-                ],
-                response_format={"type": "json_object"},
-                temperature=0.7,
-                max_tokens=500
+            analysis = analysis_flights.do(
+                cache_key, lambda: self._fetch_text_analysis(text, context, cache_key)
             )
-            
-            # Parse GPT-4 response
-            analysis = json.loads(response.choices[0].message.content)
-            
-            # Add sentiment score
-            analysis['sentiment_score'] = self._calculate_sentiment_score(
-                analysis['primary_emotion'], 
-                analysis['intensity']
-            )
-            
-            # Add emotional complexity score
-            analysis['emotional_complexity'] = len(analysis.get('secondary_emotions', []))
-            
-            # Add timestamp and raw text
-            from datetime import datetime
-            analysis['analyzed_at'] = datetime.now().isoformat()
-            analysis['raw_text'] = text
-            analysis['context'] = context
-            
-            return analysis
+            return self._stamp_analysis(analysis, text, context)
             
         except Exception as e:
-            print(f"Error in text emotion analysis: {str(e)}")
-            return {
-                'error': str(e),
-                'primary_emotion': 'neutral',
-                'intensity': 5,
-                'sentiment_score': 0
-            }
+            logger.warning(f"Text emotion analysis failed, using the fallback: {e}")
+            return self._llm_failure(e, local, text, context)
+    
+    def _fetch_text_analysis(self, text: str, context: Optional[Dict], cache_key: str) -> Dict:
+        response = create_completion(
+            self.client, self._text_analysis_request(text, context), 'emotion-analysis'
+        )
+        analysis = self._parse_text_analysis(response)
+        
+        # Only the model output is cached; per-request fields are stamped on every call
+        analysis_cache.set(cache_key, analysis)
+        return analysis
+    
+    def _local_first(self, text: str, mode: Optional[str]) -> Optional[Dict]:
+        """
+        Run the lexicon tier unless mode is 'llm'. The result is tagged
+        analysis_tier='local' when it should be returned as-is, and
+        'local-fallback' when it is only kept in case GPT fails.
+        """
+        mode = mode or getattr(settings, 'EMOTION_ANALYSIS_MODE', 'llm')
+        if mode not in self.ANALYSIS_MODES:
+            raise ValueError(f"Unknown analysis mode: {mode}")
+        if mode == 'llm':
+            return None
+        
+        local = self._local_analysis(text)
+        threshold = getattr(settings, 'EMOTION_LOCAL_CONFIDENCE', 0.75)
+        if mode == 'local-then-llm' and local['confidence'] < threshold:
+            local['analysis_tier'] = 'local-fallback'
+        return local
+    
+    def _local_analysis(self, text: str) -> Dict:
+        """Instant lexicon analysis in the same shape as the GPT result"""
+        result = self.lexicon.classify(text)
+        return {
+            'primary_emotion': result['primary_emotion'],
+            'intensity': result['intensity'],
+            'secondary_emotions': result['secondary_emotions'],
+            'triggers': [],
+            'insight': '',
+            'suggestions': [],
+            'sentiment_score': result['sentiment_score'],
+            'emotional_complexity': len(result['secondary_emotions']),
+            'confidence': result['confidence'],
+            'keywords': result['keywords'],
+            'analysis_tier': 'local',
+        }
+    
+    def _llm_failure(self, error: Exception, local: Optional[Dict], text: str,
+                     context: Optional[Dict]) -> Dict:
+        """Serve the lexicon result during LLM outages when the mode allows it"""
+        if local is None:
+            return self._neutral_analysis(error)
+        local['llm_error'] = str(error)
+        return self._stamp_analysis(local, text, context)
+    
+    def _text_cache_key(self, text: str, context: Optional[Dict]) -> str:
+        return analysis_cache.make_key(
+            self.MODEL, self.PROMPT_VERSION, normalize_text(text), context
+        )
+    
+    def _text_analysis_request(self, text: str, context: Optional[Dict]) -> Dict:
+        """Build chat completion arguments for text analysis"""
+        # Prepare context for better analysis
+        context_str = ""
+        if context:
+            context_str = f"\nContext: Location: {context.get('location', 'unknown')}, "
+            context_str += f"Activity: {context.get('activity', 'unknown')}, "
+            context_str += f"Weather: {context.get('weather', 'unknown')}"
+        
+        # Create prompt for GPT-4
+        prompt = f"""
+        Analyze the following text for emotional content. {context_str}
+        
+        Text: "{text}"
+        
+        Please provide:
+        1. Primary emotion (from: joy, sadness, anger, fear, surprise, disgust, trust, anticipation)
+        2. Emotion intensity (1-10 scale)
+        3. Secondary emotions present
+        4. Emotional triggers identified
+        5. Brief psychological insight
+        6. Suggested coping strategies (if negative emotions)
+        
+        Return the analysis in JSON format with keys:
+        primary_emotion, intensity, secondary_emotions[], triggers[], insight, suggestions[]
+        """
+        
+        return {
+            'model': self.MODEL,
+            'messages': [
+                {"role": "system", "content": "You are an expert psychologist and emotion analyst."},
+                {"role": "user", "content": prompt}
+            ],
+            'response_format': {"type": "json_object"},
+            'temperature': 0.7,
+            'max_tokens': 500
+        }
+    
+    def _parse_text_analysis(self, response) -> Dict:
+        """Turn a chat completion into an analysis dict"""
+        # Parse GPT-4 response
+        analysis = json.loads(response.choices[0].message.content)
+        
+        # Add sentiment score
+        analysis['sentiment_score'] = self._calculate_sentiment_score(
+            analysis['primary_emotion'], 
+            analysis['intensity']
+        )
+        
+        # Add emotional complexity score
+        analysis['emotional_complexity'] = len(analysis.get('secondary_emotions', []))
+        analysis['analysis_tier'] = 'llm'
+        
+        return analysis
+    
+    def _neutral_analysis(self, error: Exception) -> Dict:
+        return {
+            'error': str(error),
+            'primary_emotion': 'neutral',
+            'intensity': 5,
+            'sentiment_score': 0
+        }
+    
+    def _stamp_analysis(self, analysis: Dict, text: str, context: Optional[Dict]) -> Dict:
+        """Add per-request metadata so cached and fresh results look the same"""
+        analysis['analyzed_at'] = datetime.now().isoformat()
+        analysis['raw_text'] = text
+        analysis['context'] = context
+        return analysis
     
-    def analyze_voice(self, audio_file, language='ko-KR') -> Dict:
+    def analyze_voice(self, audio_file, language='ko-KR', mode: Optional[str] = None) -> Dict:
         """
         Analyze emotions from voice input
         
         Args:
             audio_file: Audio file object or path
             language: Language code for speech recognition
+            mode: Text analysis mode for the transcript (see analyze_text)
         
         Returns:
             Dictionary containing emotion analysis from transcribed speech
         """
         try:
+            # Decode once; transcription and voice features share the PCM
+            audio = decode_audio(audio_file)
+            
             # Convert audio to text
-            text = self._transcribe_audio(audio_file, language)
+            text = self._transcribe_audio(audio, language)
             
             if not text:
                 return {
@@ -131,127 +249,82 @@ class EmotionAnalyzer:
                 }
             
             # Analyze voice characteristics
-            voice_features = self._analyze_voice_features(audio_file)
+            voice_features = self._analyze_voice_features(audio)
             
             # Perform text-based emotion analysis
-            text_analysis = self.analyze_text(text)
-            
-            # Combine text and voice analysis
-            combined_analysis = {
-                **text_analysis,
-                'transcribed_text': text,
-                'voice_features': voice_features,
-                'source': 'voice',
-                'language': language
-            }
+            text_analysis = self.analyze_text(text, mode=mode)
             
-            # Adjust intensity based on voice features
-            if voice_features:
-                combined_intensity = (
-                    text_analysis.get('intensity', 5) * 0.7 + 
-                    voice_features.get('energy_level', 5) * 0.3
-                )
-                combined_analysis['intensity'] = round(combined_intensity)
-            
-            return combined_analysis
+            return self._combine_voice_analysis(text_analysis, text, voice_features, language)
             
         except Exception as e:
-            print(f"Error in voice emotion analysis: {str(e)}")
+            logger.exception("Voice emotion analysis failed")
             return {
                 'error': str(e),
                 'primary_emotion': 'neutral',
                 'intensity': 5
             }
     
-    def _transcribe_audio(self, audio_file, language='ko-KR') -> str:
-        """Transcribe audio to text using speech recognition"""
+    def _combine_voice_analysis(self, text_analysis: Dict, text: str,
+                                voice_features: Dict, language: str) -> Dict:
+        """Merge text analysis of the transcript with voice features"""
+        combined_analysis = {
+            **text_analysis,
+            'transcribed_text': text,
+            'voice_features': voice_features,
+            'source': 'voice',
+            'language': language
+        }
+        
+        # Adjust intensity based on voice features
+        if voice_features:
+            combined_intensity = (
+                text_analysis.get('intensity', 5) * 0.7 + 
+                voice_features.get('energy_level', 5) * 0.3
+            )
+            combined_analysis['intensity'] = round(combined_intensity)
+        
+        return combined_analysis
+    
+    def _transcribe_audio(self, audio, language='ko-KR') -> str:
+        """Transcribe decoded PCM (or a raw upload) to text"""
         try:
-            # Save audio to temporary file if needed
-            if hasattr(audio_file, 'read'):
-                with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as tmp_file:
-                    tmp_file.write(audio_file.read())
-                    tmp_path = tmp_file.name
-            else:
-                tmp_path = audio_file
-            
-            # Convert to WAV if needed
-            audio = AudioSegment.from_file(tmp_path)
-            wav_path = tmp_path.replace(os.path.splitext(tmp_path)[1], '.wav')
-            audio.export(wav_path, format='wav')
-            
-            # Use speech recognition
-            with sr.AudioFile(wav_path) as source:
-                audio_data = self.recognizer.record(source)
-                
-                # Try Google Speech Recognition first
-                try:
-                    text = self.recognizer.recognize_google(
-                        audio_data, 
-                        language=language
-                    )
-                except:
-                    # Fallback to OpenAI Whisper
-                    with open(wav_path, 'rb') as audio:
-                        transcript = self.client.audio.transcriptions.create(
-                            model="whisper-1",
-                            file=audio,
-                            language=language[:2]  # Use two-letter code for Whisper
-                        )
-                        text = transcript.text
-            
-            # Clean up temporary files
-            if hasattr(audio_file, 'read'):
-                os.unlink(tmp_path)
-            if os.path.exists(wav_path) and wav_path != tmp_path:
-                os.unlink(wav_path)
+            if not isinstance(audio, DecodedAudio):
+                audio = decode_audio(audio)
+            
+            # Try Google Speech Recognition first
+            try:
+                text = self.recognizer.recognize_google(
+                    audio.to_audio_data(),
+                    language=language
+                )
+            except Exception:
+                # Fallback to OpenAI Whisper, uploading the same PCM as WAV
+                transcript = self.client.with_options(
+                    max_retries=0, timeout=getattr(settings, 'VOICE_TRANSCRIBE_TIMEOUT', 30)
+                ).audio.transcriptions.create(
+                    model="whisper-1",
+                    file=('voice.wav', audio.to_wav()),
+                    language=language[:2]  # Use two-letter code for Whisper
+                )
+                text = transcript.text
             
             return text
             
         except Exception as e:
-            print(f"Error transcribing audio: {str(e)}")
+            logger.warning(f"Transcribing audio failed: {e}")
             return ""
     
-    def _analyze_voice_features(self, audio_file) -> Dict:
+    def _analyze_voice_features(self, audio) -> Dict:
         """Analyze voice characteristics for emotional cues"""
         try:
-            import librosa
-            
-            # Load audio
-            if hasattr(audio_file, 'read'):
-                audio_file.seek(0)
-                y, sr = librosa.load(io.BytesIO(audio_file.read()), sr=None)
-            else:
-                y, sr = librosa.load(audio_file, sr=None)
-            
-            # Extract features
-            features = {}
-            
-            # Pitch analysis
-            pitches, magnitudes = librosa.piptrack(y=y, sr=sr)
-            features['pitch_mean'] = float(np.mean(pitches[pitches > 0]))
-            features['pitch_std'] = float(np.std(pitches[pitches > 0]))
-            
-            # Energy/Volume
-            features['energy_mean'] = float(np.mean(librosa.feature.rms(y=y)))
-            features['energy_std'] = float(np.std(librosa.feature.rms(y=y)))
-            features['energy_level'] = min(10, max(1, int(features['energy_mean'] * 20)))
-            
-            # Tempo
-            tempo, _ = librosa.beat.beat_track(y=y, sr=sr)
-            features['tempo'] = float(tempo)
-            
-            # Spectral features
-            spectral_centroids = librosa.feature.spectral_centroid(y=y, sr=sr)
-            features['brightness'] = float(np.mean(spectral_centroids))
+            from .voice_features import extract_voice_features
             
-            # Zero crossing rate (indicates speech vs silence)
-            zcr = librosa.feature.zero_crossing_rate(y)
-            features['speech_rate'] = float(np.mean(zcr))
-            
-            return features
+            if not isinstance(audio, DecodedAudio):
+                audio = decode_audio(audio)
+            return extract_voice_features(audio.pcm, audio.sample_rate)
             
         except Exception as e:
-            print(f"Error analyzing voice features: {str(e)}")
+            logger.warning(f"Extracting voice features failed: {e}")
             return {}
     
     def _calculate_sentiment_score(self, emotion: str, intensity: int) -> float:
@@ -275,12 +348,16 @@ class EmotionAnalyzer:
         
         return round(adjusted_score, 2)
     
-    def get_emotion_insights(self, emotion_records: List[Dict]) -> Dict:
+    def get_emotion_insights(self, emotion_records: List[Dict], previous: Optional[Dict] = None,
+                             new_records: Optional[List[Dict]] = None) -> Dict:
         """
         Generate insights from multiple emotion records
         
         Args:
             emotion_records: List of emotion analysis results
+            previous: Earlier insights to update instead of starting over
+            new_records: Records added or changed since ``previous``; only
+                these are sent to the model when ``previous`` is given
         
         Returns:
             Dictionary containing patterns and insights
@@ -289,57 +366,230 @@ class EmotionAnalyzer:
             return {'message': 'No emotion records to analyze'}
         
         try:
-            # Prepare data for analysis
-            emotions_data = {
-                'emotions': [r.get('primary_emotion', 'neutral') for r in emotion_records],
-                'intensities': [r.get('intensity', 5) for r in emotion_records],
-                'sentiments': [r.get('sentiment_score', 0) for r in emotion_records],
-                'timestamps': [r.get('analyzed_at', '') for r in emotion_records]
-            }
-            
-            prompt = f"""
-            Analyze the following emotional pattern data and provide psychological insights:
+            emotions_data = self._prepare_insights_data(emotion_records)
+            request = self._insights_request_for(emotions_data, previous, new_records)
+            return insight_flights.do(
+                insight_flights.make_key(request),
+                lambda: self._parse_insights(
+                    create_completion(self.client, request, 'emotion-insights'), emotions_data
+                )
+            )
             
-            Emotions recorded: {emotions_data['emotions']}
-            Intensities: {emotions_data['intensities']}
-            Sentiment scores: {emotions_data['sentiments']}
+        except Exception as e:
+            logger.exception("Emotion insights failed")
+            return {'error': str(e)}
+    
+    def _prepare_insights_data(self, emotion_records: List[Dict]) -> Dict:
+        """Prepare data for analysis"""
+        return {
+            'emotions': [r.get('primary_emotion', 'neutral') for r in emotion_records],
+            'intensities': [r.get('intensity', 5) for r in emotion_records],
+            'sentiments': [r.get('sentiment_score', 0) for r in emotion_records],
+            'timestamps': [r.get('analyzed_at', '') for r in emotion_records]
+        }
+    
+    def _history_block(self, emotions_data: Dict) -> str:
+        """Fixed-size statistical summary instead of every record"""
+        timestamps = []
+        for value in emotions_data['timestamps']:
+            try:
+                moment = datetime.fromisoformat(value)
+            except (TypeError, ValueError):
+                moment = None
+            if moment is not None and timezone.is_naive(moment):
+                moment = timezone.make_aware(moment)
+            timestamps.append(moment)
+        summary = history.summarize(
+            emotions_data['emotions'], emotions_data['intensities'],
+            emotions_data['sentiments'], timestamps
+        )
+        # Indent continuation lines to match the surrounding prompt
+        return history.render(summary).replace('\n', '\n        ')
+    
+    def _insights_request(self, emotions_data: Dict) -> Dict:
+        """Build chat completion arguments for pattern insights"""
+        prompt = f"""
+        Analyze the following emotional pattern data and provide psychological insights:
+        
+        {self._history_block(emotions_data)}
+        
+        Please provide:
+        1. Overall emotional state assessment
+        2. Identified patterns or cycles
+        3. Potential triggers
+        4. Mental health indicators
+        5. Personalized recommendations
+        6. Areas of concern (if any)
+        
+        Return as JSON with keys:
+        overall_state, patterns[], triggers[], indicators[], recommendations[], concerns[]
+        """
+        
+        return {
+            'model': self.MODEL,
+            'messages': [
+                {"role": "system", "content": "You are an expert psychologist analyzing emotional patterns."},
+                {"role": "user", "content": prompt}
+            ],
+            'response_format': {"type": "json_object"},
+            'temperature': 0.7,
+            'max_tokens': 600
+        }
+    
+    def _incremental_insights_request(self, previous: Dict, delta_data: Dict) -> Dict:
+        """Chat completion arguments that update ``previous`` with new records only"""
+        previous = {
+            key: value for key, value in previous.items()
+            if key not in ('statistics', 'total_tokens')
+        }
+        prompt = f"""
+        Here is your previous assessment of this person's emotional patterns (JSON):
+        {json.dumps(previous, ensure_ascii=False)}
+        
+        Since then the following were recorded:
+        {self._history_block(delta_data)}
+        
+        Update the assessment to account for the new records. Keep what still
+        holds, revise what the new data contradicts, and note any change in trend.
+        
+        Return as JSON with keys:
+        overall_state, patterns[], triggers[], indicators[], recommendations[], concerns[]
+        """
+        
+        request = self._insights_request(delta_data)
+        request['messages'][1]['content'] = prompt
+        return request
+    
+    def _insights_request_for(self, emotions_data: Dict, previous: Optional[Dict],
+                              new_records: Optional[List[Dict]]) -> Dict:
+        if previous and new_records:
+            return self._incremental_insights_request(
+                previous, self._prepare_insights_data(new_records)
+            )
+        return self._insights_request(emotions_data)
+    
+    def _parse_insights(self, response, emotions_data: Dict) -> Dict:
+        import numpy as np
+        
+        insights = json.loads(response.choices[0].message.content)
+        
+        # Add statistical analysis
+        insights['statistics'] = {
+            'most_common_emotion': max(set(emotions_data['emotions']), 
+                                      key=emotions_data['emotions'].count),
+            'average_intensity': round(np.mean(emotions_data['intensities']), 2),
+            'average_sentiment': round(np.mean(emotions_data['sentiments']), 2),
+            'emotional_volatility': round(np.std(emotions_data['intensities']), 2)
+        }
+        usage = getattr(response, 'usage', None)
+        insights['total_tokens'] = getattr(usage, 'total_tokens', None) or 0
+        
+        return insights
+
+
+class AsyncEmotionAnalyzer(EmotionAnalyzer):
+    """
+    Emotion analysis on the async OpenAI client for ASGI views.
+    
+    LLM calls are awaited natively; blocking audio work (speech recognition,
+    feature extraction) runs in a worker thread.
+    """
+    
+    @property
+    def async_client(self):
+        return get_async_openai_client()
+    
+    async def analyze_text(self, text: str, context: Optional[Dict] = None,
+                           mode: Optional[str] = None) -> Dict:
+        """Async counterpart of EmotionAnalyzer.analyze_text"""
+        local = self._local_first(text, mode)
+        if local is not None and local.get('analysis_tier') == 'local':
+            return self._stamp_analysis(local, text, context)
+        
+        cache_key = self._text_cache_key(text, context)
+        cached = analysis_cache.get(cache_key)
+        if cached is not None:
+            return self._stamp_analysis(cached, text, context)
+        
+        async def fetch():
+            response = await acreate_completion(
+                self.async_client, self._text_analysis_request(text, context), 'emotion-analysis'
+            )
+            analysis = self._parse_text_analysis(response)
+            analysis_cache.set(cache_key, analysis)
+            return analysis
+        
+        try:
+            analysis = await analysis_flights.ado(cache_key, fetch)
+            return self._stamp_analysis(analysis, text, context)
             
-            Please provide:
-            1. Overall emotional state assessment
-            2. Identified patterns or cycles
-            3. Potential triggers
-            4. Mental health indicators
-            5. Personalized recommendations
-            6. Areas of concern (if any)
+        except Exception as e:
+            logger.warning(f"Async text emotion analysis failed, using the fallback: {e}")
+            return self._llm_failure(e, local, text, context)
+    
+    async def analyze_voice(self, audio_file, language='ko-KR', mode: Optional[str] = None) -> Dict:
+        """Async counterpart of EmotionAnalyzer.analyze_voice"""
+        try:
+            audio = await sync_to_async(decode_audio, thread_sensitive=False)(audio_file)
+            text = await sync_to_async(self._transcribe_audio, thread_sensitive=False)(
+                audio, language
+            )
             
-            Return as JSON with keys:
-            overall_state, patterns[], triggers[], indicators[], recommendations[], concerns[]
-            """
+            if not text:
+                return {
+                    'error': 'Could not transcribe audio',
+                    'primary_emotion': 'neutral',
+                    'intensity': 5
+                }
             
-            response = self.client.chat.completions.create(
-                model="gpt-4-turbo-preview",
-                messages=[
-                    {"role": "system", "content": "You are an expert psychologist analyzing emotional patterns."},
-                    {"role": "user", "content": prompt}
-                ],
-                response_format={"type": "json_object"},
-                temperature=0.7,
-                max_tokens=600
-            )
+            voice_features = await sync_to_async(
+                self._analyze_voice_features, thread_sensitive=False
+            )(audio)
+            text_analysis = await self.analyze_text(text, mode=mode)
             
-            insights = json.loads(response.choices[0].message.content)
+            return self._combine_voice_analysis(text_analysis, text, voice_features, language)
             
-            # Add statistical analysis
-            insights['statistics'] = {
-                'most_common_emotion': max(set(emotions_data['emotions']), 
-                                          key=emotions_data['emotions'].count),
-                'average_intensity': round(np.mean(emotions_data['intensities']), 2),
-                'average_sentiment': round(np.mean(emotions_data['sentiments']), 2),
-                'emotional_volatility': round(np.std(emotions_data['intensities']), 2)
+        except Exception as e:
+            logger.exception("Async voice emotion analysis failed")
+            return {
+                'error': str(e),
+                'primary_emotion': 'neutral',
+                'intensity': 5
             }
+    
+    async def get_emotion_insights(self, emotion_records: List[Dict], previous: Optional[Dict] = None,
+                                   new_records: Optional[List[Dict]] = None) -> Dict:
+        """Async counterpart of EmotionAnalyzer.get_emotion_insights"""
+        if not emotion_records:
+            return {'message': 'No emotion records to analyze'}
+        
+        try:
+            emotions_data = self._prepare_insights_data(emotion_records)
+            request = self._insights_request_for(emotions_data, previous, new_records)
+            
+            async def fetch():
+                response = await acreate_completion(self.async_client, request, 'emotion-insights')
+                return self._parse_insights(response, emotions_data)
             
-            return insights
+            return await insight_flights.ado(insight_flights.make_key(request), fetch)
             
         except Exception as e:
-            print(f"Error generating insights: {str(e)}")
-            return {'error': str(e)}
\ No newline at end of file
+            logger.exception("Async emotion insights failed")
+            return {'error': str(e)}
+
+
+def get_emotion_analyzer() -> EmotionAnalyzer:
+    """Process-wide EmotionAnalyzer sharing the pooled upstream clients"""
+    return registry.get('emotion_analyzer', EmotionAnalyzer)
+
+
+def get_async_emotion_analyzer() -> AsyncEmotionAnalyzer:
+    """Process-wide AsyncEmotionAnalyzer sharing the pooled upstream clients"""
+    return registry.get('async_emotion_analyzer', AsyncEmotionAnalyzer)
+
+
+def analysis_mode_for(user) -> str:
+    """Text analysis mode for the user's subscription tier"""
+    tier_modes = getattr(settings, 'EMOTION_ANALYSIS_TIER_MODES', {})
+    default = getattr(settings, 'EMOTION_ANALYSIS_MODE', 'llm')
+    return tier_modes.get(getattr(user, 'subscription_tier', None), default)
@@ -0,0 +1,185 @@
+"""
+In-memory audio decoding for voice analysis
+
+Uploads are decoded straight from memory into 16 kHz mono 16-bit PCM, the
+format both the speech recognizer and Whisper accept, so every voice note
+is resampled exactly once and never written to disk. Decoded audio is
+capped at ``VOICE_MAX_SECONDS``, which bounds peak memory per request
+(32 KB per second of audio) regardless of how long the upload is.
+"""
+import io
+import os
+import subprocess
+import threading
+import wave
+from dataclasses import dataclass
+
+from django.conf import settings
+
+SAMPLE_RATE = 16000
+SAMPLE_WIDTH = 2  # bytes per sample, signed little-endian
+CHUNK_SIZE = 64 * 1024
+
+
+class AudioDecodeError(Exception):
+    """Raised when an upload cannot be decoded to PCM"""
+
+
+@dataclass(frozen=True)
+class DecodedAudio:
+    """Mono PCM audio held in memory"""
+    pcm: bytes
+    sample_rate: int = SAMPLE_RATE
+    sample_width: int = SAMPLE_WIDTH
+
+    @property
+    def duration(self) -> float:
+        return len(self.pcm) / (self.sample_rate * self.sample_width)
+
+    def samples(self):
+        """Float32 samples in [-1, 1], as librosa expects"""
+        import numpy as np
+        return np.frombuffer(self.pcm, dtype='<i2').astype(np.float32) / 32768.0
+
+    def to_audio_data(self):
+        """speech_recognition AudioData sharing this PCM buffer"""
+        import speech_recognition as sr
+        return sr.AudioData(self.pcm, self.sample_rate, self.sample_width)
+
+    def to_wav(self) -> io.BytesIO:
+        """WAV container in memory, e.g. for the Whisper upload"""
+        buffer = io.BytesIO()
+        with wave.open(buffer, 'wb') as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(self.sample_width)
+            wav.setframerate(self.sample_rate)
+            wav.writeframes(self.pcm)
+        buffer.seek(0)
+        return buffer
+
+
+def decode_audio(source, max_seconds: float = None) -> DecodedAudio:
+    """
+    Decode an upload to 16 kHz mono PCM without touching the disk.
+
+    Args:
+        source: Uploaded file / file-like object, bytes, memoryview or path
+        max_seconds: Audio beyond this is dropped (default VOICE_MAX_SECONDS)
+    """
+    if max_seconds is None:
+        max_seconds = getattr(settings, 'VOICE_MAX_SECONDS', 300)
+
+    stream = _open_stream(source)
+    try:
+        header = stream.read(12)
+        stream.seek(0)
+        if header[:4] == b'RIFF' and header[8:12] == b'WAVE':
+            try:
+                return _decode_wav(stream, max_seconds)
+            except (wave.Error, EOFError):
+                # Compressed WAV codecs and other sample rates are left to ffmpeg
+                stream.seek(0)
+        return _decode_with_ffmpeg(stream, max_seconds)
+    finally:
+        if isinstance(source, (str, os.PathLike)):
+            stream.close()
+
+
+def _open_stream(source):
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return io.BytesIO(source)
+    if isinstance(source, (str, os.PathLike)):
+        return open(source, 'rb')
+    if hasattr(source, 'seek'):
+        source.seek(0)
+    return source
+
+
+def _decode_wav(stream, max_seconds: float) -> DecodedAudio:
+    """
+    PCM WAV fast path for 16 kHz files: read only the frames we keep and
+    downmix in numpy. Other rates go to ffmpeg, whose resampler low-passes
+    before decimating; plain interpolation would alias.
+    """
+    with wave.open(stream, 'rb') as wav:
+        channels = wav.getnchannels()
+        width = wav.getsampwidth()
+        rate = wav.getframerate()
+        if width != SAMPLE_WIDTH:
+            raise wave.Error(f'unsupported sample width {width}')
+        if rate != SAMPLE_RATE:
+            raise wave.Error(f'unsupported sample rate {rate}')
+        frames = wav.readframes(min(wav.getnframes(), int(rate * max_seconds)))
+
+    if channels == 1:
+        return DecodedAudio(pcm=frames)
+
+    import numpy as np
+
+    samples = np.frombuffer(frames, dtype='<i2').astype(np.float32)
+    if channels > 1:
+        samples = samples[:len(samples) - len(samples) % channels]
+        samples = samples.reshape(-1, channels).mean(axis=1)
+
+    pcm = np.clip(np.round(samples), -32768, 32767).astype('<i2').tobytes()
+    return DecodedAudio(pcm=pcm)
+
+
+def _decode_with_ffmpeg(stream, max_seconds: float) -> DecodedAudio:
+    """Pipe the upload through ffmpeg, which decodes and resamples in one pass"""
+    command = [
+        getattr(settings, 'FFMPEG_BINARY', 'ffmpeg'),
+        '-hide_banner', '-loglevel', 'error',
+        '-i', 'pipe:0',
+        '-t', str(max_seconds),
+        '-f', 's16le', '-acodec', 'pcm_s16le',
+        '-ac', '1', '-ar', str(SAMPLE_RATE),
+        'pipe:1',
+    ]
+    try:
+        process = subprocess.Popen(
+            command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+        )
+    except FileNotFoundError:
+        raise AudioDecodeError('ffmpeg is required to decode audio other than 16 kHz PCM WAV')
+
+    timeout = getattr(settings, 'VOICE_DECODE_TIMEOUT', 30)
+    expired = threading.Event()
+
+    def expire():
+        # Killing ffmpeg closes its pipes, which unblocks the reads below
+        expired.set()
+        process.kill()
+
+    killer = threading.Timer(timeout, expire)
+    killer.daemon = True
+    killer.start()
+
+    def feed():
+        # Stream the upload in chunks so it is never copied whole
+        try:
+            for chunk in iter(lambda: stream.read(CHUNK_SIZE), b''):
+                process.stdin.write(chunk)
+        except (BrokenPipeError, ValueError):
+            # ffmpeg stops reading once it has the first max_seconds
+            pass
+        finally:
+            try:
+                process.stdin.close()
+            except BrokenPipeError:
+                pass
+
+    writer = threading.Thread(target=feed, daemon=True)
+    writer.start()
+    pcm = process.stdout.read(int(max_seconds * SAMPLE_RATE * SAMPLE_WIDTH) + SAMPLE_WIDTH)
+    process.stdout.close()
+    errors = process.stderr.read()
+    process.wait()
+    killer.cancel()
+    writer.join()
+
+    if expired.is_set():
+        raise AudioDecodeError(f'ffmpeg did not finish within {timeout}s')
+    if process.returncode != 0 and not pcm:
+        raise AudioDecodeError(errors.decode('utf-8', 'replace').strip() or 'ffmpeg failed')
+    return DecodedAudio(pcm=pcm[:len(pcm) - len(pcm) % SAMPLE_WIDTH])
@@ -0,0 +1,158 @@
+"""
+Streaming export of a user's emotion history
+
+Rows are read with ``QuerySet.iterator()`` (a server-side cursor on
+PostgreSQL) as plain tuples, encoded a chunk at a time and written
+through ``StreamingHttpResponse``, so memory stays flat however many
+records a user has. Image URLs are looked up with one query per chunk.
+Under ASGI the same chunks come from ``aiterator()`` so the response is
+streamed instead of being collected into a list by Django.
+"""
+import csv
+import json
+from typing import Dict, Iterable, List, Sequence
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from .models import Emotion, EmotionImage
+
+EXPORT_FIELDS = (
+    'id', 'emotion_type', 'intensity', 'note', 'voice_note_url', 'location',
+    'activity', 'people', 'weather', 'physical_state', 'sentiment_score',
+    'triggers', 'ai_analysis', 'created_at', 'updated_at',
+)
+JSON_FIELDS = ('triggers', 'ai_analysis')
+
+FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv; charset=utf-8',
+}
+
+
+class _Echo:
+    """File-like object whose write() returns the line csv.writer formats"""
+
+    def write(self, value):
+        return value
+
+
+_csv_writer = csv.writer(_Echo())
+_json_encoder = json.JSONEncoder(ensure_ascii=False, default=DjangoJSONEncoder().default)
+
+
+def export_queryset(user):
+    return Emotion.objects.filter(user=user).order_by('created_at', 'id').values_list(
+        *EXPORT_FIELDS
+    )
+
+
+def row_to_dict(row: Sequence, images: List[str]) -> Dict:
+    record = dict(zip(EXPORT_FIELDS, row))
+    record['images'] = images
+    return record
+
+
+def _image_rows(ids: List[int]):
+    return EmotionImage.objects.filter(emotion_id__in=ids).order_by('id').values_list(
+        'emotion_id', 'image'
+    )
+
+
+def _group_images(rows: Iterable) -> Dict[int, List[str]]:
+    storage = EmotionImage._meta.get_field('image').storage
+    images = {}
+    for emotion_id, name in rows:
+        if name:
+            images.setdefault(emotion_id, []).append(storage.url(name))
+    return images
+
+
+def encode_ndjson(rows: List[Sequence], images: Dict[int, List[str]]) -> str:
+    encode = _json_encoder.encode
+    return ''.join(
+        encode(row_to_dict(row, images.get(row[0], []))) + '\n' for row in rows
+    )
+
+
+def encode_csv(rows: List[Sequence], images: Dict[int, List[str]]) -> str:
+    json_columns = [EXPORT_FIELDS.index(name) for name in JSON_FIELDS]
+    lines = []
+    for row in rows:
+        values = [
+            value.isoformat() if hasattr(value, 'isoformat') else value for value in row
+        ]
+        for column in json_columns:
+            values[column] = _json_encoder.encode(values[column])
+        values.append(' '.join(images.get(row[0], [])))
+        lines.append(_csv_writer.writerow(values))
+    return ''.join(lines)
+
+
+ENCODERS = {'ndjson': encode_ndjson, 'csv': encode_csv}
+
+
+def _header(export_format: str) -> str:
+    if export_format == 'csv':
+        # BOM so spreadsheet apps detect UTF-8 (Korean notes)
+        return '\ufeff' + _csv_writer.writerow(EXPORT_FIELDS + ('images',))
+    return ''
+
+
+def stream_export(user, export_format: str = 'ndjson', chunk_size: int = None):
+    """Yield the encoded export a chunk of rows at a time"""
+    chunk_size = chunk_size or getattr(settings, 'EMOTION_EXPORT_CHUNK_SIZE', 500)
+    encode = ENCODERS[export_format]
+    header = _header(export_format)
+    if header:
+        yield header
+
+    chunk = []
+    for row in export_queryset(user).iterator(chunk_size=chunk_size):
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield encode(chunk, _group_images(_image_rows([r[0] for r in chunk])))
+            chunk = []
+    if chunk:
+        yield encode(chunk, _group_images(_image_rows([r[0] for r in chunk])))
+
+
+async def astream_export(user, export_format: str = 'ndjson', chunk_size: int = None):
+    """Async twin of ``stream_export`` for ASGI responses"""
+    chunk_size = chunk_size or getattr(settings, 'EMOTION_EXPORT_CHUNK_SIZE', 500)
+    encode = ENCODERS[export_format]
+    header = _header(export_format)
+    if header:
+        yield header
+
+    async def encode_chunk(rows):
+        image_rows = [image async for image in _image_rows([r[0] for r in rows]).aiterator()]
+        return encode(rows, _group_images(image_rows))
+
+    chunk = []
+    async for row in export_queryset(user).aiterator(chunk_size=chunk_size):
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield await encode_chunk(chunk)
+            chunk = []
+    if chunk:
+        yield await encode_chunk(chunk)
+
+
+def streaming_response(request, user, export_format: str) -> StreamingHttpResponse:
+    """Attachment response streaming the user's full history"""
+    django_request = getattr(request, '_request', request)
+    if isinstance(django_request, ASGIRequest):
+        content = astream_export(user, export_format)
+    else:
+        content = stream_export(user, export_format)
+
+    response = StreamingHttpResponse(content, content_type=FORMATS[export_format])
+    filename = f"moodcare-emotions-{timezone.localdate():%Y%m%d}.{export_format}"
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    # Let nginx pass chunks straight through instead of buffering the export
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,212 @@
+"""
+Fixed-size statistical summaries of emotion history for LLM prompts
+
+Inlining every record makes prompts (and time-to-first-token) grow with a
+user's history. ``summarize`` reduces any number of records to the same
+handful of statistics: emotion shares, intensity/sentiment percentiles,
+a transition matrix over the most common emotions, weekday and
+time-of-day profiles, the recent shift and a few outliers. ``render``
+turns that into a prompt block whose size does not depend on the number
+of records. Shared by the insights and story prompt builders.
+"""
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+
+from django.conf import settings
+from django.utils import timezone
+
+TOP_EMOTIONS = 5          # transition matrix is (TOP_EMOTIONS + 1) squared
+MAX_TRANSITIONS = 8       # rendered transitions
+MAX_OUTLIERS = 3
+OUTLIER_Z = 2.0
+RECENT_SHARE = 0.25       # "recent" = newest quarter of the records
+HOUR_BLOCK = 4            # time-of-day profile in 4-hour blocks
+PERCENTILES = (10, 25, 50, 75, 90)
+OTHER = 'other'
+WEEKDAYS = ('Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun')
+
+
+def history_limit() -> int:
+    return getattr(settings, 'EMOTION_HISTORY_SUMMARY_RECORDS', 2000)
+
+
+def _spread(np, values) -> Optional[Dict]:
+    values = values[~np.isnan(values)]
+    if not len(values):
+        return None
+    return {
+        'mean': round(float(values.mean()), 2),
+        'std': round(float(values.std()), 2),
+        'percentiles': [round(float(p), 2) for p in np.percentile(values, PERCENTILES)],
+    }
+
+
+def _profile(np, slots, intensities, size) -> List[Dict]:
+    counts = np.bincount(slots, minlength=size)
+    sums = np.bincount(slots, weights=intensities, minlength=size)
+    means = np.divide(sums, counts, out=np.zeros(size), where=counts > 0)
+    return [{'count': int(c), 'mean_intensity': round(float(m), 1)} for c, m in zip(counts, means)]
+
+
+def summarize(emotions: Sequence[str], intensities: Sequence, sentiments: Optional[Sequence] = None,
+              timestamps: Optional[Sequence[Optional[datetime]]] = None) -> Dict:
+    """
+    Bounded summary of records given oldest first as parallel sequences.
+
+    Missing sentiments/timestamps are allowed (None). Weekday and hour
+    profiles use the TIME_ZONE offset of the newest record for all records.
+    """
+    import numpy as np
+
+    n = len(emotions)
+    if not n:
+        return {'records': 0}
+
+    labels, codes = np.unique(np.asarray([str(e) for e in emotions]), return_inverse=True)
+    intensity = np.asarray([np.nan if v is None else v for v in intensities], dtype=float)
+    sentiment = np.full(n, np.nan) if sentiments is None else np.asarray(
+        [np.nan if v is None else v for v in sentiments], dtype=float
+    )
+
+    # Shares, and the transition matrix over the top emotions plus "other"
+    counts = np.bincount(codes, minlength=len(labels))
+    top = np.argsort(-counts, kind='stable')[:TOP_EMOTIONS]
+    names = [str(labels[i]) for i in top] + [OTHER]
+    remap = np.full(len(labels), len(top))
+    remap[top] = np.arange(len(top))
+    folded = remap[codes]
+    matrix = np.zeros((len(names), len(names)), dtype=int)
+    np.add.at(matrix, (folded[:-1], folded[1:]), 1)
+    shares = {names[i]: int(counts[top[i]]) for i in range(len(top))}
+    if n - sum(shares.values()):
+        shares[OTHER] = n - sum(shares.values())
+    else:
+        names, matrix = names[:-1], matrix[:-1, :-1]
+
+    recent = max(1, int(n * RECENT_SHARE))
+    summary = {
+        'records': n,
+        'emotion_counts': shares,
+        'intensity': _spread(np, intensity),
+        'sentiment': _spread(np, sentiment),
+        'recent_shift': {
+            key: round(float(np.nanmean(values[-recent:]) - np.nanmean(values)), 2)
+            for key, values in (('intensity', intensity), ('sentiment', sentiment))
+            if not np.isnan(values[-recent:]).all()
+        },
+        'transitions': {'emotions': names, 'counts': matrix.tolist()},
+    }
+
+    moments = list(timestamps or [])
+    dated = [t for t in moments if t is not None]
+    if len(moments) == n and dated:
+        offset = timezone.localtime(dated[-1]).utcoffset().total_seconds()
+        seconds = np.asarray([np.nan if t is None else t.timestamp() for t in moments]) + offset
+        valid = ~np.isnan(seconds)
+        local = seconds[valid]
+        # 1970-01-01 was a Thursday (weekday 3)
+        weekdays = ((local // 86400 + 3) % 7).astype(int)
+        blocks = ((local % 86400) // (3600 * HOUR_BLOCK)).astype(int)
+        weights = np.nan_to_num(intensity[valid])
+        summary['first'] = timezone.localtime(dated[0]).date().isoformat()
+        summary['last'] = timezone.localtime(dated[-1]).date().isoformat()
+        summary['weekday_profile'] = _profile(np, weekdays, weights, 7)
+        summary['hour_profile'] = _profile(np, blocks, weights, 24 // HOUR_BLOCK)
+
+    # Outliers: largest z-score on intensity or sentiment
+    scores = np.zeros(n)
+    for values in (intensity, sentiment):
+        std = np.nanstd(values) if not np.isnan(values).all() else 0
+        if std > 0:
+            scores = np.fmax(scores, np.nan_to_num(np.abs(values - np.nanmean(values)) / std))
+    candidates = np.flatnonzero(scores >= OUTLIER_Z)
+    outliers = candidates[np.argsort(-scores[candidates], kind='stable')][:MAX_OUTLIERS]
+    summary['outliers'] = [
+        {
+            'emotion': str(labels[codes[i]]),
+            'intensity': None if np.isnan(intensity[i]) else float(intensity[i]),
+            'sentiment': None if np.isnan(sentiment[i]) else round(float(sentiment[i]), 2),
+            'date': (
+                timezone.localtime(moments[i]).date().isoformat()
+                if len(moments) == n and moments[i] is not None else None
+            ),
+        }
+        for i in sorted(outliers)
+    ]
+    return summary
+
+
+def summarize_user(user, limit: Optional[int] = None) -> Dict:
+    """Summary of the user's newest ``limit`` records (EMOTION_HISTORY_SUMMARY_RECORDS)"""
+    from .models import Emotion
+
+    rows = list(
+        Emotion.objects.filter(user=user).order_by('-created_at', '-id').values_list(
+            'emotion_type', 'intensity', 'sentiment_score', 'created_at'
+        )[:limit or history_limit()]
+    )
+    rows.reverse()
+    if not rows:
+        return {'records': 0}
+    emotions, intensities, sentiments, timestamps = zip(*rows)
+    return summarize(emotions, intensities, sentiments, timestamps)
+
+
+def _format_spread(spread: Optional[Dict]) -> str:
+    if not spread:
+        return 'n/a'
+    percentiles = '/'.join(f'{p:g}' for p in spread['percentiles'])
+    labels = '/'.join(f'p{p}' for p in PERCENTILES)
+    return f"mean {spread['mean']:g}, sd {spread['std']:g}, {labels} {percentiles}"
+
+
+def render(summary: Dict) -> str:
+    """Prompt block for a summary; its length is bounded whatever the record count"""
+    n = summary.get('records', 0)
+    if not n:
+        return 'No emotion records yet.'
+
+    period = f" from {summary['first']} to {summary['last']}" if 'first' in summary else ''
+    lines = [
+        f"Records: {n}{period}",
+        'Emotion share: ' + ', '.join(
+            f'{name} {count * 100 // n}%' for name, count in summary['emotion_counts'].items()
+        ),
+        f"Intensity (1-10): {_format_spread(summary['intensity'])}",
+        f"Sentiment (-1..1): {_format_spread(summary['sentiment'])}",
+    ]
+    if summary['recent_shift']:
+        lines.append(
+            f'Newest {int(RECENT_SHARE * 100)}% vs all: ' + ', '.join(
+                f'{key} {value:+g}' for key, value in summary['recent_shift'].items()
+            )
+        )
+
+    names, matrix = summary['transitions']['emotions'], summary['transitions']['counts']
+    transitions = sorted(
+        ((count, i, j) for i, row in enumerate(matrix) for j, count in enumerate(row) if count),
+        reverse=True
+    )[:MAX_TRANSITIONS]
+    if transitions:
+        lines.append('Most common transitions (P(next | current)): ' + ', '.join(
+            f'{names[i]}->{names[j]} {count / sum(matrix[i]):.0%}' for count, i, j in transitions
+        ))
+
+    if 'weekday_profile' in summary:
+        lines.append('By weekday (records/mean intensity): ' + ', '.join(
+            f"{WEEKDAYS[day]} {slot['count']}/{slot['mean_intensity']:g}"
+            for day, slot in enumerate(summary['weekday_profile'])
+        ))
+        lines.append('By time of day (records/mean intensity): ' + ', '.join(
+            f"{block * HOUR_BLOCK:02d}-{(block + 1) * HOUR_BLOCK:02d}h "
+            f"{slot['count']}/{slot['mean_intensity']:g}"
+            for block, slot in enumerate(summary['hour_profile'])
+        ))
+
+    if summary['outliers']:
+        lines.append('Notable outliers: ' + '; '.join(
+            f"{o['date'] or 'undated'} {o['emotion']} intensity {o['intensity']} "
+            f"sentiment {o['sentiment']}"
+            for o in summary['outliers']
+        ))
+    return '\n'.join(lines)
@@ -0,0 +1,84 @@
+"""
+Batched ingest of offline emotion entries
+
+The mobile client queues entries while offline and replays them as one
+ordered batch. Entries carry a client-generated UUID: anything already
+stored (an earlier, partially acknowledged replay) or repeated inside
+the batch is reported as a duplicate instead of being inserted twice.
+New rows go in with a single bulk_create (plus one for their trigger
+index rows). Rollups are updated once per affected day, and AI analysis
+of the notes is queued as one task after commit.
+"""
+from typing import Dict, List
+
+from django.db import IntegrityError, transaction
+
+from . import rollups, sequences, triggers
+from .models import Emotion
+
+STATUS_CREATED = 'created'
+STATUS_DUPLICATE = 'duplicate'
+
+
+def ingest_entries(user, entries: List[Dict]) -> Dict:
+    """
+    Store validated entries (EmotionIngestItemSerializer data) for ``user``.
+
+    Returns per-entry results in input order plus created/duplicate counts.
+    """
+    try:
+        return _ingest(user, entries)
+    except IntegrityError:
+        # A concurrent replay of the same batch won the race; what it
+        # inserted is now reported as duplicates
+        return _ingest(user, entries)
+
+
+def _ingest(user, entries: List[Dict]) -> Dict:
+    from .tasks import analyze_emotion_batch
+
+    client_ids = [entry['client_id'] for entry in entries]
+    with transaction.atomic():
+        stored = dict(
+            Emotion.objects.filter(user=user, client_id__in=client_ids).values_list('client_id', 'id')
+        )
+
+        new_records = []
+        for entry in entries:
+            if entry['client_id'] in stored:
+                continue
+            # Taken from here on, so repeats inside the batch are duplicates
+            stored[entry['client_id']] = None
+            new_records.append(Emotion(user=user, **entry))
+
+        Emotion.objects.bulk_create(new_records)
+        triggers.index_records(new_records)
+        rollups.apply_records(
+            (user.pk, record.created_at, record.emotion_type, record.intensity, record.triggers)
+            for record in new_records
+        )
+
+        created = set()
+        for record in new_records:
+            stored[record.client_id] = record.pk
+            created.add(record.client_id)
+        if new_records:
+            # Offline entries are usually backdated, so cached n-gram counts are stale
+            transaction.on_commit(lambda: sequences.invalidate(user.pk))
+        to_analyze = [record.pk for record in new_records if record.note.strip()]
+        if to_analyze:
+            transaction.on_commit(lambda: analyze_emotion_batch.delay(to_analyze))
+
+    results = []
+    for entry in entries:
+        client_id = entry['client_id']
+        status = STATUS_CREATED if client_id in created else STATUS_DUPLICATE
+        created.discard(client_id)
+        results.append({'client_id': client_id, 'id': stored[client_id], 'status': status})
+
+    return {
+        'results': results,
+        'created': len(new_records),
+        'duplicates': len(entries) - len(new_records),
+    }
+
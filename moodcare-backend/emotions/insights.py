@@ -0,0 +1,128 @@
+"""
+Persisted, incrementally refreshed emotion insights
+
+The dashboard asks for insights on every load, but the records behind them
+rarely change between loads. The last result is kept per user in
+EmotionInsight together with a fingerprint of the window it was built from:
+
+* unchanged window: the stored insight is returned, no LLM call
+* fewer than EMOTION_INSIGHTS_REFRESH_RECORDS new or edited records:
+  still the stored insight, with the number of pending changes
+* otherwise the model gets the previous insight plus only the changed
+  records and updates it; statistics are recomputed locally over the
+  whole window
+
+A full generation happens for the first insight and after the prompt
+version changes.
+"""
+import hashlib
+from typing import Dict, List
+
+from django.conf import settings
+
+from .ai_analyzer import get_emotion_analyzer
+from .models import Emotion, EmotionInsight
+
+# Bump whenever the insights prompts change so stored insights are rebuilt
+PROMPT_VERSION = 2
+WINDOW_FIELDS = ('id', 'emotion_type', 'intensity', 'sentiment_score', 'created_at', 'updated_at')
+
+STATUS_CACHED = 'cached'
+STATUS_FULL = 'full'
+STATUS_INCREMENTAL = 'incremental'
+STATUS_STALE = 'stale'  # regeneration failed, previous insight served
+STATUS_FAILED = 'failed'  # first generation failed
+
+
+def window_size() -> int:
+    return getattr(settings, 'EMOTION_INSIGHTS_WINDOW', 100)
+
+
+def refresh_threshold() -> int:
+    return getattr(settings, 'EMOTION_INSIGHTS_REFRESH_RECORDS', 5)
+
+
+def load_window(user) -> List[tuple]:
+    """Newest ``window_size()`` records as WINDOW_FIELDS tuples, newest first"""
+    return list(
+        Emotion.objects.filter(user=user).order_by('-created_at', '-id')
+        .values_list(*WINDOW_FIELDS)[:window_size()]
+    )
+
+
+def fingerprint(rows: List[tuple]) -> str:
+    digest = hashlib.sha256(f'v{PROMPT_VERSION}'.encode())
+    for row in rows:
+        digest.update(repr(row).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def _as_record(row: tuple) -> Dict:
+    """Window row in the shape EmotionAnalyzer.get_emotion_insights expects"""
+    _, emotion_type, intensity, sentiment_score, created_at, _ = row
+    return {
+        'primary_emotion': emotion_type,
+        'intensity': intensity,
+        'sentiment_score': sentiment_score or 0,
+        'analyzed_at': created_at.isoformat(),
+    }
+
+
+def _result(stored: EmotionInsight, status: str, pending_changes: int = 0) -> Dict:
+    return {
+        'insights': stored.insights,
+        'status': status,
+        'generated_at': stored.generated_at,
+        'record_count': stored.record_count,
+        'pending_changes': pending_changes,
+    }
+
+
+def current_insights(user, analyzer=None, force: bool = False) -> Dict:
+    """
+    Insights for ``user``, regenerated only when enough records changed.
+
+    Returns ``insights`` plus ``status`` (cached / full / incremental /
+    stale / failed), ``generated_at``, ``record_count`` and ``pending_changes``.
+    ``force`` regenerates whenever the window changed at all.
+    """
+    rows = load_window(user)
+    if not rows:
+        return {'insights': {}, 'status': STATUS_CACHED, 'generated_at': None,
+                'record_count': 0, 'pending_changes': 0}
+
+    stored = EmotionInsight.objects.filter(user=user).first()
+    current = fingerprint(rows)
+    reusable = stored is not None and stored.prompt_version == PROMPT_VERSION
+    if reusable and stored.fingerprint == current:
+        return _result(stored, STATUS_CACHED)
+
+    changed = [row for row in rows if not reusable or row[5] > stored.source_updated_at]
+    if reusable and not force and len(changed) < refresh_threshold():
+        return _result(stored, STATUS_CACHED, len(changed))
+
+    incremental = reusable and bool(changed)
+    analyzer = analyzer or get_emotion_analyzer()
+    # Oldest first, so the model reads the records in the order they happened
+    insights = analyzer.get_emotion_insights(
+        [_as_record(row) for row in reversed(rows)],
+        previous=stored.insights if incremental else None,
+        new_records=[_as_record(row) for row in reversed(changed)] if incremental else None,
+    )
+    if 'error' in insights:
+        if stored is not None:
+            return _result(stored, STATUS_STALE, len(changed))
+        return {'insights': insights, 'status': STATUS_FAILED, 'generated_at': None,
+                'record_count': 0, 'pending_changes': len(changed)}
+
+    total_tokens = insights.pop('total_tokens', 0)
+    stored, _ = EmotionInsight.objects.update_or_create(user=user, defaults={
+        'insights': insights,
+        'fingerprint': current,
+        'source_updated_at': max(row[5] for row in rows),
+        'record_count': len(rows),
+        'prompt_version': PROMPT_VERSION,
+        'generation': STATUS_INCREMENTAL if incremental else STATUS_FULL,
+        'total_tokens': total_tokens,
+    })
+    return _result(stored, stored.generation)
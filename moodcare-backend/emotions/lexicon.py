@@ -0,0 +1,189 @@
+"""
+Local lexicon-based emotion classifier
+
+A first tier that answers instantly and without network access: keyword
+stems per emotion (English and Korean) are compiled into a single regex,
+matches are weighted by nearby intensifiers and flipped or dropped by
+negation. Used alone for quota-limited tiers and as the fallback when the
+LLM is unavailable.
+"""
+import re
+from typing import Dict, Iterable, Optional
+
+# English stems match any word starting with them ("worr" -> worried,
+# worrying); short or ambiguous words are listed whole so "mad" does not
+# match "made". Korean stems match anywhere since endings attach directly
+# to the stem (기쁘다, 기뻐서, 기쁜). EmotionAnalyzer.emotion_categories is
+# merged in as whole words.
+ENGLISH_STEMS = {
+    'joy': ['happ', 'cheer', 'delight', 'wonderful', 'awesome', 'grateful', 'thankful'],
+    'sadness': ['unhapp', 'depress', 'lonel', 'griev', 'miserable', 'heartbr', 'hopeless',
+                'gloom', 'disappoint'],
+    'anger': ['angr', 'anger', 'furious', 'frustrat', 'irritat', 'annoy', 'hate', 'pissed',
+              'resent', 'outrag'],
+    'fear': ['afraid', 'scare', 'scary', 'anxi', 'worr', 'nervous', 'panic', 'terrif',
+             'dread', 'stress'],
+    'surprise': ['surpris', 'amaz', 'astonish', 'shock', 'unexpected', 'stunn'],
+    'disgust': ['disgust', 'repuls', 'revolt', 'appall'],
+    'trust': ['trust', 'secure', 'confiden', 'comfort', 'reliab', 'peace'],
+    'anticipation': ['eager', 'expect', 'anticipat', 'curious'],
+}
+
+ENGLISH_WORDS = {
+    'joy': ['joy', 'joyful', 'glad', 'great', 'fun', 'love', 'loved', 'loving', 'proud',
+            'smile', 'smiled', 'smiling', 'laugh', 'laughed', 'laughing', 'relaxed'],
+    'sadness': ['sad', 'sadder', 'sadness', 'cry', 'cried', 'crying', 'tears', 'tearful',
+                'grief', 'empty', 'miss', 'missed', 'missing', 'down', 'heartbroken'],
+    'anger': ['mad', 'rage', 'hated', 'hating'],
+    'fear': ['fear', 'feared', 'fearful', 'tense'],
+    'surprise': ['wow'],
+    'disgust': ['gross', 'nasty', 'sick of'],
+    'trust': ['safe', 'calm', 'calmer', 'support', 'supported'],
+    'anticipation': ['hope', 'hoped', 'hopeful', 'hoping', 'look forward', 'looking forward',
+                     "can't wait"],
+}
+
+KOREAN_STEMS = {
+    'joy': ['기쁘', '기뻐', '기쁜', '행복', '즐거', '즐겁', '신나', '신났', '좋았', '좋아',
+            '웃었', '웃음', '뿌듯', '감사', '고마', '만족'],
+    'sadness': ['슬프', '슬퍼', '슬픈', '우울', '외로', '외롭', '속상', '눈물', '울었', '서운',
+                '허전', '그리워', '그립', '상실', '힘들', '괴로'],
+    'anger': ['화나', '화가', '화났', '짜증', '분노', '열받', '빡치', '빡쳐', '억울', '미워',
+              '밉', '싫증'],
+    'fear': ['무서', '무섭', '두려', '두렵', '불안', '걱정', '긴장', '겁이', '겁먹', '초조',
+             '공포', '스트레스'],
+    'surprise': ['놀라', '놀랐', '놀람', '깜짝', '충격', '당황'],
+    'disgust': ['역겨', '역겹', '혐오', '징그', '구역질', '더러', '싫어', '싫다'],
+    'trust': ['믿', '든든', '안심', '편안', '신뢰', '안정', '평온'],
+    'anticipation': ['기대', '설레', '설렘', '희망', '기다려', '기다리', '궁금'],
+}
+
+INTENSIFIERS = [
+    'very', 'so', 'really', 'extremely', 'too', 'super', 'totally', 'incredibly', 'deeply',
+    '너무', '정말', '진짜', '엄청', '완전', '매우', '아주', '몹시', '되게', '많이',
+]
+# Negators that precede the emotion word ("not happy", "안 좋아")
+LEADING_NEGATORS = [
+    'not', 'no', 'never', 'hardly', 'without', 'nothing',
+    '안', '못', '별로', '전혀',
+]
+# Korean negation that follows the stem ("행복하지 않아", "기쁘지 못했다")
+TRAILING_NEGATION = re.compile(r'^\S{0,4}\s*(?:지\s*(?:않|못|마)|없)')
+
+# What a negated emotion turns into; missing entries are simply dropped
+NEGATION_TARGETS = {
+    'joy': 'sadness',
+    'trust': 'fear',
+    'anticipation': 'sadness',
+}
+
+POSITIVE_EMOTIONS = ('joy', 'trust', 'anticipation')
+NEGATIVE_EMOTIONS = ('sadness', 'anger', 'fear', 'disgust')
+
+INTENSIFIER_WEIGHT = 1.5
+NEGATED_WEIGHT = 0.5
+# How far back (characters) to look for intensifiers/negators
+LOOKBEHIND_CHARS = 24
+
+
+class LexiconClassifier:
+    """
+    Precompiled multi-pattern emotion matcher.
+
+    All stems live in one alternation (longest first), so classifying a
+    message is a single regex scan plus a few dictionary lookups.
+    """
+
+    def __init__(self, categories: Optional[Dict[str, Iterable[str]]] = None):
+        words = {emotion: list(entries) for emotion, entries in ENGLISH_WORDS.items()}
+        for emotion, entries in (categories or {}).items():
+            words.setdefault(emotion, []).extend(entries)
+
+        self._emotions = {}
+        for table in (words, ENGLISH_STEMS, KOREAN_STEMS):
+            for emotion, entries in table.items():
+                for entry in entries:
+                    # First owner wins for words listed twice ("excited")
+                    self._emotions.setdefault(entry.lower(), emotion)
+
+        self._pattern = re.compile(
+            r"\b(?P<word>{})\b|\b(?P<stem>{})[a-z']*|(?P<ko>{})".format(
+                self._alternation(words), self._alternation(ENGLISH_STEMS),
+                self._alternation(KOREAN_STEMS),
+            ),
+            re.IGNORECASE,
+        )
+        self._intensifier = re.compile(
+            r'(?:^|[\s,])(?:{})\s+$'.format('|'.join(map(re.escape, INTENSIFIERS))),
+            re.IGNORECASE,
+        )
+        self._negator = re.compile(
+            r"(?:(?:^|[\s,])(?:{})|n't)\s+(?:[\w']+\s+){{0,2}}$".format(
+                '|'.join(map(re.escape, LEADING_NEGATORS))
+            ),
+            re.IGNORECASE,
+        )
+
+    @staticmethod
+    def _alternation(table: Dict[str, Iterable[str]]) -> str:
+        entries = {entry.lower() for values in table.values() for entry in values}
+        return '|'.join(re.escape(entry) for entry in sorted(entries, key=len, reverse=True))
+
+    def classify(self, text: str) -> Dict:
+        """
+        Returns:
+            primary_emotion, intensity (1-10), sentiment_score (-1..1),
+            secondary_emotions, confidence (0-1) and the matched keywords
+        """
+        text = text or ''
+        scores = {}
+        keywords = []
+        for match in self._pattern.finditer(text):
+            key = match.group('word') or match.group('stem') or match.group('ko')
+            emotion = self._emotions[key.lower()]
+            before = text[max(0, match.start() - LOOKBEHIND_CHARS):match.start()]
+
+            weight = INTENSIFIER_WEIGHT if self._intensifier.search(before) else 1.0
+            if self._negator.search(before) or TRAILING_NEGATION.match(text[match.end():match.end() + 8]):
+                emotion = NEGATION_TARGETS.get(emotion)
+                weight *= NEGATED_WEIGHT
+                if emotion is None:
+                    continue
+
+            scores[emotion] = scores.get(emotion, 0.0) + weight
+            keywords.append(match.group(0))
+
+        if not scores:
+            return {
+                'primary_emotion': 'neutral',
+                'intensity': 5,
+                'sentiment_score': 0.0,
+                'secondary_emotions': [],
+                'confidence': 0.0,
+                'keywords': [],
+            }
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        primary, primary_score = ranked[0]
+        total = sum(scores.values())
+
+        exclamations = min(text.count('!'), 3)
+        intensity = int(min(10, max(1, round(3 + 2.5 * primary_score + 0.5 * exclamations))))
+
+        return {
+            'primary_emotion': primary,
+            'intensity': intensity,
+            'sentiment_score': self._sentiment(scores, intensity),
+            'secondary_emotions': [emotion for emotion, _ in ranked[1:3]],
+            'confidence': round((primary_score / total) * min(1.0, primary_score / 2), 2),
+            'keywords': keywords,
+        }
+
+    @staticmethod
+    def _sentiment(scores: Dict[str, float], intensity: int) -> float:
+        positive = sum(scores.get(emotion, 0.0) for emotion in POSITIVE_EMOTIONS)
+        negative = sum(scores.get(emotion, 0.0) for emotion in NEGATIVE_EMOTIONS)
+        if not positive + negative:
+            return 0.0
+        return round((positive - negative) / (positive + negative) * intensity / 10, 2)
+
@@ -0,0 +1,80 @@
+import random
+import time
+import tracemalloc
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from emotions.export import FORMATS, stream_export
+from emotions.models import Emotion
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Time-to-first-byte, throughput and peak memory of the streaming emotion export'
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('--records', type=int, default=100_000)
+        parser.add_argument('--max-ttfb-ms', type=float, default=100.0,
+                            help='Fail when the first chunk takes longer than this')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self._run(options)
+                raise _Rollback()
+        except _Rollback:
+            pass
+
+    def _run(self, options):
+        user = get_user_model().objects.create(
+            username='export-bench', email='export-bench@example.com'
+        )
+        rng = random.Random(5)
+        types = [value for value, _ in Emotion.EMOTION_TYPES]
+        for start in range(0, options['records'], 5000):
+            Emotion.objects.bulk_create([
+                Emotion(user=user, emotion_type=rng.choice(types), intensity=rng.randint(1, 10),
+                        note='오늘 하루는 ' * rng.randint(1, 20), triggers=['work', 'sleep'],
+                        ai_analysis={'confidence': 0.8, 'keywords': ['tired']})
+                for _ in range(min(5000, options['records'] - start))
+            ])
+
+        failures = []
+        for export_format in FORMATS:
+            begin = time.perf_counter()
+            ttfb = None
+            size = 0
+            lines = 0
+            for chunk in stream_export(user, export_format):
+                # The CSV header alone does not count as the first byte of data
+                if ttfb is None and chunk.count('\n') > 1:
+                    ttfb = (time.perf_counter() - begin) * 1000
+                size += len(chunk.encode('utf-8'))
+                lines += chunk.count('\n')
+            elapsed = time.perf_counter() - begin
+            if ttfb is None:
+                ttfb = elapsed * 1000
+
+            # Separate pass: tracemalloc slows allocation-heavy code several times over
+            tracemalloc.start()
+            for _ in stream_export(user, export_format):
+                pass
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            self.stdout.write(
+                f"{export_format:<6} {options['records']} records, {size / 2 ** 20:.1f} MiB, "
+                f"ttfb {ttfb:.1f} ms, total {elapsed:.2f} s, peak Python memory "
+                f"{peak / 2 ** 20:.2f} MiB, {lines} lines"
+            )
+            if ttfb > options['max_ttfb_ms']:
+                failures.append(f"{export_format} ttfb {ttfb:.1f} ms")
+
+        if failures:
+            raise CommandError('; '.join(failures))
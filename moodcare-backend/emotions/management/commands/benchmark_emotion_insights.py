@@ -0,0 +1,88 @@
+import os
+import random
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import override_settings
+from django.utils import timezone
+
+from ai_analysis.benchmarking import BENCHMARK_SETTINGS, FakeOpenAIServer
+from emotions.models import Emotion
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Upstream calls and prompt bytes of stored/incremental insights vs a call per dashboard load'
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('--records', type=int, default=500)
+        parser.add_argument('--loads', type=int, default=50, help='Dashboard loads')
+        parser.add_argument('--log-every', type=int, default=3,
+                            help='A new record is logged every this many loads')
+
+    def handle(self, *args, **options):
+        with override_settings(**BENCHMARK_SETTINGS), \
+                FakeOpenAIServer(latency=0) as server:
+            os.environ['OPENAI_BASE_URL'] = server.base_url
+
+            # Imported late so the clients pick up the fake base URL
+            from emotions.ai_analyzer import EmotionAnalyzer
+            analyzer = EmotionAnalyzer()
+
+            for label, stored in (('every load', False), ('stored', True)):
+                calls, sent = server.request_count, server.request_bytes
+                statuses = self._run(analyzer, options, stored)
+                calls, sent = server.request_count - calls, server.request_bytes - sent
+                self.stdout.write(
+                    f"{label:<11} {calls:>4} upstream calls  {sent:>9} prompt bytes  {statuses}"
+                )
+
+    def _run(self, analyzer, options, stored):
+        from emotions.insights import _as_record, current_insights, load_window
+
+        statuses = {}
+        try:
+            with transaction.atomic():
+                user = self._seed(options['records'])
+                rng = random.Random(1)
+                for load in range(options['loads']):
+                    if load and load % options['log_every'] == 0:
+                        Emotion.objects.create(
+                            user=user, emotion_type=rng.choice(['happy', 'sad', 'anxious']),
+                            intensity=rng.randint(1, 10), sentiment_score=rng.uniform(-1, 1),
+                        )
+                    if stored:
+                        status = current_insights(user, analyzer)['status']
+                    else:
+                        rows = load_window(user)
+                        result = analyzer.get_emotion_insights(
+                            [_as_record(row) for row in reversed(rows)]
+                        )
+                        status = 'error' if 'error' in result else 'full'
+                    if status in ('stale', 'failed', 'error'):
+                        raise CommandError(f"Insight generation failed on load {load}")
+                    statuses[status] = statuses.get(status, 0) + 1
+                raise _Rollback()
+        except _Rollback:
+            pass
+        return statuses
+
+    def _seed(self, count):
+        user = get_user_model().objects.create(
+            username='insights-bench', email='insights-bench@example.com'
+        )
+        rng = random.Random(9)
+        types = [value for value, _ in Emotion.EMOTION_TYPES]
+        start = timezone.now() - timedelta(hours=6 * count)
+        Emotion.objects.bulk_create([
+            Emotion(user=user, emotion_type=rng.choice(types), intensity=rng.randint(1, 10),
+                    sentiment_score=rng.uniform(-1, 1), created_at=start + timedelta(hours=6 * i))
+            for i in range(count)
+        ])
+        return user
@@ -0,0 +1,112 @@
+import random
+import statistics
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from emotions.models import Emotion
+from emotions.pagination import EmotionCursorPagination
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Page-1 vs deep-page latency of offset and cursor pagination on the emotion timeline'
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page', type=int, default=500, help='Deep page to measure')
+        parser.add_argument('--page-size', type=int, default=20)
+        parser.add_argument('--other-users', type=int, default=20,
+                            help='Users whose records share the table')
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self._run(options)
+                raise _Rollback()
+        except _Rollback:
+            pass
+
+    def _run(self, options):
+        page_size, deep_page = options['page_size'], options['page']
+        per_user = page_size * deep_page + page_size
+        User = get_user_model()
+        users = [
+            User.objects.create(username=f'pagination-bench-{i}', email=f'bench{i}@example.com')
+            for i in range(options['other_users'] + 1)
+        ]
+
+        rng = random.Random(3)
+        types = [value for value, _ in Emotion.EMOTION_TYPES]
+        start = timezone.now() - timedelta(days=365 * 5)
+        for user in users:
+            Emotion.objects.bulk_create([
+                Emotion(user=user, emotion_type=rng.choice(types), intensity=rng.randint(1, 10),
+                        created_at=start + timedelta(minutes=i * 90 + rng.randint(0, 60)))
+                for i in range(per_user)
+            ], batch_size=2000)
+        self.stdout.write(f"{len(users)} users x {per_user} records")
+
+        queryset = Emotion.objects.filter(user=users[0]).order_by('-created_at', '-id').values(
+            'id', 'emotion_type', 'intensity', 'created_at'
+        )
+        factory = APIRequestFactory()
+        host = (settings.ALLOWED_HOSTS or ['localhost'])[0]
+
+        def offset_page(page):
+            paginator = PageNumberPagination()
+            paginator.page_size = page_size
+            return list(paginator.paginate_queryset(
+                queryset, Request(factory.get('/', {'page': page}, HTTP_HOST=host))
+            ))
+
+        def cursor_page(cursor):
+            paginator = EmotionCursorPagination()
+            paginator.page_size = page_size
+            params = {'cursor': cursor} if cursor else {}
+            rows = paginator.paginate_queryset(
+                queryset, Request(factory.get('/', params, HTTP_HOST=host))
+            )
+            return rows, paginator.get_next_link()
+
+        # Walk the cursor chain once to find the deep page's cursor
+        cursor, first_ids = None, None
+        for page in range(1, deep_page + 1):
+            rows, next_link = cursor_page(cursor)
+            if page == 1:
+                first_ids = [row['id'] for row in rows]
+            if page == deep_page:
+                break
+            cursor = Request(factory.get(next_link, HTTP_HOST=host)).query_params['cursor']
+        deep_cursor = cursor
+
+        if first_ids != [row['id'] for row in offset_page(1)] or \
+                [row['id'] for row in rows] != [row['id'] for row in offset_page(deep_page)]:
+            raise CommandError('Cursor and offset pages disagree')
+
+        results = {
+            'offset page 1': lambda: offset_page(1),
+            f'offset page {deep_page}': lambda: offset_page(deep_page),
+            'cursor page 1': lambda: cursor_page(None),
+            f'cursor page {deep_page}': lambda: cursor_page(deep_cursor),
+        }
+        for name, fetch in results.items():
+            fetch()
+            timings = []
+            for _ in range(options['repeat']):
+                begin = time.perf_counter()
+                fetch()
+                timings.append((time.perf_counter() - begin) * 1000)
+            self.stdout.write(f"{name:<18} median {statistics.median(timings):7.2f} ms")
@@ -0,0 +1,81 @@
+import random
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.core.management.base import BaseCommand, CommandError
+
+from emotions.models import Emotion
+from emotions.sequences import MAX_LENGTH, MIN_LENGTH, SequenceCounter
+
+
+def synthetic_history(count: int, seed: int = 7):
+    """(id, created_at, emotion_type) rows, a few records a day with some long breaks"""
+    rng = random.Random(seed)
+    emotions = [value for value, _ in Emotion.EMOTION_TYPES]
+    moment = datetime(2020, 1, 1, tzinfo=dt_timezone.utc)
+    rows = []
+    for record_id in range(1, count + 1):
+        moment += timedelta(hours=rng.expovariate(1 / 6) if rng.random() > 0.01 else 24 * 10)
+        rows.append((record_id, moment, rng.choice(emotions)))
+    return rows
+
+
+def reference_counts(rows, n, max_gap=None, window=None):
+    """Straightforward re-slicing count, used to check the streaming counter"""
+    counts = Counter()
+    for end in range(n - 1, len(rows)):
+        chunk = rows[end - n + 1:end + 1]
+        if max_gap is not None and any(
+            b[1] - a[1] > max_gap for a, b in zip(chunk, chunk[1:])
+        ):
+            continue
+        if window is not None and chunk[-1][1] - chunk[0][1] > window:
+            continue
+        counts[tuple(row[2] for row in chunk)] += 1
+    return counts
+
+
+class Command(BaseCommand):
+    help = 'Speed and correctness of the streaming emotion-sequence counter on synthetic history'
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('--records', type=int, default=100_000,
+                            help='Synthetic records (100k is ~70 years of 4 a day)')
+        parser.add_argument('--increment', type=int, default=10,
+                            help='Records appended after the initial count')
+
+    def handle(self, *args, **options):
+        rows = synthetic_history(options['records'] + options['increment'])
+        history, appended = rows[:options['records']], rows[options['records']:]
+        lengths = list(range(MIN_LENGTH, MAX_LENGTH + 1))
+
+        configs = [
+            ('plain', None, None),
+            ('gap 24h', timedelta(hours=24), None),
+            ('window 48h', None, timedelta(hours=48)),
+        ]
+        for name, max_gap, window in configs:
+            start = time.perf_counter()
+            counter = SequenceCounter(lengths, max_gap, window)
+            counter.extend(history)
+            full_ms = (time.perf_counter() - start) * 1000
+
+            restored = SequenceCounter(lengths, max_gap, window)
+            restored.load_state(counter.to_state())
+            start = time.perf_counter()
+            restored.extend(appended)
+            increment_ms = (time.perf_counter() - start) * 1000
+
+            for n in lengths:
+                if restored.counts[n] != reference_counts(rows, n, max_gap, window):
+                    raise CommandError(f"{name}: length {n} counts differ from the reference")
+
+            self.stdout.write(
+                f"{name:<11} full pass {full_ms:8.1f} ms ({len(history)} records, "
+                f"lengths {MIN_LENGTH}-{MAX_LENGTH}), +{len(appended)} records "
+                f"{increment_ms:.3f} ms, top {restored.most_common(limit=1)}"
+            )
+
+        self.stdout.write(self.style.SUCCESS('Streaming counts match the reference'))
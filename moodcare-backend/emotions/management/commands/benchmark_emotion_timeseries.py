@@ -0,0 +1,114 @@
+import json
+import random
+import time
+from datetime import timedelta
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from emotions import timeseries
+from emotions.models import Emotion
+
+
+class _Rollback(Exception):
+    pass
+
+
+def reference_ewma(values, span):
+    """Plain recursive EWMA, used to check the vectorized one"""
+    alpha = 2.0 / (span + 1.0)
+    smoothed, level = [], values[0]
+    for value in values:
+        level = alpha * value + (1 - alpha) * level
+        smoothed.append(level)
+    return np.array(smoothed)
+
+
+def synthetic_series(count, seed=5):
+    rng = np.random.default_rng(seed)
+    x = np.cumsum(rng.exponential(6 * 3600, count))
+    y = np.clip(5 + np.cumsum(rng.normal(0, 0.3, count)) % 5 + rng.normal(0, 1, count), 1, 10)
+    return x, y
+
+
+class Command(BaseCommand):
+    help = 'Speed, payload size and correctness of the downsampled emotion time series'
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('--points', type=int, default=timeseries.DEFAULT_POINTS)
+        parser.add_argument('--records', type=int, default=20_000,
+                            help='Records stored for the end-to-end pass')
+
+    def handle(self, *args, **options):
+        points = options['points']
+
+        x, y = synthetic_series(5000)
+        for span in (2, 10, 200):
+            error = np.max(np.abs(timeseries.ewma(y, span) - reference_ewma(y, span)))
+            if error > 1e-9:
+                raise CommandError(f"EWMA span {span} differs from the reference by {error}")
+        self.stdout.write('ewma matches the recursive reference')
+
+        for count in (10_000, 100_000, 1_000_000):
+            x, y = synthetic_series(count)
+            for method in timeseries.METHODS:
+                start = time.perf_counter()
+                indices = timeseries.REDUCERS[method](x, y, points)
+                elapsed = (time.perf_counter() - start) * 1000
+                if len(indices) > points or np.any(np.diff(indices) <= 0):
+                    raise CommandError(f"{method} returned {len(indices)} unordered/excess points")
+                if method == 'minmax' and (y.max() not in y[indices] or y.min() not in y[indices]):
+                    raise CommandError('minmax dropped the global extremes')
+                self.stdout.write(
+                    f"{method:<7} {count:>9} -> {len(indices):>4} points  {elapsed:8.1f} ms"
+                )
+
+        try:
+            with transaction.atomic():
+                self._end_to_end(options['records'], points)
+                raise _Rollback()
+        except _Rollback:
+            pass
+
+    def _end_to_end(self, count, points):
+        user = get_user_model().objects.create(
+            username='timeseries-bench', email='timeseries-bench@example.com'
+        )
+        rng = random.Random(3)
+        types = [value for value, _ in Emotion.EMOTION_TYPES]
+        moment = timezone.now() - timedelta(hours=6 * count)
+        records = []
+        for _ in range(count):
+            moment += timedelta(hours=rng.expovariate(1 / 6))
+            records.append(Emotion(
+                user=user, emotion_type=rng.choice(types), intensity=rng.randint(1, 10),
+                sentiment_score=rng.uniform(-1, 1) if rng.random() < 0.8 else None,
+                created_at=moment,
+            ))
+        Emotion.objects.bulk_create(records, batch_size=1000)
+
+        raw = list(
+            Emotion.objects.filter(user=user).values('created_at', 'intensity', 'sentiment_score')
+        )
+        raw_bytes = len(json.dumps(raw, cls=DjangoJSONEncoder))
+
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            payload = timeseries.build_series(
+                user, timeseries.METRICS, points=points, method='lttb', span=10
+            )
+            elapsed = (time.perf_counter() - start) * 1000
+        for metric, series in payload['series'].items():
+            if len(series['points']) > points:
+                raise CommandError(f"{metric}: {len(series['points'])} points > {points}")
+        series_bytes = len(json.dumps(payload, cls=DjangoJSONEncoder))
+        self.stdout.write(
+            f"end-to-end {count} records: {len(queries)} query, {elapsed:.1f} ms, "
+            f"{series_bytes} bytes (raw records {raw_bytes} bytes)"
+        )
@@ -0,0 +1,75 @@
+import json
+import statistics
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from emotions.ai_analyzer import EmotionAnalyzer
+
+FIXTURE = Path(__file__).resolve().parents[2] / 'data' / 'labelled_emotions.json'
+
+
+class Command(BaseCommand):
+    help = 'Accuracy and latency of the local lexicon classifier (optionally vs GPT) on labelled texts'
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fixture', default=str(FIXTURE), help='JSON list of {text, label}')
+        parser.add_argument('--repeat', type=int, default=200, help='Timing passes over the fixture')
+        parser.add_argument('--with-llm', action='store_true',
+                            help='Also score llm and local-then-llm modes (real API calls)')
+        parser.add_argument('--max-p99-ms', type=float, default=1.0,
+                            help='Fail when local p99 latency exceeds this')
+
+    def handle(self, *args, **options):
+        try:
+            samples = json.loads(Path(options['fixture']).read_text(encoding='utf-8'))
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Cannot read fixture: {e}")
+
+        analyzer = EmotionAnalyzer()
+        classify = analyzer.lexicon.classify
+
+        latencies = []
+        for _ in range(options['repeat']):
+            for sample in samples:
+                start = time.perf_counter()
+                classify(sample['text'])
+                latencies.append(time.perf_counter() - start)
+        latencies.sort()
+
+        self._report('local', samples, lambda text: classify(text)['primary_emotion'])
+        p50 = statistics.median(latencies) * 1000
+        p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000
+        self.stdout.write(
+            f"local latency: p50 {p50:.3f} ms, p99 {p99:.3f} ms, max {latencies[-1] * 1000:.3f} ms"
+        )
+
+        if options['with_llm']:
+            for mode in ('llm', 'local-then-llm'):
+                self._report(mode, samples, lambda text, mode=mode: analyzer.analyze_text(
+                    text, mode=mode
+                ).get('primary_emotion'), timed=True)
+
+        if p99 > options['max_p99_ms']:
+            raise CommandError(f"Local p99 {p99:.3f} ms exceeds {options['max_p99_ms']} ms")
+
+    def _report(self, name, samples, predict, timed=False):
+        correct = 0
+        per_label = {}
+        start = time.perf_counter()
+        for sample in samples:
+            hit = predict(sample['text']) == sample['label']
+            correct += hit
+            totals = per_label.setdefault(sample['label'], [0, 0])
+            totals[0] += hit
+            totals[1] += 1
+        elapsed = time.perf_counter() - start
+
+        line = f"{name}: accuracy {correct / len(samples):.1%} ({correct}/{len(samples)})"
+        if timed:
+            line += f", {elapsed / len(samples) * 1000:.1f} ms/text"
+        self.stdout.write(line)
+        for label, (hits, total) in sorted(per_label.items()):
+            self.stdout.write(f"    {label:<13} {hits}/{total}")
@@ -0,0 +1,73 @@
+import random
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+
+from ai_analysis.benchmarking import BENCHMARK_SETTINGS
+from emotions import history
+from emotions.models import Emotion
+
+
+def synthetic_records(count, seed=13):
+    """Insights input records (oldest first), a few a day"""
+    rng = random.Random(seed)
+    types = [value for value, _ in Emotion.EMOTION_TYPES]
+    moment = datetime(2020, 1, 1, tzinfo=dt_timezone.utc)
+    records = []
+    for _ in range(count):
+        moment += timedelta(hours=rng.expovariate(1 / 6))
+        records.append({
+            'primary_emotion': rng.choice(types),
+            'intensity': rng.randint(1, 10),
+            'sentiment_score': round(rng.uniform(-1, 1), 2),
+            'analyzed_at': moment.isoformat(),
+        })
+    return records
+
+
+def inline_prompt_chars(emotions_data):
+    """Size of the lists the insights prompt used to inline"""
+    return sum(
+        len(str(emotions_data[key])) for key in ('emotions', 'intensities', 'sentiments')
+    )
+
+
+class Command(BaseCommand):
+    help = 'Insights prompt size and summary cost as history grows (inline lists vs compact summary)'
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('--max-records', type=int, default=100_000)
+
+    def handle(self, *args, **options):
+        with override_settings(**BENCHMARK_SETTINGS):
+            from emotions.ai_analyzer import EmotionAnalyzer
+            analyzer = EmotionAnalyzer()
+
+            sizes = []
+            count = 10
+            while count <= options['max_records']:
+                data = analyzer._prepare_insights_data(synthetic_records(count))
+                start = time.perf_counter()
+                request = analyzer._insights_request(data)
+                elapsed = (time.perf_counter() - start) * 1000
+                prompt = request['messages'][1]['content']
+                sizes.append(len(prompt))
+                self.stdout.write(
+                    f"{count:>7} records  inline {inline_prompt_chars(data):>9} chars  "
+                    f"compact prompt {len(prompt):>5} chars  built in {elapsed:7.1f} ms"
+                )
+                count *= 10
+
+        # Bounded: a 10-record history may be shorter, but growth must stop
+        if max(sizes) - min(sizes[1:] or sizes) > 200:
+            raise CommandError(f"Prompt size still grows with history: {sizes}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Prompt stays within {min(sizes)}-{max(sizes)} chars; sample block:"
+        ))
+        self.stdout.write(history.render(history.summarize(
+            *zip(*[(r['primary_emotion'], r['intensity'], r['sentiment_score'],
+                    datetime.fromisoformat(r['analyzed_at'])) for r in synthetic_records(1000)])
+        )))
@@ -0,0 +1,91 @@
+import time
+import tracemalloc
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from emotions.audio import SAMPLE_RATE
+from emotions.voice_features import extract_voice_features
+
+
+def synthetic_voice(seconds: float, seed: int = 0) -> bytes:
+    """Speech-like test signal: gliding harmonic tone in ~4 Hz syllables plus noise"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    f0 = 140 + 30 * np.sin(2 * np.pi * 0.5 * t)
+    phase = 2 * np.pi * np.cumsum(f0) / SAMPLE_RATE
+    voice = sum(np.sin(k * phase) / k for k in range(1, 6))
+    syllables = np.clip(np.sin(2 * np.pi * 2 * t), 0, None)
+    signal = 0.2 * voice * syllables + 0.005 * rng.standard_normal(len(t))
+    return (np.clip(signal, -1, 1) * 32767).astype('<i2').tobytes()
+
+
+def librosa_features(pcm: bytes) -> dict:
+    """The previous multi-pass librosa implementation, for comparison"""
+    import librosa
+
+    y = np.frombuffer(pcm, dtype='<i2').astype(np.float32) / 32768.0
+    sr = SAMPLE_RATE
+    pitches, _ = librosa.piptrack(y=y, sr=sr)
+    rms_mean = float(np.mean(librosa.feature.rms(y=y)))
+    rms_std = float(np.std(librosa.feature.rms(y=y)))
+    tempo, _ = librosa.beat.beat_track(y=y, sr=sr)
+    return {
+        'pitch_mean': float(np.mean(pitches[pitches > 0])),
+        'pitch_std': float(np.std(pitches[pitches > 0])),
+        'energy_mean': rms_mean,
+        'energy_std': rms_std,
+        'tempo': float(np.atleast_1d(tempo)[0]),
+        'brightness': float(np.mean(librosa.feature.spectral_centroid(y=y, sr=sr))),
+        'speech_rate': float(np.mean(librosa.feature.zero_crossing_rate(y))),
+    }
+
+
+class Command(BaseCommand):
+    help = 'Time and memory-profile voice feature extraction on synthetic notes'
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('--durations', type=float, nargs='+', default=[10, 60, 300],
+                            help='Note lengths in seconds')
+        parser.add_argument('--repeat', type=int, default=3, help='Runs per measurement (best is kept)')
+
+    def handle(self, *args, **options):
+        try:
+            import librosa  # noqa: F401
+            compare = True
+        except ImportError:
+            compare = False
+            self.stdout.write('librosa not installed; timing the single-pass extractor only')
+
+        for seconds in options['durations']:
+            pcm = synthetic_voice(seconds)
+            warmup = pcm[:SAMPLE_RATE * 4]
+            extract_voice_features(warmup)  # warm numpy/FFT caches
+
+            elapsed, peak, features = self._measure(extract_voice_features, pcm, options['repeat'])
+            line = f"{seconds:>6.0f}s  single-pass {elapsed * 1000:8.1f} ms  peak {peak / 2**20:6.1f} MiB"
+
+            if compare:
+                librosa_features(warmup)  # JIT-compile librosa's numba kernels
+                old_elapsed, old_peak, _ = self._measure(librosa_features, pcm, options['repeat'])
+                line += (f"  |  librosa {old_elapsed * 1000:8.1f} ms  peak {old_peak / 2**20:6.1f} MiB"
+                         f"  |  {old_elapsed / elapsed:5.1f}x faster")
+            self.stdout.write(line)
+
+        self.stdout.write(f"Last features: {features}")
+
+    @staticmethod
+    def _measure(func, pcm, repeat):
+        best = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = func(pcm)
+            best = min(best, time.perf_counter() - start)
+
+        # Memory is traced separately so tracing overhead does not skew timings
+        tracemalloc.start()
+        func(pcm)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return best, peak, result
@@ -0,0 +1,72 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from emotions import rollups
+from emotions.models import Emotion, EmotionDailyRollup
+
+
+class Command(BaseCommand):
+    help = 'Rebuild per-user daily emotion rollups from raw records, optionally verifying them'
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, action='append', dest='users',
+                            help='Only this user id (repeatable)')
+        parser.add_argument('--verify', action='store_true',
+                            help='Compare rollup-based results against raw scans')
+        parser.add_argument('--verify-only', action='store_true',
+                            help='Verify without rebuilding')
+        parser.add_argument('--windows', type=int, nargs='+', default=[1, 7, 30, 365],
+                            help='Statistics windows (days) to verify')
+
+    def handle(self, *args, **options):
+        users = options['users']
+        if not options['verify_only']:
+            written = rollups.rebuild(users)
+            self.stdout.write(self.style.SUCCESS(f"Rebuilt {written} daily rollups"))
+
+        if options['verify'] or options['verify_only']:
+            mismatches = self._verify(users, options['windows'])
+            if mismatches:
+                for message in mismatches[:50]:
+                    self.stderr.write(message)
+                raise CommandError(f"{len(mismatches)} rollup mismatches")
+            self.stdout.write(self.style.SUCCESS('Rollups match raw scans'))
+
+    def _verify(self, user_ids, windows):
+        users = get_user_model().objects.all()
+        if user_ids:
+            users = users.filter(pk__in=user_ids)
+
+        now = timezone.now()
+        mismatches = []
+        for user in users.iterator():
+            for days in windows:
+                expected = rollups.scan_window_totals(user, days, now).as_dict()
+                actual = rollups.window_totals(user, days, now).as_dict()
+                if actual != expected:
+                    mismatches.append(f"user {user.pk}, {days}d window: {actual} != {expected}")
+
+            # Every stored day must equal a fresh aggregate of that day's records
+            per_day = {}
+            for user_id, created_at, emotion_type, intensity, triggers in Emotion.objects.filter(
+                user=user
+            ).values_list(*rollups.RECORD_FIELDS):
+                day = rollups.local_date(created_at)
+                per_day.setdefault(day, rollups.Totals()).add_record(
+                    created_at, emotion_type, intensity, triggers
+                )
+            stored = {
+                rollup.date: rollup for rollup in EmotionDailyRollup.objects.filter(user=user)
+            }
+            for day in set(per_day) | set(stored):
+                expected = per_day[day].as_dict() if day in per_day else None
+                actual = None
+                if day in stored:
+                    totals = rollups.Totals()
+                    totals.add_rollup(stored[day])
+                    actual = totals.as_dict()
+                if actual != expected:
+                    mismatches.append(f"user {user.pk}, {day}: {actual} != {expected}")
+        return mismatches
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from emotions import triggers
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the EmotionTrigger index from Emotion.triggers'
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, action='append', dest='users',
+                            help='Only this user id (repeatable)')
+
+    def handle(self, *args, **options):
+        written = triggers.rebuild(options['users'])
+        self.stdout.write(self.style.SUCCESS(f"Indexed {written} triggers"))
@@ -0,0 +1,36 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('emotions', '0003_voiceanalysisjob'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmotionDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('record_count', models.IntegerField(default=0)),
+                ('intensity_sum', models.IntegerField(default=0)),
+                ('intensity_sumsq', models.BigIntegerField(default=0)),
+                ('emotion_counts', models.JSONField(blank=True, default=dict)),
+                ('hourly_counts', models.JSONField(blank=True, default=list)),
+                ('trigger_counts', models.JSONField(blank=True, default=dict)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='emotion_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Emotion Daily Rollup',
+                'verbose_name_plural': 'Emotion Daily Rollups',
+                'db_table': 'emotion_daily_rollups',
+                'ordering': ['-date'],
+                'unique_together': {('user', 'date')},
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-17 23:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('emotions', '0004_emotiondailyrollup'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='emotion',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='emotions_user_id_0b935e_idx'),
+        ),
+    ]
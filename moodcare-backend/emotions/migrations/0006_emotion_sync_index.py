@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-17 23:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('emotions', '0005_emotion_timeline_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='emotion',
+            index=models.Index(fields=['user', 'updated_at'], name='emotions_user_id_d92a28_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-17 23:23
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('emotions', '0006_emotion_sync_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='emotion',
+            name='client_id',
+            field=models.UUIDField(blank=True, editable=False, null=True),
+        ),
+        migrations.AlterField(
+            model_name='emotion',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddConstraint(
+            model_name='emotion',
+            constraint=models.UniqueConstraint(fields=('user', 'client_id'), name='emotions_unique_client_id'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.7 on 2026-10-17 23:24
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('emotions', '0007_emotion_client_id'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmotionTrigger',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('trigger', models.CharField(max_length=100)),
+                ('normalized', models.CharField(max_length=100)),
+                ('created_at', models.DateTimeField()),
+                ('emotion', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='trigger_index', to='emotions.emotion')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Emotion Trigger',
+                'verbose_name_plural': 'Emotion Triggers',
+                'db_table': 'emotion_triggers',
+                'indexes': [models.Index(fields=['user', 'normalized', 'created_at'], name='emotion_tri_user_id_eaa8a8_idx'), models.Index(fields=['user', 'created_at'], name='emotion_tri_user_id_ca2e20_idx')],
+                'unique_together': {('emotion', 'normalized')},
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.7 on 2026-10-17 23:28
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('emotions', '0008_emotiontrigger'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmotionInsight',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('insights', models.JSONField(blank=True, default=dict)),
+                ('fingerprint', models.CharField(max_length=64)),
+                ('source_updated_at', models.DateTimeField()),
+                ('record_count', models.IntegerField(default=0)),
+                ('prompt_version', models.IntegerField(default=1)),
+                ('generation', models.CharField(default='full', max_length=20)),
+                ('total_tokens', models.IntegerField(default=0)),
+                ('generated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='emotion_insight', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Emotion Insight',
+                'verbose_name_plural': 'Emotion Insights',
+                'db_table': 'emotion_insights',
+            },
+        ),
+    ]
@@ -1,5 +1,8 @@
-from django.db import models
+import uuid
+
+from django.db import models, transaction
 from django.conf import settings
+from django.utils import timezone
 
 
 class Emotion(models.Model):
@@ -36,17 +39,36 @@ class Emotion(models.Model):
     # Triggers
     triggers = models.JSONField(default=list, blank=True)
     
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Offline entries: id generated on the device, used to dedupe replays
+    client_id = models.UUIDField(null=True, blank=True, editable=False)
+    
+    # Defaults to now; offline entries keep the time they were logged
+    created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         db_table = 'emotions'
         ordering = ['-created_at']
+        indexes = [
+            # Timeline pages: keyset scans by (created_at, id) within a user
+            models.Index(fields=['user', '-created_at', '-id']),
+            # Delta sync: changes since a per-user updated_at watermark
+            models.Index(fields=['user', 'updated_at']),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'client_id'], name='emotions_unique_client_id'),
+        ]
         verbose_name = 'Emotion'
         verbose_name_plural = 'Emotions'
     
     def __str__(self):
         return f"{self.user.username} - {self.emotion_type} ({self.created_at})"
+    
+    def save(self, *args, **kwargs):
+        # The rollup and trigger index updates in emotions.signals commit or
+        # roll back with the row (deletes already send post_delete in a transaction)
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
 
 
 class EmotionImage(models.Model):
@@ -60,4 +82,124 @@ class EmotionImage(models.Model):
     class Meta:
         db_table = 'emotion_images'
         verbose_name = 'Emotion Image'
-        verbose_name_plural = 'Emotion Images'
\ No newline at end of file
+        verbose_name_plural = 'Emotion Images'
+
+
+class EmotionDailyRollup(models.Model):
+    """
+    Per-user daily aggregates of Emotion records, kept in step by signals
+    (emotions/signals.py) and rebuilt with `manage.py rebuild_emotion_rollups`.
+    Dates and hours are in TIME_ZONE.
+    """
+    
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='emotion_rollups')
+    date = models.DateField()
+    record_count = models.IntegerField(default=0)
+    intensity_sum = models.IntegerField(default=0)
+    intensity_sumsq = models.BigIntegerField(default=0)
+    emotion_counts = models.JSONField(default=dict, blank=True)  # {emotion_type: count}
+    hourly_counts = models.JSONField(default=list, blank=True)  # 24 counts, index = hour
+    trigger_counts = models.JSONField(default=dict, blank=True)  # {trigger: count}
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'emotion_daily_rollups'
+        ordering = ['-date']
+        unique_together = ('user', 'date')
+        verbose_name = 'Emotion Daily Rollup'
+        verbose_name_plural = 'Emotion Daily Rollups'
+    
+    def __str__(self):
+        return f"{self.user.username} - {self.date} ({self.record_count})"
+
+
+class EmotionTrigger(models.Model):
+    """
+    One row per (Emotion, trigger), mirroring Emotion.triggers so trigger
+    counts, filters and co-occurrence are indexed aggregate queries.
+    Maintained by emotions/signals.py; see emotions/triggers.py.
+    """
+    
+    emotion = models.ForeignKey(Emotion, on_delete=models.CASCADE, related_name='trigger_index')
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
+    trigger = models.CharField(max_length=100)  # as entered
+    normalized = models.CharField(max_length=100)  # grouping key
+    created_at = models.DateTimeField()  # copy of Emotion.created_at for windowed counts
+    
+    class Meta:
+        db_table = 'emotion_triggers'
+        unique_together = ('emotion', 'normalized')
+        indexes = [
+            models.Index(fields=['user', 'normalized', 'created_at']),
+            models.Index(fields=['user', 'created_at']),
+        ]
+        verbose_name = 'Emotion Trigger'
+        verbose_name_plural = 'Emotion Triggers'
+    
+    def __str__(self):
+        return f"{self.emotion_id} - {self.normalized}"
+
+
+class EmotionInsight(models.Model):
+    """
+    Latest LLM insight per user and the input it was generated from.
+    Refreshed incrementally by emotions/insights.py once enough records
+    have changed since ``source_updated_at``.
+    """
+    
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='emotion_insight')
+    insights = models.JSONField(default=dict, blank=True)
+    fingerprint = models.CharField(max_length=64)  # hash of the input window
+    source_updated_at = models.DateTimeField()  # newest Emotion.updated_at covered
+    record_count = models.IntegerField(default=0)
+    prompt_version = models.IntegerField(default=1)
+    generation = models.CharField(max_length=20, default='full')  # full / incremental
+    total_tokens = models.IntegerField(default=0)  # spent on the last generation
+    generated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'emotion_insights'
+        verbose_name = 'Emotion Insight'
+        verbose_name_plural = 'Emotion Insights'
+    
+    def __str__(self):
+        return f"{self.user.username} - insight ({self.generated_at})"
+
+
+class VoiceAnalysisJob(models.Model):
+    """Queued voice analysis; the uploaded audio is dropped once processed"""
+    
+    STATUS_PENDING = 'pending'
+    STATUS_PROCESSING = 'processing'
+    STATUS_COMPLETED = 'completed'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_PROCESSING, 'Processing'),
+        (STATUS_COMPLETED, 'Completed'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='voice_analysis_jobs')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    language = models.CharField(max_length=10, default='ko-KR')
+    situation = models.TextField(blank=True)
+    audio = models.BinaryField(blank=True, null=True)
+    
+    # Serialized emotion record once completed
+    result = models.JSONField(default=dict, blank=True)
+    error = models.TextField(blank=True)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    completed_at = models.DateTimeField(blank=True, null=True)
+    
+    class Meta:
+        db_table = 'voice_analysis_jobs'
+        ordering = ['-created_at']
+        verbose_name = 'Voice Analysis Job'
+        verbose_name_plural = 'Voice Analysis Jobs'
+    
+    def __str__(self):
+        return f"{self.user.username} - voice job {self.id} ({self.status})"
@@ -0,0 +1,20 @@
+"""
+Cursor pagination for emotion timelines
+"""
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+
+
+class EmotionCursorPagination(CursorPagination):
+    """
+    Keyset pagination over (created_at, id), newest first.
+
+    Each page is an index range scan on (user, -created_at, -id) that
+    starts at the opaque cursor, so page 500 costs the same as page 1 and
+    no COUNT(*) is issued. Records inserted while a client scrolls never
+    shift or duplicate items on later pages.
+    """
+    ordering = ('-created_at', '-id')
+    page_size = settings.REST_FRAMEWORK.get('PAGE_SIZE', 20)
+    page_size_query_param = 'page_size'
+    max_page_size = 100
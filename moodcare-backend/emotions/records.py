@@ -0,0 +1,76 @@
+"""
+Emotion rows from AI analysis results
+
+The analyzers report ``primary_emotion``; Emotion stores it as
+``emotion_type`` and keeps the full analysis in ``ai_analysis``.
+Batches go in with a single bulk_create, which skips the model signals,
+so the trigger index and rollups are updated here the way ingest does.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import transaction
+
+from . import rollups, triggers
+from .ai_analyzer import analysis_mode_for, get_emotion_analyzer
+from .models import Emotion
+
+ANALYSIS_FAILED = '감정 분석에 실패했습니다.'
+
+
+def emotion_type_for(analysis: Dict) -> str:
+    return str(analysis['primary_emotion']).strip().lower()
+
+
+def build_record(user, text: str, situation: str, analysis: Dict) -> Emotion:
+    """Unsaved Emotion for a text or voice analysis result (``text`` is the transcript for voice)"""
+    return Emotion(
+        user=user,
+        emotion_type=emotion_type_for(analysis),
+        intensity=analysis['intensity'],
+        note=text,
+        ai_analysis={**analysis, 'situation': situation},
+        sentiment_score=analysis.get('sentiment_score'),
+        triggers=analysis.get('triggers', [])
+    )
+
+
+def analyze_texts(user, items: List[Dict]) -> List[Tuple[Optional[Emotion], Optional[str]]]:
+    """
+    Analyze validated BatchTextItemSerializer items concurrently
+    (EMOTION_BATCH_CONCURRENCY) and save the successful ones together.
+
+    Returns (record, error) per item, in input order.
+    """
+    analyzer = get_emotion_analyzer()
+    mode = analysis_mode_for(user)
+
+    def analyze(item):
+        try:
+            result = analyzer.analyze_text(item['text'], item.get('situation', ''), mode=mode)
+            if not result or result.get('error'):
+                return None, (result or {}).get('error', ANALYSIS_FAILED)
+            return build_record(user, item['text'], item.get('situation', ''), result), None
+        except Exception as e:
+            return None, str(e)
+
+    concurrency = max(1, min(getattr(settings, 'EMOTION_BATCH_CONCURRENCY', 5), len(items)))
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        outcomes = list(executor.map(analyze, items))
+
+    save_records(user, [record for record, _ in outcomes if record is not None])
+    return outcomes
+
+
+def save_records(user, records: List[Emotion]):
+    """Insert new records with one bulk_create, keeping the trigger index and rollups in step"""
+    if not records:
+        return
+    with transaction.atomic():
+        Emotion.objects.bulk_create(records)
+        triggers.index_records(records)
+        rollups.apply_records(
+            (user.pk, record.created_at, record.emotion_type, record.intensity, record.triggers)
+            for record in records
+        )
@@ -0,0 +1,290 @@
+"""
+Per-user daily emotion rollups
+
+Statistics and trend endpoints read one EmotionDailyRollup row per day
+instead of scanning raw records. Rows are updated from the Emotion
+signals, in the same transaction as the record write; bulk_create / queryset.update() / queryset.delete()
+bypass signals, so run `manage.py rebuild_emotion_rollups` after bulk
+writes.
+"""
+from datetime import datetime, time, timedelta
+from typing import Dict, Iterable, List, Optional
+
+from django.db import IntegrityError, transaction
+from django.db.models import Sum
+from django.db.models.functions import ExtractIsoWeekDay
+from django.utils import timezone
+
+from .models import Emotion, EmotionDailyRollup
+
+RECORD_FIELDS = ('user_id', 'created_at', 'emotion_type', 'intensity', 'triggers')
+WEEKDAY_NAMES = ['월', '화', '수', '목', '금', '토', '일']
+
+
+class Totals:
+    """Aggregate over any number of records or rollup rows"""
+
+    def __init__(self):
+        self.record_count = 0
+        self.intensity_sum = 0
+        self.intensity_sumsq = 0
+        self.emotion_counts = {}
+        self.hourly_counts = [0] * 24
+        self.trigger_counts = {}
+
+    def add_record(self, created_at, emotion_type, intensity, triggers, sign=1):
+        _apply_record(self, created_at, emotion_type, intensity, triggers, sign)
+
+    def add_rollup(self, rollup):
+        self.record_count += rollup.record_count
+        self.intensity_sum += rollup.intensity_sum
+        self.intensity_sumsq += rollup.intensity_sumsq
+        _merge_counts(self.emotion_counts, rollup.emotion_counts)
+        _merge_counts(self.trigger_counts, rollup.trigger_counts)
+        for hour, count in enumerate(rollup.hourly_counts or []):
+            self.hourly_counts[hour] += count
+
+    def as_dict(self) -> Dict:
+        return {
+            'record_count': self.record_count,
+            'intensity_sum': self.intensity_sum,
+            'intensity_sumsq': self.intensity_sumsq,
+            'emotion_counts': dict(self.emotion_counts),
+            'hourly_counts': list(self.hourly_counts),
+            'trigger_counts': dict(self.trigger_counts),
+        }
+
+
+def _apply_record(target, created_at, emotion_type, intensity, triggers, sign):
+    """Add (sign=1) or remove (sign=-1) one record's contribution"""
+    intensity = intensity or 0
+    target.record_count += sign
+    target.intensity_sum += sign * intensity
+    target.intensity_sumsq += sign * intensity * intensity
+
+    _bump(target.emotion_counts, emotion_type, sign)
+    if len(target.hourly_counts) != 24:
+        target.hourly_counts = [0] * 24
+    target.hourly_counts[timezone.localtime(created_at).hour] += sign
+    for trigger in triggers or []:
+        _bump(target.trigger_counts, str(trigger), sign)
+
+
+def _bump(counts: Dict, key, delta: int):
+    value = counts.get(key, 0) + delta
+    if value:
+        counts[key] = value
+    else:
+        counts.pop(key, None)
+
+
+def _merge_counts(target: Dict, source: Optional[Dict]):
+    for key, count in (source or {}).items():
+        target[key] = target.get(key, 0) + count
+
+
+def local_date(value):
+    return timezone.localtime(value).date()
+
+
+# Incremental maintenance
+
+def apply_record(user_id, created_at, emotion_type, intensity, triggers, sign=1):
+    """Apply one record to its day's rollup inside a transaction"""
+    day = local_date(created_at)
+    with transaction.atomic():
+        rollup = _locked_rollup(user_id, day)
+        _apply_record(rollup, created_at, emotion_type, intensity, triggers, sign)
+        if rollup.record_count > 0:
+            rollup.save()
+        else:
+            rollup.delete()
+
+
+def apply_records(records: Iterable[tuple]):
+    """
+    Add many new records (RECORD_FIELDS tuples) at once, e.g. after
+    bulk_create, touching each affected day's rollup once.
+    """
+    days = {}
+    for user_id, created_at, emotion_type, intensity, triggers in records:
+        key = (user_id, local_date(created_at))
+        totals = days.get(key)
+        if totals is None:
+            totals = days[key] = Totals()
+        totals.add_record(created_at, emotion_type, intensity, triggers)
+
+    with transaction.atomic():
+        # Fixed lock order so concurrent batches cannot deadlock
+        for (user_id, day), totals in sorted(days.items()):
+            rollup = _locked_rollup(user_id, day)
+            rollup.record_count += totals.record_count
+            rollup.intensity_sum += totals.intensity_sum
+            rollup.intensity_sumsq += totals.intensity_sumsq
+            _merge_counts(rollup.emotion_counts, totals.emotion_counts)
+            _merge_counts(rollup.trigger_counts, totals.trigger_counts)
+            if len(rollup.hourly_counts or []) != 24:
+                rollup.hourly_counts = [0] * 24
+            for hour, count in enumerate(totals.hourly_counts):
+                rollup.hourly_counts[hour] += count
+            rollup.save()
+
+
+def _locked_rollup(user_id, day) -> EmotionDailyRollup:
+    queryset = EmotionDailyRollup.objects.select_for_update()
+    rollup = queryset.filter(user_id=user_id, date=day).first()
+    if rollup is not None:
+        return rollup
+    try:
+        with transaction.atomic():
+            return EmotionDailyRollup.objects.create(
+                user_id=user_id, date=day, hourly_counts=[0] * 24
+            )
+    except IntegrityError:
+        # Another writer created the row first
+        return queryset.get(user_id=user_id, date=day)
+
+
+def rebuild(user_ids: Optional[Iterable[int]] = None, batch_size: int = 1000) -> int:
+    """Recompute rollups from raw records; returns the number of rows written"""
+    records = Emotion.objects.order_by()
+    rollups = EmotionDailyRollup.objects.all()
+    if user_ids is not None:
+        records = records.filter(user_id__in=user_ids)
+        rollups = rollups.filter(user_id__in=user_ids)
+
+    days = {}
+    for user_id, created_at, emotion_type, intensity, triggers in records.values_list(
+        *RECORD_FIELDS
+    ).iterator(chunk_size=batch_size):
+        key = (user_id, local_date(created_at))
+        totals = days.get(key)
+        if totals is None:
+            totals = days[key] = Totals()
+        totals.add_record(created_at, emotion_type, intensity, triggers)
+
+    with transaction.atomic():
+        rollups.delete()
+        EmotionDailyRollup.objects.bulk_create(
+            [
+                EmotionDailyRollup(user_id=user_id, date=day, **totals.as_dict())
+                for (user_id, day), totals in days.items()
+            ],
+            batch_size=batch_size,
+        )
+    return len(days)
+
+
+# Reads
+
+def window_totals(user, days: int, now=None) -> Totals:
+    """
+    Totals for records created in the last ``days`` days.
+
+    Whole days come from rollups; only the partial first day is read from
+    raw records, so the result matches a full scan exactly.
+    """
+    start = (now or timezone.now()) - timedelta(days=days)
+    first_day = local_date(start)
+
+    totals = Totals()
+    for rollup in EmotionDailyRollup.objects.filter(user=user, date__gt=first_day):
+        totals.add_rollup(rollup)
+
+    day_start = timezone.make_aware(datetime.combine(first_day + timedelta(days=1), time.min))
+    boundary = Emotion.objects.filter(
+        user=user, created_at__gte=start, created_at__lt=day_start
+    ).values_list(*RECORD_FIELDS[1:])
+    for created_at, emotion_type, intensity, triggers in boundary:
+        totals.add_record(created_at, emotion_type, intensity, triggers)
+    return totals
+
+
+def scan_window_totals(user, days: int, now=None) -> Totals:
+    """Reference implementation: the same totals from a full raw scan"""
+    start = (now or timezone.now()) - timedelta(days=days)
+    totals = Totals()
+    for created_at, emotion_type, intensity, triggers in Emotion.objects.filter(
+        user=user, created_at__gte=start
+    ).values_list(*RECORD_FIELDS[1:]):
+        totals.add_record(created_at, emotion_type, intensity, triggers)
+    return totals
+
+
+def statistics(totals: Totals, days: int, top_triggers: List[Dict] = ()) -> Dict:
+    """
+    Statistics endpoint payload from window totals. ``top_triggers`` comes
+    from triggers.top_triggers so triggers are grouped by normalized form
+    the same way as on the triggers endpoint.
+    """
+    count = totals.record_count
+    if count == 0:
+        return {
+            'total_records': 0,
+            'emotion_distribution': {},
+            'average_intensity': 0,
+            'most_common_emotion': None,
+            'daily_average': 0
+        }
+
+    mean = totals.intensity_sum / count
+    variance = max(totals.intensity_sumsq / count - mean ** 2, 0.0)
+    distribution = totals.emotion_counts
+
+    return {
+        'total_records': count,
+        'emotion_distribution': distribution,
+        'average_intensity': round(mean, 2),
+        'intensity_std': round(variance ** 0.5, 2),
+        'most_common_emotion': max(distribution.items(), key=lambda x: x[1])[0] if distribution else None,
+        'daily_average': round(count / max(days, 1), 2),
+        'hourly_distribution': {
+            f"{hour:02d}:00": hour_count for hour, hour_count in enumerate(totals.hourly_counts)
+        },
+        'top_triggers': [(row['trigger'], row['count']) for row in top_triggers],
+        'period_days': days
+    }
+
+
+def daily_trends(user, days: int, today=None) -> List[Dict]:
+    """Per-day summaries for the last ``days`` days, newest first"""
+    today = today or timezone.localdate()
+    rollups = EmotionDailyRollup.objects.filter(
+        user=user, date__gt=today - timedelta(days=days), date__lte=today
+    ).order_by('-date')
+
+    trends = []
+    for rollup in rollups:
+        if not rollup.record_count:
+            continue
+        emotion, emotion_count = max(
+            rollup.emotion_counts.items(), key=lambda x: x[1], default=(None, 0)
+        )
+        trends.append({
+            'date': rollup.date.isoformat(),
+            'record_count': rollup.record_count,
+            'average_intensity': rollup.intensity_sum / rollup.record_count,
+            'dominant_emotion': {'emotion_type': emotion, 'count': emotion_count},
+        })
+    return trends
+
+
+def weekly_pattern(user) -> List[Dict]:
+    """Average intensity and record count per weekday over all rollups"""
+    rows = EmotionDailyRollup.objects.filter(user=user).annotate(
+        weekday=ExtractIsoWeekDay('date')
+    ).values('weekday').annotate(
+        records=Sum('record_count'), intensity=Sum('intensity_sum')
+    ).order_by()
+    by_weekday = {row['weekday']: row for row in rows}
+
+    pattern = []
+    for index, day_name in enumerate(WEEKDAY_NAMES):
+        row = by_weekday.get(index + 1)
+        if row and row['records']:
+            pattern.append({
+                'day': day_name,
+                'average_intensity': row['intensity'] / row['records'],
+                'record_count': row['records']
+            })
+    return pattern
@@ -0,0 +1,190 @@
+"""
+Recurring emotion-sequence detection
+
+Counts consecutive emotion n-grams (length 2-5) over a user's whole
+history in one chronological pass. Only the last ``max(lengths)`` records
+are kept while scanning, so the work is linear in the number of records.
+
+Optional time constraints:
+    max_gap: consecutive records further apart than this break a sequence
+    window: an n-gram must fit inside this span from first to last record
+
+Per-user counter state is cached together with a (created_at, id)
+watermark; a later request only scans records created after it. Updates
+that change a record's emotion or time and deletes bump the user's
+generation (see emotions/signals.py) so the next request recounts.
+"""
+from collections import Counter, deque
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Q
+
+from .models import Emotion
+
+MIN_LENGTH = 2
+MAX_LENGTH = 5
+KEY_SEPARATOR = '>'
+STATE_VERSION = 1
+
+
+class SequenceCounter:
+    """Sliding-window n-gram counter; push records oldest first"""
+
+    def __init__(self, lengths: Iterable[int] = (3,), max_gap: Optional[timedelta] = None,
+                 window: Optional[timedelta] = None):
+        self.lengths = sorted(set(lengths))
+        if not self.lengths or self.lengths[0] < MIN_LENGTH or self.lengths[-1] > MAX_LENGTH:
+            raise ValueError(f'sequence lengths must be between {MIN_LENGTH} and {MAX_LENGTH}')
+        self.max_gap = max_gap.total_seconds() if max_gap else None
+        self.window = window.total_seconds() if window else None
+
+        self.counts = {n: Counter() for n in self.lengths}
+        self.tail = deque(maxlen=self.lengths[-1])
+        self.record_count = 0
+        self.watermark = None
+
+    def push(self, created_at, emotion_type: str, record_id: Optional[int] = None):
+        timestamp = created_at.timestamp()
+        if self.tail and self.max_gap is not None and timestamp - self.tail[-1][0] > self.max_gap:
+            self.tail.clear()
+        self.tail.append((timestamp, emotion_type))
+        self.record_count += 1
+        if record_id is not None:
+            self.watermark = (created_at, record_id)
+
+        size = len(self.tail)
+        for n in self.lengths:
+            if n > size:
+                break
+            start = size - n
+            if self.window is not None and timestamp - self.tail[start][0] > self.window:
+                continue
+            self.counts[n][tuple(self.tail[i][1] for i in range(start, size))] += 1
+
+    def extend(self, records: Iterable[Tuple]):
+        """Push (id, created_at, emotion_type) rows in chronological order"""
+        for record_id, created_at, emotion_type in records:
+            self.push(created_at, emotion_type, record_id)
+
+    def most_common(self, min_count: int = 2, limit: Optional[int] = None) -> List[Dict]:
+        """Recurring sequences, most frequent (then longest) first"""
+        patterns = [
+            {'sequence': list(sequence), 'length': n, 'frequency': count}
+            for n, counts in self.counts.items()
+            for sequence, count in counts.items()
+            if count >= min_count
+        ]
+        patterns.sort(key=lambda p: (-p['frequency'], -p['length'], p['sequence']))
+        return patterns[:limit] if limit is not None else patterns
+
+    # Cache serialization
+
+    def to_state(self) -> Dict:
+        return {
+            'version': STATE_VERSION,
+            'counts': {
+                str(n): {KEY_SEPARATOR.join(sequence): count for sequence, count in counts.items()}
+                for n, counts in self.counts.items()
+            },
+            'tail': [list(item) for item in self.tail],
+            'record_count': self.record_count,
+            'watermark': (
+                [self.watermark[0].isoformat(), self.watermark[1]] if self.watermark else None
+            ),
+        }
+
+    def load_state(self, state: Dict) -> bool:
+        """Restore counters from ``to_state``; False if the state does not fit"""
+        if state.get('version') != STATE_VERSION or set(state['counts']) != {
+            str(n) for n in self.lengths
+        }:
+            return False
+        self.counts = {
+            n: Counter({
+                tuple(key.split(KEY_SEPARATOR)): count
+                for key, count in state['counts'][str(n)].items()
+            })
+            for n in self.lengths
+        }
+        self.tail = deque((tuple(item) for item in state['tail']), maxlen=self.lengths[-1])
+        self.record_count = state['record_count']
+        watermark = state['watermark']
+        self.watermark = (
+            (datetime.fromisoformat(watermark[0]), watermark[1]) if watermark else None
+        )
+        return True
+
+
+def _records_after(user_id: int, watermark=None):
+    records = Emotion.objects.filter(user_id=user_id)
+    if watermark is not None:
+        created_at, record_id = watermark
+        records = records.filter(
+            Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=record_id)
+        )
+    return records.order_by('created_at', 'id').values_list(
+        'id', 'created_at', 'emotion_type'
+    ).iterator(chunk_size=2000)
+
+
+def _cache():
+    return caches[getattr(settings, 'EMOTION_SEQUENCE_CACHE', 'default')]
+
+
+def _generation_key(user_id: int) -> str:
+    return f"emotion-seq:{user_id}:generation"
+
+
+def _generation(user_id: int) -> int:
+    return _cache().get(_generation_key(user_id)) or 0
+
+
+def invalidate(user_id: int):
+    """Force the next request for this user to recount from scratch"""
+    cache = _cache()
+    key = _generation_key(user_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # No generation stored yet (or it expired)
+        cache.set(key, _generation(user_id) + 1, timeout=None)
+
+
+def user_counter(user, lengths: Iterable[int] = (3,), max_gap: Optional[timedelta] = None,
+                 window: Optional[timedelta] = None) -> SequenceCounter:
+    """
+    Counter over all of ``user``'s records, advanced incrementally.
+
+    Cached state is reused and only records after its watermark are read;
+    without cached state the whole history is scanned once.
+    """
+    user_id = getattr(user, 'pk', user)
+    counter = SequenceCounter(lengths, max_gap, window)
+    key = 'emotion-seq:{}:{}:{}:{}:{}'.format(
+        user_id, _generation(user_id), '-'.join(map(str, counter.lengths)),
+        # Exact values: sub-second or fractional settings must not share state
+        repr(counter.max_gap), repr(counter.window),
+    )
+
+    cache = _cache()
+    state = cache.get(key)
+    if state is None or not counter.load_state(state):
+        counter = SequenceCounter(lengths, max_gap, window)
+        state = None
+
+    previous_count = counter.record_count
+    counter.extend(_records_after(user_id, counter.watermark))
+    if state is None or counter.record_count != previous_count:
+        cache.set(key, counter.to_state(),
+                  timeout=getattr(settings, 'EMOTION_SEQUENCE_CACHE_TTL', 60 * 60 * 24 * 7))
+    return counter
+
+
+def recurring_patterns(user, lengths: Iterable[int] = (3,), max_gap: Optional[timedelta] = None,
+                       window: Optional[timedelta] = None, min_count: int = 2,
+                       limit: Optional[int] = 5) -> List[Dict]:
+    """Most frequent emotion sequences across the user's whole history"""
+    return user_counter(user, lengths, max_gap, window).most_common(min_count, limit)
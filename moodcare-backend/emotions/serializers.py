@@ -1,6 +1,10 @@
+from datetime import timedelta
+
 from rest_framework import serializers
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from .models import Emotion, EmotionImage, EmotionRecord
+from django.utils import timezone
+from .models import Emotion, EmotionImage, VoiceAnalysisJob
 
 User = get_user_model()
 
@@ -67,6 +71,55 @@ class EmotionAnalysisRequestSerializer(serializers.Serializer):
         return data
 
 
+class BatchTextItemSerializer(serializers.Serializer):
+    """Single entry of a batch text analysis request"""
+    text = serializers.CharField(max_length=5000)
+    situation = serializers.CharField(max_length=500, required=False, allow_blank=True, default='')
+
+
+class BatchTextAnalysisSerializer(serializers.Serializer):
+    """Serializer for batch text analysis requests"""
+    items = serializers.ListField(
+        child=BatchTextItemSerializer(),
+        min_length=1,
+        max_length=getattr(settings, 'EMOTION_BATCH_MAX_ITEMS', 20)
+    )
+
+
+class EmotionIngestItemSerializer(serializers.ModelSerializer):
+    """One offline emotion entry, identified by a client-generated UUID"""
+    client_id = serializers.UUIDField()
+    created_at = serializers.DateTimeField(required=False)
+    
+    class Meta:
+        model = Emotion
+        fields = (
+            'client_id', 'emotion_type', 'intensity', 'note', 'location',
+            'activity', 'people', 'weather', 'physical_state', 'triggers',
+            'created_at'
+        )
+    
+    def validate_intensity(self, value):
+        if not 1 <= value <= 10:
+            raise serializers.ValidationError('intensity must be between 1 and 10')
+        return value
+    
+    def validate_created_at(self, value):
+        # Device clocks drift; only reject entries clearly from the future
+        if value > timezone.now() + timedelta(minutes=5):
+            raise serializers.ValidationError('created_at is in the future')
+        return value
+
+
+class EmotionIngestSerializer(serializers.Serializer):
+    """Ordered batch of offline emotion entries"""
+    entries = serializers.ListField(
+        child=EmotionIngestItemSerializer(),
+        min_length=1,
+        max_length=getattr(settings, 'EMOTION_INGEST_MAX_ITEMS', 500)
+    )
+
+
 class EmotionStatisticsSerializer(serializers.Serializer):
     """Serializer for emotion statistics"""
     emotion_distribution = serializers.DictField()
@@ -107,4 +160,16 @@ class VoiceAnalysisResponseSerializer(serializers.Serializer):
     sentiment_score = serializers.FloatField()
     voice_features = serializers.DictField()
     analysis_result = serializers.DictField()
-    suggestions = serializers.ListField(child=serializers.CharField())
\ No newline at end of file
+    suggestions = serializers.ListField(child=serializers.CharField())
+
+
+class VoiceAnalysisJobSerializer(serializers.ModelSerializer):
+    """Status and result of a queued voice analysis"""
+    
+    job_id = serializers.UUIDField(source='id', read_only=True)
+    record = serializers.JSONField(source='result', read_only=True)
+    
+    class Meta:
+        model = VoiceAnalysisJob
+        fields = ('job_id', 'status', 'record', 'error', 'created_at', 'completed_at')
+        read_only_fields = fields
@@ -0,0 +1,48 @@
+"""
+Keep EmotionDailyRollup, the trigger index and the cached sequence
+counters in step with Emotion writes
+"""
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import rollups, sequences, triggers
+from .models import Emotion
+
+
+@receiver(pre_save, sender=Emotion)
+def remember_previous_emotion(sender, instance, raw=False, **kwargs):
+    """Snapshot the stored values so an update can move its contribution"""
+    instance._rollup_previous = None
+    if raw or instance.pk is None:
+        return
+    instance._rollup_previous = Emotion.objects.filter(pk=instance.pk).values_list(
+        *rollups.RECORD_FIELDS
+    ).first()
+
+
+@receiver(post_save, sender=Emotion)
+def update_rollup_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, '_rollup_previous', None)
+    if previous is not None:
+        rollups.apply_record(*previous, sign=-1)
+        # New records are picked up after the sequence watermark; edits are not
+        if previous[1] != instance.created_at or previous[2] != instance.emotion_type:
+            sequences.invalidate(instance.user_id)
+    rollups.apply_record(
+        instance.user_id, instance.created_at, instance.emotion_type,
+        instance.intensity, instance.triggers
+    )
+    if previous is None or previous[1] != instance.created_at or previous[4] != instance.triggers:
+        triggers.index_records([instance], replace=previous is not None)
+    instance._rollup_previous = None
+
+
+@receiver(post_delete, sender=Emotion)
+def update_rollup_on_delete(sender, instance, **kwargs):
+    rollups.apply_record(
+        instance.user_id, instance.created_at, instance.emotion_type,
+        instance.intensity, instance.triggers, sign=-1
+    )
+    sequences.invalidate(instance.user_id)
@@ -0,0 +1,164 @@
+"""
+Background jobs for emotion analysis
+"""
+import logging
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from asgiref.sync import async_to_sync
+from celery import shared_task
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.utils import timezone
+
+from ai_analysis.clients import registry
+from .models import Emotion, VoiceAnalysisJob
+
+logger = logging.getLogger(__name__)
+
+
+def get_feature_pool() -> ProcessPoolExecutor:
+    """Per-worker process pool for CPU-bound voice feature extraction"""
+    return registry.get('voice-feature-pool', lambda: ProcessPoolExecutor(
+        max_workers=getattr(settings, 'VOICE_FEATURE_PROCESSES', 2)
+    ))
+
+
+@shared_task(
+    acks_late=True,
+    soft_time_limit=getattr(settings, 'VOICE_JOB_TIME_LIMIT', 300),
+)
+def analyze_voice_job(job_id: str):
+    """
+    Transcribe, analyze and save a queued voice note.
+
+    Feature extraction runs in the process pool while transcription and
+    the GPT call wait on the network in this worker thread. The voice
+    worker runs a threads pool, where soft_time_limit is not enforced, so
+    every blocking step has its own deadline (VOICE_*_TIMEOUT).
+    """
+    from .audio import decode_audio
+    from .ai_analyzer import analysis_mode_for, get_emotion_analyzer
+    from .voice_features import extract_voice_features
+
+    updated = VoiceAnalysisJob.objects.filter(
+        pk=job_id, status=VoiceAnalysisJob.STATUS_PENDING
+    ).update(status=VoiceAnalysisJob.STATUS_PROCESSING, updated_at=timezone.now())
+    if not updated:
+        # Unknown job, or already picked up by a redelivered message
+        return
+
+    job = VoiceAnalysisJob.objects.select_related('user').get(pk=job_id)
+    try:
+        audio = decode_audio(bytes(job.audio))
+        features = get_feature_pool().submit(
+            extract_voice_features, audio.pcm, audio.sample_rate
+        )
+
+        analyzer = get_emotion_analyzer()
+        text = analyzer._transcribe_audio(audio, job.language)
+        if not text:
+            raise ValueError('음성을 인식할 수 없습니다.')
+
+        text_analysis = analyzer.analyze_text(
+            text, job.situation, mode=analysis_mode_for(job.user)
+        )
+        try:
+            voice_features = features.result(timeout=getattr(settings, 'VOICE_FEATURE_TIMEOUT', 60))
+        except TimeoutError:
+            features.cancel()
+            raise TimeoutError('음성 특징 추출 시간이 초과되었습니다.')
+        except BrokenProcessPool:
+            # A pool process died (e.g. OOM); rebuild the pool for the next job
+            registry.discard('voice-feature-pool')
+            voice_features = extract_voice_features(audio.pcm, audio.sample_rate)
+        analysis_result = analyzer._combine_voice_analysis(
+            text_analysis, text, voice_features, job.language
+        )
+        job.result = _save_voice_record(job, text, analysis_result)
+        job.status = VoiceAnalysisJob.STATUS_COMPLETED
+    except Exception as e:
+        logger.exception(f"Voice analysis job {job_id} failed")
+        job.error = str(e)
+        job.status = VoiceAnalysisJob.STATUS_FAILED
+
+    job.audio = None
+    job.completed_at = timezone.now()
+    job.save(update_fields=['status', 'result', 'error', 'audio', 'completed_at', 'updated_at'])
+    _notify_user(job)
+
+
+@shared_task(acks_late=True)
+def analyze_emotion_batch(emotion_ids):
+    """
+    AI analysis of the notes of a batch of ingested entries.
+
+    Notes are analyzed concurrently (EMOTION_BATCH_CONCURRENCY) and saved
+    with one bulk_update. The user's chosen emotion_type and intensity
+    are left alone; only ai_analysis and sentiment_score are filled in.
+    """
+    from .ai_analyzer import analysis_mode_for, get_emotion_analyzer
+
+    records = list(
+        Emotion.objects.select_related('user').filter(pk__in=emotion_ids, ai_analysis={})
+        .exclude(note='')
+    )
+    if not records:
+        return
+
+    analyzer = get_emotion_analyzer()
+    mode = analysis_mode_for(records[0].user)
+
+    def analyze(record):
+        try:
+            return analyzer.analyze_text(record.note, mode=mode)
+        except Exception as e:
+            logger.warning(f"Batch analysis of emotion {record.pk} failed: {e}")
+            return None
+
+    concurrency = max(1, min(getattr(settings, 'EMOTION_BATCH_CONCURRENCY', 5), len(records)))
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        analyses = list(executor.map(analyze, records))
+
+    now = timezone.now()
+    analyzed = []
+    for record, analysis in zip(records, analyses):
+        if not analysis or analysis.get('error'):
+            continue
+        record.ai_analysis = analysis
+        record.sentiment_score = analysis.get('sentiment_score')
+        # bulk_update skips auto_now; delta sync needs the bump
+        record.updated_at = now
+        analyzed.append(record)
+    Emotion.objects.bulk_update(analyzed, ['ai_analysis', 'sentiment_score', 'updated_at'])
+
+
+def _save_voice_record(job: VoiceAnalysisJob, text: str, analysis_result: dict) -> dict:
+    from .records import build_record
+    from .serializers import EmotionSerializer
+
+    emotion_record = build_record(job.user, text, job.situation, analysis_result)
+    emotion_record.save()
+
+    response_data = EmotionSerializer(emotion_record).data
+    response_data['transcribed_text'] = text
+    response_data['voice_features'] = analysis_result.get('voice_features', {})
+    return response_data
+
+
+def _notify_user(job: VoiceAnalysisJob):
+    """Push the outcome to the user's WebSocket group (best effort)"""
+    try:
+        async_to_sync(get_channel_layer().group_send)(
+            f"user_{job.user_id}",
+            {
+                'type': 'voice_analysis_completed',
+                'job_id': str(job.id),
+                'status': job.status,
+                'record': job.result,
+                'error': job.error,
+                'timestamp': job.completed_at.isoformat(),
+            }
+        )
+    except Exception as e:
+        logger.warning(f"Could not push voice job {job.id} to user_{job.user_id}: {e}")
@@ -1,3 +1,288 @@
+import io
+import wave
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
 from django.test import TestCase
+from django.utils import timezone
+
+from ai_analysis.clients import registry
+
+from . import records, rollups, triggers
+from .ai_analyzer import EmotionAnalyzer
+from .models import Emotion, EmotionDailyRollup, VoiceAnalysisJob
+from .tasks import analyze_voice_job, get_feature_pool
+
+User = get_user_model()
+
+
+class EmotionRollupTests(TestCase):
+    """Rollup-backed window totals must match a raw scan of the records"""
+
+    WINDOWS = (1, 7, 30)
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='rollup', email='rollup@example.com', password='rollup-pass-123'
+        )
+        self.other = User.objects.create_user(
+            username='other', email='other@example.com', password='other-pass-123'
+        )
+        self.now = timezone.now()
+
+    def record(self, hours_ago, emotion_type='joy', intensity=5, triggers=None, user=None):
+        return Emotion.objects.create(
+            user=user or self.user,
+            emotion_type=emotion_type,
+            intensity=intensity,
+            triggers=triggers or [],
+            created_at=self.now - timedelta(hours=hours_ago)
+        )
+
+    def assertMatchesScan(self, user=None):
+        user = user or self.user
+        for days in self.WINDOWS:
+            with self.subTest(days=days):
+                self.assertEqual(
+                    rollups.window_totals(user, days, self.now).as_dict(),
+                    rollups.scan_window_totals(user, days, self.now).as_dict()
+                )
+
+    def create_history(self):
+        # Spread over several days, including the partial first day of each window
+        emotions = ['joy', 'sadness', 'anger', 'fear']
+        records = []
+        for index, hours_ago in enumerate([1, 5, 23, 25, 47, 70, 100, 167, 169, 200, 400, 719, 721]):
+            records.append(self.record(
+                hours_ago,
+                emotion_type=emotions[index % len(emotions)],
+                intensity=index % 10 + 1,
+                triggers=['work', 'sleep'][:index % 3]
+            ))
+        self.record(2, emotion_type='trust', intensity=9, user=self.other)
+        return records
+
+    def test_create_matches_scan(self):
+        self.create_history()
+        self.assertMatchesScan()
+        self.assertMatchesScan(self.other)
+
+    def test_update_matches_scan(self):
+        records = self.create_history()
+
+        records[0].intensity = 10
+        records[0].triggers = ['family']
+        records[0].save()
+        # Moved to another day and another emotion
+        records[3].created_at = self.now - timedelta(hours=150)
+        records[3].emotion_type = 'surprise'
+        records[3].save()
+
+        self.assertMatchesScan()
+
+    def test_delete_matches_scan(self):
+        records = self.create_history()
+
+        records[1].delete()
+        records[6].delete()
+        # Last record of its day: the rollup row goes away too
+        only = self.record(300, emotion_type='disgust')
+        only.delete()
+
+        self.assertMatchesScan()
+        self.assertFalse(EmotionDailyRollup.objects.filter(
+            user=self.user, date=rollups.local_date(only.created_at)
+        ).exists())
+
+    def test_bulk_create_matches_scan(self):
+        self.create_history()
+
+        records = [
+            Emotion(
+                user=self.user,
+                emotion_type='anticipation',
+                intensity=hours_ago % 10 + 1,
+                triggers=['travel'],
+                created_at=self.now - timedelta(hours=hours_ago)
+            )
+            for hours_ago in (3, 3, 26, 168, 170, 500)
+        ]
+        Emotion.objects.bulk_create(records)
+        # bulk_create skips signals; ingest applies the batch like this
+        rollups.apply_records(
+            (record.user_id, record.created_at, record.emotion_type, record.intensity, record.triggers)
+            for record in records
+        )
+
+        self.assertMatchesScan()
+
+    def test_failed_rollup_update_rolls_back_save(self):
+        record = self.record(1, intensity=3)
+
+        with mock.patch.object(rollups, 'apply_record', side_effect=RuntimeError('rollup down')):
+            with self.assertRaises(RuntimeError):
+                self.record(2, emotion_type='anger')
+            record.intensity = 9
+            with self.assertRaises(RuntimeError):
+                record.save()
+
+        self.assertEqual(list(Emotion.objects.values_list('emotion_type', 'intensity')), [('joy', 3)])
+        self.assertMatchesScan()
+
+    def test_rebuild_matches_incremental(self):
+        records = self.create_history()
+        records[2].delete()
+        records[4].intensity = 1
+        records[4].save()
+
+        incremental = {
+            days: rollups.window_totals(self.user, days, self.now).as_dict() for days in self.WINDOWS
+        }
+        rows = set(EmotionDailyRollup.objects.values_list('user_id', 'date', 'record_count'))
+
+        EmotionDailyRollup.objects.all().delete()
+        rollups.rebuild()
+
+        self.assertEqual(
+            set(EmotionDailyRollup.objects.values_list('user_id', 'date', 'record_count')), rows
+        )
+        for days in self.WINDOWS:
+            with self.subTest(days=days):
+                self.assertEqual(
+                    rollups.window_totals(self.user, days, self.now).as_dict(), incremental[days]
+                )
+        self.assertMatchesScan()
+
+
+class EmotionTriggerTests(TestCase):
+    """Statistics and the triggers endpoint group triggers the same way"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='triggers', email='triggers@example.com', password='triggers-pass-123'
+        )
+        self.now = timezone.now()
+        for hours_ago, tags in [(1, ['Work']), (2, ['work!', 'Sleep']), (3, [' WORK ']),
+                                (4, ['sleep']), (5, ['family']), (24 * 40, ['family'])]:
+            Emotion.objects.create(
+                user=self.user, emotion_type='joy', intensity=5, triggers=tags,
+                created_at=self.now - timedelta(hours=hours_ago)
+            )
+
+    def test_statistics_use_normalized_counts(self):
+        since = self.now - timedelta(days=30)
+        top = triggers.top_triggers(self.user, since, 5)
+        stats = rollups.statistics(rollups.window_totals(self.user, 30, self.now), 30, top)
+
+        self.assertEqual(
+            [(row['normalized'], row['count']) for row in top],
+            [('work', 3), ('sleep', 2), ('family', 1)]
+        )
+        self.assertEqual([count for _, count in stats['top_triggers']], [3, 2, 1])
+
+    def test_filter_by_trigger(self):
+        records = triggers.filter_by_trigger(Emotion.objects.filter(user=self.user), 'WORK')
+        self.assertEqual(records.count(), 3)
+        with self.assertRaises(TypeError):
+            triggers.filter_by_trigger(User.objects.all(), 'work')
+
+
+class StubAnalyzer:
+    """Analyzer double: the emotion is the first word of the text"""
+
+    _combine_voice_analysis = EmotionAnalyzer._combine_voice_analysis
+
+    def _transcribe_audio(self, audio, language='ko-KR'):
+        return 'sadness after the call'
+
+    def analyze_text(self, text, context=None, mode=None):
+        word = text.split()[0]
+        if word == 'fail':
+            return {'error': 'upstream down', 'primary_emotion': 'neutral', 'intensity': 5}
+        if word == 'raise':
+            raise RuntimeError('boom')
+        return {
+            'primary_emotion': word.capitalize(), 'intensity': 7,
+            'sentiment_score': 0.5, 'triggers': ['Work'], 'context': context
+        }
+
+
+class BatchTextAnalysisTests(TestCase):
+    """Batch text analysis stores Emotion rows and keeps rollups and triggers in step"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='batch', email='batch@example.com', password='batch-pass-123'
+        )
+
+    def test_analyze_texts(self):
+        items = [
+            {'text': 'joy at last', 'situation': 'home'},
+            {'text': 'fail please'},
+            {'text': 'sadness again', 'situation': ''},
+            {'text': 'raise now'},
+        ]
+        with mock.patch.object(records, 'get_emotion_analyzer', return_value=StubAnalyzer()):
+            outcomes = records.analyze_texts(self.user, items)
+
+        self.assertEqual([error for _, error in outcomes], [None, 'upstream down', None, 'boom'])
+        saved = Emotion.objects.filter(user=self.user).order_by('emotion_type')
+        self.assertEqual(
+            [(record.emotion_type, record.intensity, record.note) for record in saved],
+            [('joy', 7, 'joy at last'), ('sadness', 7, 'sadness again')]
+        )
+        self.assertEqual(saved[0].ai_analysis['situation'], 'home')
+        self.assertEqual({record.pk for record, _ in outcomes if record}, {record.pk for record in saved})
+
+        # bulk_create skips signals; the batch path applies rollups and the trigger index itself
+        now = timezone.now()
+        self.assertEqual(
+            rollups.window_totals(self.user, 1, now).as_dict(),
+            rollups.scan_window_totals(self.user, 1, now).as_dict()
+        )
+        top = triggers.top_triggers(self.user, now - timedelta(days=1), 5)
+        self.assertEqual([(row['normalized'], row['count']) for row in top], [('work', 2)])
+
+
+class VoiceAnalysisJobTests(TestCase):
+    """A queued voice note ends up as an Emotion row and a completed job"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='voice', email='voice@example.com', password='voice-pass-123'
+        )
+
+    def silence(self, seconds=1):
+        buffer = io.BytesIO()
+        with wave.open(buffer, 'wb') as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(16000)
+            wav.writeframes(b'\x00\x00' * 16000 * seconds)
+        return buffer.getvalue()
+
+    def test_analyze_voice_job(self):
+        job = VoiceAnalysisJob.objects.create(user=self.user, situation='office', audio=self.silence())
+
+        with mock.patch('emotions.ai_analyzer.get_emotion_analyzer', return_value=StubAnalyzer()), \
+                mock.patch('emotions.tasks._notify_user') as notify:
+            analyze_voice_job(str(job.pk))
+        get_feature_pool().shutdown()
+        registry.discard('voice-feature-pool')
 
-# Create your tests here.
+        job.refresh_from_db()
+        self.assertEqual(job.status, VoiceAnalysisJob.STATUS_COMPLETED, job.error)
+        self.assertIsNone(job.audio)
+        record = Emotion.objects.get(user=self.user)
+        self.assertEqual((record.emotion_type, record.note), ('sadness', 'sadness after the call'))
+        self.assertEqual(record.ai_analysis['source'], 'voice')
+        self.assertEqual(record.ai_analysis['situation'], 'office')
+        self.assertEqual(job.result['id'], record.pk)
+        self.assertEqual(job.result['transcribed_text'], 'sadness after the call')
+        notify.assert_called_once()
+        # Saved through the model, so the post_save signal kept the rollup in step
+        self.assertEqual(
+            rollups.window_totals(self.user, 1, timezone.now()).as_dict(),
+            rollups.scan_window_totals(self.user, 1, timezone.now()).as_dict()
+        )
@@ -0,0 +1,186 @@
+"""
+Downsampled emotion time series for charts
+
+Intensity and sentiment are read as plain (created_at, value) tuples and
+reduced with NumPy to at most ``points`` points, whatever the length of
+the history. Two reducers are available:
+
+* ``lttb`` (Largest-Triangle-Three-Buckets) keeps the points that best
+  preserve the visual shape of the line.
+* ``minmax`` splits the range into equal time buckets and keeps each
+  bucket's lowest and highest point, so spikes are never dropped.
+
+An optional EWMA is applied to the raw values before reducing. The
+module imports NumPy at load time; import it lazily from request code.
+"""
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+from django.conf import settings
+
+from .models import Emotion
+
+METRICS = ('intensity', 'sentiment_score')
+METHODS = ('lttb', 'minmax')
+DEFAULT_POINTS = 200
+
+# decay ** -k must stay finite inside one EWMA block
+_EWMA_MAX_EXPONENT = 50.0
+
+
+def max_points() -> int:
+    return getattr(settings, 'EMOTION_TIMESERIES_MAX_POINTS', 500)
+
+
+def fetch(user, metrics: Iterable[str], start: Optional[datetime] = None,
+          end: Optional[datetime] = None) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """
+    Epoch seconds and one float array per metric, oldest first.
+
+    Missing values (sentiment is filled in by analysis) are NaN.
+    """
+    metrics = list(metrics)
+    queryset = Emotion.objects.filter(user=user)
+    if start is not None:
+        queryset = queryset.filter(created_at__gte=start)
+    if end is not None:
+        queryset = queryset.filter(created_at__lt=end)
+    rows = list(queryset.order_by('created_at', 'id').values_list('created_at', *metrics))
+
+    timestamps = np.fromiter((row[0].timestamp() for row in rows), dtype=float, count=len(rows))
+    columns = {
+        metric: np.array([row[i] for row in rows], dtype=float)
+        for i, metric in enumerate(metrics, start=1)
+    }
+    return timestamps, columns
+
+
+def ewma(values: np.ndarray, span: float) -> np.ndarray:
+    """
+    Exponentially weighted moving average, alpha = 2 / (span + 1).
+
+    Vectorized per block with the closed form
+    s_i = decay^(i+1) * s_prev + alpha * sum_j decay^(i-j) * x_j;
+    blocks are sized so the decay powers stay finite.
+    """
+    values = np.asarray(values, dtype=float)
+    smoothed = np.empty_like(values)
+    if not len(values):
+        return smoothed
+
+    alpha = 2.0 / (max(span, 1.0) + 1.0)
+    decay = 1.0 - alpha
+    if decay == 0.0:
+        smoothed[:] = values
+        return smoothed
+
+    block = max(1, int(_EWMA_MAX_EXPONENT / -np.log(decay)))
+    level = values[0]
+    for start in range(0, len(values), block):
+        chunk = values[start:start + block]
+        powers = decay ** np.arange(len(chunk))
+        weighted = np.cumsum(chunk / powers) * powers * alpha
+        smoothed[start:start + len(chunk)] = weighted + level * decay * powers
+        level = smoothed[start + len(chunk) - 1]
+    return smoothed
+
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """Indices of the ``threshold`` points chosen by Largest-Triangle-Three-Buckets"""
+    n = len(x)
+    if threshold >= n:
+        return np.arange(n)
+    if threshold < 3:
+        raise ValueError('LTTB needs at least 3 points')
+
+    # First and last points are kept; the rest is split into threshold - 2 buckets
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    starts, ends = edges[:-1], edges[1:]
+    counts = ends - starts
+    bucket_x = np.add.reduceat(x[1:n - 1], starts - 1) / counts
+    bucket_y = np.add.reduceat(y[1:n - 1], starts - 1) / counts
+    # The point after the last bucket is the final point itself
+    next_x = np.append(bucket_x[1:], x[-1])
+    next_y = np.append(bucket_y[1:], y[-1])
+
+    selected = np.empty(threshold, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for i, (start, end) in enumerate(zip(starts, ends)):
+        ax, ay = x[previous], y[previous]
+        areas = np.abs(
+            (ax - next_x[i]) * (y[start:end] - ay) - (ax - x[start:end]) * (next_y[i] - ay)
+        )
+        previous = start + int(np.argmax(areas))
+        selected[i + 1] = previous
+    return selected
+
+
+def minmax(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """Indices of each equal-time bucket's min and max point, in time order"""
+    n = len(x)
+    if threshold >= n:
+        return np.arange(n)
+    buckets = max(threshold // 2, 1)
+    span = x[-1] - x[0]
+    if span <= 0:
+        bucket = np.zeros(n, dtype=int)
+    else:
+        bucket = np.minimum(((x - x[0]) / span * buckets).astype(int), buckets - 1)
+
+    # x is sorted, so each bucket is a contiguous run starting at ``starts``
+    starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+    counts = np.diff(np.r_[starts, n])
+    picked = []
+    for reduce in (np.minimum, np.maximum):
+        extreme = np.repeat(reduce.reduceat(y, starts), counts)
+        hits = np.flatnonzero(y == extreme)
+        # First hit of each bucket
+        picked.append(hits[np.r_[True, bucket[hits][1:] != bucket[hits][:-1]]])
+    return np.unique(np.concatenate(picked))
+
+
+REDUCERS = {'lttb': lttb, 'minmax': minmax}
+
+
+def downsample(x: np.ndarray, y: np.ndarray, points: int, method: str = 'lttb',
+               span: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Drop missing values, optionally smooth, then reduce to at most ``points``"""
+    present = ~np.isnan(y)
+    x, y = x[present], y[present]
+    if span:
+        y = ewma(y, span)
+    indices = REDUCERS[method](x, y, points)
+    return x[indices], y[indices]
+
+
+def build_series(user, metrics: Iterable[str] = ('intensity',), start: Optional[datetime] = None,
+                 end: Optional[datetime] = None, points: int = DEFAULT_POINTS,
+                 method: str = 'lttb', span: Optional[float] = None) -> Dict:
+    """
+    Chart payload: per metric a list of [epoch milliseconds, value] pairs.
+
+    ``points`` is clamped to EMOTION_TIMESERIES_MAX_POINTS.
+    """
+    metrics = list(metrics)
+    points = max(3, min(int(points), max_points()))
+    timestamps, columns = fetch(user, metrics, start, end)
+
+    series = {}
+    for metric in metrics:
+        x, y = downsample(timestamps, columns[metric], points, method, span)
+        series[metric] = {
+            'raw_points': int(np.count_nonzero(~np.isnan(columns[metric]))),
+            'points': [
+                [int(t), round(float(v), 3)]
+                for t, v in zip(np.round(x * 1000), y)
+            ],
+        }
+    return {
+        'method': method,
+        'ewma_span': span,
+        'start': start,
+        'end': end,
+        'series': series,
+    }
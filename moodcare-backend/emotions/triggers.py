@@ -0,0 +1,116 @@
+"""
+Indexed emotion triggers
+
+Emotion.triggers stays the source of truth (a JSON list). Every entry is
+mirrored into an EmotionTrigger row with a normalized key. Top-N,
+filtering and co-occurrence then run as single indexed aggregate
+queries, and their cost grows with distinct triggers rather than with
+records. The side table was chosen over a GIN-indexed JSONB column so
+SQLite and PostgreSQL behave the same. Bulk writes that bypass signals
+should run `manage.py rebuild_emotion_triggers`.
+"""
+import re
+import unicodedata
+from typing import Dict, Iterable, List, Optional
+
+from django.db import transaction
+from django.db.models import Count, Max
+
+from .models import Emotion, EmotionTrigger
+
+MAX_LENGTH = EmotionTrigger._meta.get_field('normalized').max_length
+_EDGE_PUNCTUATION = re.compile(r'^[\W_]+|[\W_]+$')
+
+
+def normalize(trigger) -> str:
+    """Grouping key: NFC, case-folded, single spaces, no edge punctuation"""
+    text = unicodedata.normalize('NFC', str(trigger or ''))
+    text = ' '.join(text.casefold().split())
+    return _EDGE_PUNCTUATION.sub('', text)[:MAX_LENGTH]
+
+
+def _rows(emotion_id: int, user_id: int, created_at, triggers) -> List[EmotionTrigger]:
+    rows = {}
+    for trigger in triggers or []:
+        key = normalize(trigger)
+        if key and key not in rows:
+            rows[key] = EmotionTrigger(
+                emotion_id=emotion_id, user_id=user_id, created_at=created_at,
+                trigger=str(trigger).strip()[:MAX_LENGTH], normalized=key,
+            )
+    return list(rows.values())
+
+
+def index_records(records: Iterable[Emotion], replace: bool = False):
+    """Write trigger rows for saved records; ``replace`` drops existing rows first"""
+    records = list(records)
+    rows = [
+        row for record in records
+        for row in _rows(record.pk, record.user_id, record.created_at, record.triggers)
+    ]
+    with transaction.atomic():
+        if replace:
+            EmotionTrigger.objects.filter(emotion_id__in=[r.pk for r in records]).delete()
+        EmotionTrigger.objects.bulk_create(rows, batch_size=1000)
+
+
+def rebuild(user_ids: Optional[Iterable[int]] = None, batch_size: int = 1000) -> int:
+    """Recreate the index from Emotion.triggers; returns the number of rows"""
+    records = Emotion.objects.exclude(triggers=[]).order_by()
+    index = EmotionTrigger.objects.all()
+    if user_ids is not None:
+        records = records.filter(user_id__in=user_ids)
+        index = index.filter(user_id__in=user_ids)
+
+    written = 0
+    with transaction.atomic():
+        index.delete()
+        batch = []
+        for values in records.values_list(
+            'id', 'user_id', 'created_at', 'triggers'
+        ).iterator(chunk_size=batch_size):
+            batch.extend(_rows(*values))
+            if len(batch) >= batch_size:
+                EmotionTrigger.objects.bulk_create(batch)
+                written += len(batch)
+                batch = []
+        EmotionTrigger.objects.bulk_create(batch)
+        written += len(batch)
+    return written
+
+
+# Queries
+
+def top_triggers(user, since=None, limit: int = 10) -> List[Dict]:
+    """Most frequent triggers (optionally since a datetime), one grouped query"""
+    rows = EmotionTrigger.objects.filter(user=user)
+    if since is not None:
+        rows = rows.filter(created_at__gte=since)
+    return [
+        {'trigger': row['label'], 'normalized': row['normalized'], 'count': row['count']}
+        for row in rows.values('normalized').annotate(
+            count=Count('id'), label=Max('trigger')
+        ).order_by('-count', 'normalized')[:limit]
+    ]
+
+
+def filter_by_trigger(queryset, trigger: str):
+    """Emotion records in ``queryset`` tagged with ``trigger`` (matched on its normalized form)"""
+    if queryset.model is not Emotion:
+        raise TypeError(f"Triggers are indexed for Emotion, not {queryset.model.__name__}")
+    return queryset.filter(trigger_index__normalized=normalize(trigger))
+
+
+def co_occurring(user, trigger: str, since=None, limit: int = 10) -> List[Dict]:
+    """Triggers recorded together with ``trigger``, as one query with a subquery"""
+    key = normalize(trigger)
+    tagged = EmotionTrigger.objects.filter(user=user, normalized=key).values('emotion_id')
+    rows = EmotionTrigger.objects.filter(user=user, emotion_id__in=tagged).exclude(normalized=key)
+    if since is not None:
+        rows = rows.filter(created_at__gte=since)
+    return [
+        {'trigger': row['label'], 'normalized': row['normalized'], 'count': row['count']}
+        for row in rows.values('normalized').annotate(
+            count=Count('id'), label=Max('trigger')
+        ).order_by('-count', 'normalized')[:limit]
+    ]
@@ -4,7 +4,9 @@ from .views import (
     EmotionListCreateView, 
     EmotionDetailView, 
     EmotionStatsView,
-    EmotionViewSet
+    EmotionViewSet,
+    async_analyze_text,
+    async_analyze_voice
 )
 
 # Create router for ViewSet
@@ -22,6 +24,10 @@ urlpatterns = [
     path('detail/<int:pk>/', EmotionDetailView.as_view(), name='emotion-detail'),
     path('stats/', EmotionStatsView.as_view(), name='emotion-stats'),
     
+    # Native async analysis endpoints (served without a threadpool under ASGI)
+    path('async/analyze/text/', async_analyze_text, name='emotion-async-analyze-text'),
+    path('async/analyze/voice/', async_analyze_voice, name='emotion-async-analyze-voice'),
+    
     # Custom emotion analysis endpoints (handled by ViewSet)
     # /records/analyze/text/
     # /records/analyze/voice/
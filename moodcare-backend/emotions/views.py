@@ -1,26 +1,44 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 from django_filters.rest_framework import DjangoFilterBackend
+from django.http import JsonResponse
+from django.db import transaction
 from django.db.models import Avg, Count, Q, F
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
 from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 from datetime import datetime, timedelta
 import json
-import speech_recognition as sr
-from io import BytesIO
+from asgiref.sync import sync_to_async
 
-from .models import EmotionRecord
+from .models import Emotion, EmotionRecord, VoiceAnalysisJob
 from .serializers import (
     EmotionRecordSerializer,
+    EmotionSerializer,
     TextAnalysisSerializer,
+    BatchTextAnalysisSerializer,
+    EmotionIngestSerializer,
     VoiceAnalysisSerializer,
+    VoiceAnalysisJobSerializer,
     EmotionStatisticsSerializer,
     EmotionTrendSerializer,
     EmotionInsightSerializer
 )
-from .ai_analyzer import EmotionAnalyzer
+from .ai_analyzer import (
+    get_emotion_analyzer, get_async_emotion_analyzer, analysis_cache, analysis_mode_for,
+    analysis_flights, insight_flights
+)
+from . import export, records, rollups, sequences, triggers
+from .ingest import ingest_entries
+from .insights import current_insights
+from .pagination import EmotionCursorPagination
+from .tasks import analyze_voice_job
+from ai_analysis.async_views import async_api_view
+from ai_analysis import upstream
 
 
 class EmotionRecordViewSet(viewsets.ModelViewSet):
@@ -29,10 +47,11 @@ class EmotionRecordViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['emotion_type', 'sub_emotion']
+    pagination_class = EmotionCursorPagination
     
     def get_queryset(self):
         """사용자의 감정 기록만 반환"""
-        return EmotionRecord.objects.filter(user=self.request.user).order_by('-created_at')
+        return EmotionRecord.objects.filter(user=self.request.user).order_by('-created_at', '-id')
     
     def perform_create(self, serializer):
         """감정 기록 생성"""
@@ -48,8 +67,8 @@ class EmotionRecordViewSet(viewsets.ModelViewSet):
         situation = serializer.validated_data.get('situation', '')
         
         # AI 분석 수행
-        analyzer = EmotionAnalyzer()
-        analysis_result = analyzer.analyze_text(text, situation)
+        analyzer = get_emotion_analyzer()
+        analysis_result = analyzer.analyze_text(text, situation, mode=analysis_mode_for(request.user))
         
         if not analysis_result:
             return Response(
@@ -58,213 +77,219 @@ class EmotionRecordViewSet(viewsets.ModelViewSet):
             )
         
         # 감정 기록 저장
-        emotion_record = EmotionRecord.objects.create(
-            user=request.user,
-            emotion_type=analysis_result['emotion_type'],
-            sub_emotion=analysis_result.get('sub_emotion'),
-            intensity=analysis_result['intensity'],
-            text=text,
-            ai_analysis=analysis_result.get('detailed_analysis', {}),
-            triggers=analysis_result.get('triggers', []),
-            physical_sensations=analysis_result.get('physical_sensations', []),
-            thoughts=analysis_result.get('thoughts', []),
-            situation=situation
-        )
+        emotion_record = records.build_record(request.user, text, situation, analysis_result)
+        emotion_record.save()
         
         # 대응 전략 추가
-        response_data = EmotionRecordSerializer(emotion_record).data
+        response_data = EmotionSerializer(emotion_record).data
         response_data['recommendations'] = analyzer.get_coping_strategies(
-            analysis_result['emotion_type'],
+            emotion_record.emotion_type,
             analysis_result['intensity']
         )
         
         return Response(response_data, status=status.HTTP_201_CREATED)
     
+    @action(detail=False, methods=['post'])
+    def analyze_text_batch(self, request):
+        """여러 텍스트를 동시에 분석하고 한 번에 저장"""
+        serializer = BatchTextAnalysisSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        # 동시 요청 수를 제한하여 병렬 분석 후 한 번에 저장 (결과는 입력 순서 유지)
+        outcomes = records.analyze_texts(request.user, serializer.validated_data['items'])
+        
+        results = []
+        created = 0
+        for index, (record, error) in enumerate(outcomes):
+            if record is not None:
+                created += 1
+                results.append({
+                    'index': index,
+                    'status': 'ok',
+                    'record': EmotionSerializer(record).data
+                })
+            else:
+                results.append({'index': index, 'status': 'error', 'error': error})
+        
+        return Response({
+            'results': results,
+            'created': created,
+            'failed': len(outcomes) - created
+        }, status=status.HTTP_201_CREATED if created else status.HTTP_502_BAD_GATEWAY)
+    
+    @action(detail=False, methods=['post'])
+    def ingest(self, request):
+        """오프라인 감정 기록 일괄 업로드 (client_id 기준 중복 제거)"""
+        serializer = EmotionIngestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        result = ingest_entries(request.user, serializer.validated_data['entries'])
+        return Response(
+            result,
+            status=status.HTTP_201_CREATED if result['created'] else status.HTTP_200_OK
+        )
+    
+    @action(detail=False, methods=['get'], permission_classes=[IsAdminUser])
+    def cache_stats(self, request):
+        """텍스트 분석 캐시 적중/미스, 중복 호출 병합 및 업스트림 지연/차단 통계 (프로세스 단위)"""
+        return Response({
+            **analysis_cache.stats(),
+            'single_flight': {
+                'analysis': analysis_flights.stats(),
+                'insights': insight_flights.stats(),
+            },
+            'upstream': upstream.all_stats(),
+        })
+    
     @action(detail=False, methods=['post'], parser_classes=[MultiPartParser, FormParser])
     def analyze_voice(self, request):
-        """음성 기반 감정 분석"""
+        """음성 기반 감정 분석 (백그라운드 작업으로 접수 후 즉시 응답)"""
         serializer = VoiceAnalysisSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         
         audio_file = serializer.validated_data['audio_file']
-        situation = serializer.validated_data.get('situation', '')
+        job = VoiceAnalysisJob.objects.create(
+            user=request.user,
+            situation=serializer.validated_data.get('situation', ''),
+            language=request.data.get('language', 'ko-KR'),
+            audio=b''.join(audio_file.chunks())
+        )
+        transaction.on_commit(lambda: analyze_voice_job.delay(str(job.id)))
         
-        try:
-            # 음성을 텍스트로 변환
-            recognizer = sr.Recognizer()
-            audio_data = BytesIO(audio_file.read())
-            
-            with sr.AudioFile(audio_data) as source:
-                audio = recognizer.record(source)
-                text = recognizer.recognize_google(audio, language='ko-KR')
-            
-            # 텍스트 기반 분석 수행
-            analyzer = EmotionAnalyzer()
-            analysis_result = analyzer.analyze_voice_features(text, {
-                'duration': len(audio.frame_data) / audio.sample_rate,
-                'sample_rate': audio.sample_rate
-            })
-            
-            # 감정 기록 저장
-            emotion_record = EmotionRecord.objects.create(
-                user=request.user,
-                emotion_type=analysis_result['emotion_type'],
-                sub_emotion=analysis_result.get('sub_emotion'),
-                intensity=analysis_result['intensity'],
-                text=text,
-                ai_analysis=analysis_result,
-                triggers=analysis_result.get('triggers', []),
-                situation=situation,
-                is_voice=True
-            )
-            
-            response_data = EmotionRecordSerializer(emotion_record).data
-            response_data['transcribed_text'] = text
-            response_data['voice_features'] = analysis_result.get('voice_features', {})
-            
-            return Response(response_data, status=status.HTTP_201_CREATED)
-            
-        except sr.UnknownValueError:
-            return Response(
-                {'error': '음성을 인식할 수 없습니다.'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        except Exception as e:
-            return Response(
-                {'error': f'음성 분석 중 오류가 발생했습니다: {str(e)}'},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
+        response_data = VoiceAnalysisJobSerializer(job).data
+        response_data['status_url'] = request.build_absolute_uri(
+            reverse('emotions:emotion-record-voice-job', kwargs={'job_id': job.id})
+        )
+        return Response(response_data, status=status.HTTP_202_ACCEPTED)
+    
+    @action(detail=False, methods=['get'], url_path=r'voice_jobs/(?P<job_id>[0-9a-f-]+)')
+    def voice_job(self, request, job_id=None):
+        """음성 분석 작업 상태 및 결과 조회"""
+        job = get_object_or_404(VoiceAnalysisJob, pk=job_id, user=request.user)
+        return Response(VoiceAnalysisJobSerializer(job).data)
     
     @action(detail=False, methods=['get'])
     def statistics(self, request):
-        """감정 통계"""
+        """감정 통계 (일별 롤업 기반)"""
         # 기간 파라미터
         days = int(request.query_params.get('days', 30))
-        start_date = timezone.now() - timedelta(days=days)
-        
-        records = self.get_queryset().filter(created_at__gte=start_date)
-        
-        # 기본 통계
-        total_records = records.count()
-        if total_records == 0:
-            return Response({
-                'total_records': 0,
-                'emotion_distribution': {},
-                'average_intensity': 0,
-                'most_common_emotion': None,
-                'daily_average': 0
-            })
-        
-        # 감정 분포
-        emotion_distribution = {}
-        for record in records:
-            emotion_distribution[record.emotion_type] = emotion_distribution.get(record.emotion_type, 0) + 1
-        
-        # 평균 강도
-        average_intensity = records.aggregate(Avg('intensity'))['intensity__avg']
-        
-        # 가장 흔한 감정
-        most_common_emotion = max(emotion_distribution.items(), key=lambda x: x[1])
-        
-        # 일별 평균
-        daily_average = total_records / max(days, 1)
-        
-        # 시간대별 분포
-        hourly_distribution = {}
-        for hour in range(24):
-            count = records.filter(created_at__hour=hour).count()
-            hourly_distribution[f"{hour:02d}:00"] = count
-        
-        # 트리거 분석
-        all_triggers = []
-        for record in records:
-            all_triggers.extend(record.triggers or [])
-        
-        trigger_frequency = {}
-        for trigger in all_triggers:
-            trigger_frequency[trigger] = trigger_frequency.get(trigger, 0) + 1
         
-        return Response({
-            'total_records': total_records,
-            'emotion_distribution': emotion_distribution,
-            'average_intensity': round(average_intensity or 0, 2),
-            'most_common_emotion': most_common_emotion[0] if most_common_emotion else None,
-            'daily_average': round(daily_average, 2),
-            'hourly_distribution': hourly_distribution,
-            'top_triggers': sorted(trigger_frequency.items(), key=lambda x: x[1], reverse=True)[:5],
-            'period_days': days
-        })
+        now = timezone.now()
+        totals = rollups.window_totals(request.user, days, now)
+        # 트리거 순위는 /triggers/와 같은 정규화 인덱스에서 집계
+        top = triggers.top_triggers(request.user, now - timedelta(days=days), 5)
+        return Response(rollups.statistics(totals, days, top))
+    
+    @action(detail=False, methods=['get'], url_path='triggers')
+    def trigger_stats(self, request):
+        """감정 트리거 순위, 함께 나타나는 트리거 및 해당 트리거의 기록"""
+        days = request.query_params.get('days')
+        since = timezone.now() - timedelta(days=int(days)) if days else None
+        limit = min(int(request.query_params.get('limit', 10)), 100)
+        
+        data = {'top_triggers': triggers.top_triggers(request.user, since, limit)}
+        trigger = request.query_params.get('trigger')
+        if trigger:
+            data['trigger'] = trigger
+            data['co_occurring'] = triggers.co_occurring(request.user, trigger, since, limit)
+            records = triggers.filter_by_trigger(Emotion.objects.filter(user=request.user), trigger)
+            if since is not None:
+                records = records.filter(created_at__gte=since)
+            data['records'] = list(records.order_by('-created_at', '-id').values(
+                'id', 'emotion_type', 'intensity', 'triggers', 'created_at'
+            )[:limit])
+        return Response(data)
     
     @action(detail=False, methods=['get'])
     def trends(self, request):
-        """감정 트렌드 분석"""
+        """감정 트렌드 분석 (일별 롤업 기반)"""
         days = int(request.query_params.get('days', 7))
         
-        trends = []
-        for i in range(days):
-            date = timezone.now().date() - timedelta(days=i)
-            records = self.get_queryset().filter(
-                created_at__date=date
-            )
-            
-            if records.exists():
-                daily_data = {
-                    'date': date.isoformat(),
-                    'record_count': records.count(),
-                    'average_intensity': records.aggregate(Avg('intensity'))['intensity__avg'],
-                    'dominant_emotion': records.values('emotion_type').annotate(
-                        count=Count('id')
-                    ).order_by('-count').first()
-                }
-                trends.append(daily_data)
-        
-        # 주간 패턴 분석
-        weekly_pattern = []
-        for day in range(7):
-            day_name = ['월', '화', '수', '목', '금', '토', '일'][day]
-            day_records = self.get_queryset().filter(
-                created_at__week_day=(day + 2) % 7 + 1  # Django week_day는 일요일이 1
-            )
-            
-            if day_records.exists():
-                weekly_pattern.append({
-                    'day': day_name,
-                    'average_intensity': day_records.aggregate(Avg('intensity'))['intensity__avg'],
-                    'record_count': day_records.count()
-                })
+        trends = rollups.daily_trends(request.user, days)
         
         return Response({
             'daily_trends': trends,
-            'weekly_pattern': weekly_pattern,
+            'weekly_pattern': rollups.weekly_pattern(request.user),
             'trend_direction': self._calculate_trend_direction(trends)
         })
+
+    @action(detail=False, methods=['get'])
+    def timeline(self, request):
+        """감정 타임라인 (커서 페이지네이션, 경량 필드)"""
+        queryset = self.filter_queryset(self.get_queryset()).values(
+            'id', 'emotion_type', 'intensity', 'created_at'
+        )
+        page = self.paginate_queryset(queryset)
+        return self.get_paginated_response(page)
+
+    @action(detail=False, methods=['get'])
+    def timeseries(self, request):
+        """차트용 강도/감정점수 시계열 (다운샘플링)"""
+        from . import timeseries
+        
+        params = request.query_params
+        metrics = params.get('metrics', 'intensity').split(',')
+        method = params.get('method', 'lttb')
+        if not set(metrics) <= set(timeseries.METRICS) or method not in timeseries.METHODS:
+            return Response(
+                {'error': f"metrics는 {', '.join(timeseries.METRICS)}, "
+                          f"method는 {', '.join(timeseries.METHODS)} 중에서 선택하세요"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            start = self._parse_moment(params.get('start'))
+            end = self._parse_moment(params.get('end'))
+            points = int(params.get('points', timeseries.DEFAULT_POINTS))
+            span = float(params['ewma_span']) if params.get('ewma_span') else None
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response(timeseries.build_series(
+            request.user, metrics, start=start, end=end, points=points, method=method, span=span
+        ))
+    
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """감정 기록 전체 내보내기 (NDJSON / CSV 스트리밍)"""
+        export_format = request.query_params.get('export_format', 'ndjson')
+        if export_format not in export.FORMATS:
+            return Response(
+                {'error': f"지원하지 않는 형식입니다: {', '.join(export.FORMATS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        return export.streaming_response(request, request.user, export_format)
     
     @action(detail=False, methods=['get'])
     def insights(self, request):
         """AI 기반 감정 인사이트"""
-        records = self.get_queryset()[:100]  # 최근 100개 기록
+        # 최근 100개 기록 (한 번만 조회)
+        records = list(self.get_queryset()[:100])
         
         if not records:
             return Response({'insights': [], 'patterns': []})
         
-        analyzer = EmotionAnalyzer()
+        analyzer = get_emotion_analyzer()
         
-        # 패턴 분석
-        patterns = []
-        emotion_sequences = [r.emotion_type for r in records]
-        
-        # 반복 패턴 찾기
-        for i in range(len(emotion_sequences) - 2):
-            pattern = emotion_sequences[i:i+3]
-            if emotion_sequences.count(pattern) > 1:
-                patterns.append({
-                    'sequence': pattern,
-                    'frequency': emotion_sequences.count(pattern)
-                })
+        # 반복 패턴 찾기 (전체 기록 대상, 증분 캐시)
+        try:
+            lengths = [
+                int(n) for n in request.query_params.get('sequence_length', '3').split(',')
+            ]
+            max_gap_hours = request.query_params.get('max_gap_hours')
+            window_hours = request.query_params.get('window_hours')
+            patterns = sequences.recurring_patterns(
+                request.user,
+                lengths=lengths,
+                max_gap=timedelta(hours=float(max_gap_hours)) if max_gap_hours else None,
+                window=timedelta(hours=float(window_hours)) if window_hours else None,
+            )
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         
-        # AI 인사이트 생성
-        recent_emotions = [(r.emotion_type, r.intensity) for r in records[:10]]
-        insights = analyzer.generate_insights(recent_emotions)
+        # AI 인사이트 (저장된 결과 재사용, 변경분이 쌓였을 때만 증분 갱신)
+        insight = current_insights(request.user, analyzer)
         
         # 개선 제안
         recommendations = []
@@ -289,8 +314,11 @@ class EmotionRecordViewSet(viewsets.ModelViewSet):
         balance_score = self._calculate_emotional_balance(records[:30])
         
         return Response({
-            'insights': insights,
-            'patterns': patterns[:5],  # 상위 5개 패턴
+            'insights': insight['insights'],
+            'insights_status': {
+                key: insight[key] for key in ('status', 'generated_at', 'pending_changes')
+            },
+            'patterns': patterns,  # 상위 5개 패턴
             'recommendations': recommendations,
             'emotional_balance_score': balance_score,
             'analysis_period': {
@@ -358,6 +386,21 @@ class EmotionRecordViewSet(viewsets.ModelViewSet):
             'calendar': calendar_data
         })
     
+    @staticmethod
+    def _parse_moment(value):
+        """ISO 날짜 또는 일시 -> aware datetime (날짜는 현지 자정)"""
+        if not value:
+            return None
+        moment = parse_datetime(value)
+        if moment is None:
+            day = parse_date(value)
+            if day is None:
+                raise ValueError(f'잘못된 날짜 형식입니다: {value}')
+            moment = datetime.combine(day, datetime.min.time())
+        if timezone.is_naive(moment):
+            moment = timezone.make_aware(moment)
+        return moment
+    
     def _calculate_trend_direction(self, trends):
         """트렌드 방향 계산"""
         if len(trends) < 2:
@@ -395,4 +438,60 @@ class EmotionRecordViewSet(viewsets.ModelViewSet):
             return 50
         
         balance = (positive_score / total_score) * 100
-        return round(balance, 1)
\ No newline at end of file
+        return round(balance, 1)
+
+
+@async_api_view(['POST'])
+async def async_analyze_text(request):
+    """텍스트 기반 감정 분석 (ASGI 네이티브 비동기 버전)"""
+    serializer = TextAnalysisSerializer(data=request.data)
+    if not serializer.is_valid():
+        return JsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    
+    text = serializer.validated_data['text']
+    situation = serializer.validated_data.get('situation', '')
+    
+    analysis_result = await get_async_emotion_analyzer().analyze_text(
+        text, situation, mode=analysis_mode_for(request.user)
+    )
+    if not analysis_result or analysis_result.get('error'):
+        return JsonResponse(
+            {'error': '감정 분석에 실패했습니다.'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+    
+    emotion_record = records.build_record(request.user, text, situation, analysis_result)
+    await sync_to_async(emotion_record.save)()
+    
+    response_data = await sync_to_async(lambda: EmotionSerializer(emotion_record).data)()
+    return JsonResponse(response_data, status=status.HTTP_201_CREATED)
+
+
+@async_api_view(['POST'])
+async def async_analyze_voice(request):
+    """음성 기반 감정 분석 (ASGI 네이티브 비동기 버전)"""
+    serializer = VoiceAnalysisSerializer(data=request.data)
+    if not serializer.is_valid():
+        return JsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    
+    audio_file = serializer.validated_data['audio_file']
+    situation = serializer.validated_data.get('situation', '')
+    
+    analysis_result = await get_async_emotion_analyzer().analyze_voice(
+        audio_file, mode=analysis_mode_for(request.user)
+    )
+    if analysis_result.get('error'):
+        return JsonResponse(
+            {'error': f"음성 분석 중 오류가 발생했습니다: {analysis_result['error']}"},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+    
+    text = analysis_result.get('transcribed_text', '')
+    emotion_record = records.build_record(request.user, text, situation, analysis_result)
+    await sync_to_async(emotion_record.save)()
+    
+    response_data = await sync_to_async(lambda: EmotionSerializer(emotion_record).data)()
+    response_data['transcribed_text'] = text
+    response_data['voice_features'] = analysis_result.get('voice_features', {})
+    
+    return JsonResponse(response_data, status=status.HTTP_201_CREATED)
@@ -0,0 +1,196 @@
+"""
+Single-pass voice feature extraction
+
+Works on the 16 kHz PCM produced by ``emotions.audio``. Every frame is
+transformed once; energy, zero-crossing rate, spectral centroid, pitch and
+the onset envelope used for tempo are all derived from that shared STFT.
+Audio is processed in blocks of ``BLOCK_FRAMES`` frames and only running
+sums are kept between blocks, so peak memory does not grow with the length
+of the voice note.
+"""
+from typing import Dict
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from .audio import SAMPLE_RATE, SAMPLE_WIDTH
+
+N_FFT = 1024          # 64 ms analysis window at 16 kHz
+HOP_LENGTH = 256      # 16 ms between frames
+BLOCK_FRAMES = 256    # ~4 s of audio per block
+
+# Fundamental frequency range of adult speech
+PITCH_FMIN = 75.0
+PITCH_FMAX = 500.0
+# Frames quieter than this (about -40 dBFS) are treated as silence for pitch
+SILENCE_RMS = 0.01
+
+TEMPO_MIN_BPM = 30.0
+TEMPO_MAX_BPM = 300.0
+TEMPO_START_BPM = 120.0
+
+
+class _RunningStats:
+    """Streaming mean/std over many values"""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.total_sq = 0.0
+
+    def update(self, values):
+        self.count += len(values)
+        self.total += float(np.sum(values, dtype=np.float64))
+        self.total_sq += float(np.sum(np.square(values, dtype=np.float64)))
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    @property
+    def std(self) -> float:
+        if not self.count:
+            return 0.0
+        return float(np.sqrt(max(self.total_sq / self.count - self.mean ** 2, 0.0)))
+
+
+class _TempoEstimator:
+    """
+    Streaming autocorrelation of the onset envelope.
+
+    Only the last ``max_lag`` onset values are kept between blocks. The
+    tempo is the lag with the strongest autocovariance, weighted by a
+    log-normal prior around ``TEMPO_START_BPM`` (as librosa's beat tracker).
+    """
+
+    def __init__(self, frame_rate: float):
+        self.frame_rate = frame_rate
+        self.min_lag = max(1, int(np.floor(frame_rate * 60 / TEMPO_MAX_BPM)))
+        self.max_lag = int(np.ceil(frame_rate * 60 / TEMPO_MIN_BPM))
+        self.history = np.zeros(self.max_lag)
+        self.products = np.zeros(self.max_lag + 1)
+        self.stats = _RunningStats()
+
+    def update(self, onset):
+        self.stats.update(onset)
+        signal = np.concatenate([self.history, onset])
+        # Row i holds signal[i - max_lag .. i] for each new onset value
+        windows = sliding_window_view(signal, self.max_lag + 1)[-len(onset):]
+        self.products += (onset @ windows)[::-1]
+        self.history = signal[-self.max_lag:]
+
+    def tempo(self) -> float:
+        frames = self.stats.count
+        lags = np.arange(self.min_lag, self.max_lag + 1)
+        pairs = frames - lags
+        if self.stats.std == 0 or pairs[0] <= 0:
+            return 0.0
+
+        covariance = self.products[lags] / np.maximum(pairs, 1) - self.stats.mean ** 2
+        bpm = 60.0 * self.frame_rate / lags
+        prior = np.exp(-0.5 * np.log2(bpm / TEMPO_START_BPM) ** 2)
+        score = np.where(pairs > 0, covariance * prior, -np.inf)
+
+        best = int(np.argmax(score))
+        return float(bpm[best]) if score[best] > 0 else 0.0
+
+
+def extract_voice_features(pcm: bytes, sample_rate: int = SAMPLE_RATE,
+                           block_frames: int = BLOCK_FRAMES) -> Dict:
+    """
+    Voice characteristics used as emotional cues.
+
+    Args:
+        pcm: Mono signed 16-bit little-endian PCM
+        sample_rate: Sample rate of ``pcm``
+        block_frames: STFT frames processed per block
+
+    Returns:
+        pitch_mean/pitch_std (Hz), energy_mean/energy_std (RMS),
+        energy_level (1-10), tempo (BPM), brightness (spectral centroid, Hz)
+        and speech_rate (zero-crossing rate)
+    """
+    total_samples = len(pcm) // SAMPLE_WIDTH
+    total_frames = 1 + max(total_samples - N_FFT, 0) // HOP_LENGTH
+
+    window = np.hanning(N_FFT).astype(np.float32)
+    freqs = np.fft.rfftfreq(N_FFT, 1.0 / sample_rate)
+    pitch_low = int(np.searchsorted(freqs, PITCH_FMIN))
+    pitch_high = int(np.searchsorted(freqs, PITCH_FMAX, side='right'))
+
+    energy = _RunningStats()
+    brightness = _RunningStats()
+    crossings = _RunningStats()
+    pitch = _RunningStats()
+    tempo = _TempoEstimator(sample_rate / HOP_LENGTH)
+    previous_log_spectrum = None
+
+    for first_frame in range(0, total_frames, block_frames):
+        count = min(block_frames, total_frames - first_frame)
+        start = first_frame * HOP_LENGTH
+        length = min((count - 1) * HOP_LENGTH + N_FFT, total_samples - start)
+
+        block = np.frombuffer(
+            pcm, dtype='<i2', count=length, offset=start * SAMPLE_WIDTH
+        ).astype(np.float32) / 32768.0
+        if length < N_FFT:
+            block = np.pad(block, (0, N_FFT - length))
+        frames = sliding_window_view(block, N_FFT)[::HOP_LENGTH][:count]
+
+        # Time-domain features
+        rms = np.sqrt(np.mean(np.square(frames), axis=1))
+        energy.update(rms)
+        signs = np.signbit(frames)
+        crossings.update(np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / N_FFT)
+
+        # One STFT shared by every spectral feature
+        spectrum = np.abs(np.fft.rfft(frames * window, axis=1))
+        spectral_sum = spectrum.sum(axis=1)
+        brightness.update(
+            np.divide(spectrum @ freqs, spectral_sum,
+                      out=np.zeros_like(spectral_sum), where=spectral_sum > 0)
+        )
+
+        voiced = spectrum[rms > SILENCE_RMS]
+        if len(voiced):
+            pitch.update(_estimate_pitch(voiced, freqs, pitch_low, pitch_high))
+
+        # Onset strength: positive spectral flux on a log-magnitude scale
+        log_spectrum = np.log1p(spectrum * 100.0)
+        if previous_log_spectrum is None:
+            previous_log_spectrum = log_spectrum[:1]
+        flux = np.diff(np.vstack([previous_log_spectrum, log_spectrum]), axis=0)
+        tempo.update(np.maximum(flux, 0.0).mean(axis=1))
+        previous_log_spectrum = log_spectrum[-1:]
+
+    energy_mean = energy.mean
+    return {
+        'pitch_mean': pitch.mean,
+        'pitch_std': pitch.std,
+        'energy_mean': energy_mean,
+        'energy_std': energy.std,
+        'energy_level': min(10, max(1, int(energy_mean * 20))),
+        'tempo': tempo.tempo(),
+        'brightness': brightness.mean,
+        'speech_rate': crossings.mean,
+    }
+
+
+def _estimate_pitch(spectrum, freqs, low: int, high: int):
+    """Per-frame fundamental via a 3-harmonic product spectrum"""
+    product = spectrum[:, :high].copy()
+    for harmonic in (2, 3):
+        product *= spectrum[:, ::harmonic][:, :high]
+    product[:, :low] = 0.0
+
+    peak = np.clip(np.argmax(product, axis=1), 1, high - 2)
+    rows = np.arange(len(product))
+    # Parabolic interpolation between bins on a log scale
+    left, centre, right = (
+        np.log(product[rows, peak + offset] + 1e-12) for offset in (-1, 0, 1)
+    )
+    denominator = left - 2 * centre + right
+    shift = np.divide(0.5 * (left - right), denominator,
+                      out=np.zeros_like(denominator), where=denominator != 0)
+    bin_width = freqs[1]
+    return (peak + np.clip(shift, -0.5, 0.5)) * bin_width
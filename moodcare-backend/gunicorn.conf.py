@@ -0,0 +1,32 @@
+"""
+Gunicorn configuration for MoodCare
+
+Usage: gunicorn -c gunicorn.conf.py moodcare.wsgi:application
+"""
+from decouple import config
+
+bind = config('GUNICORN_BIND', default='0.0.0.0:8000')
+workers = config('GUNICORN_WORKERS', default=3, cast=int)
+threads = config('GUNICORN_THREADS', default=4, cast=int)
+timeout = config('GUNICORN_TIMEOUT', default=120, cast=int)
+# Load Django in the master so warmed-up modules are shared with workers
+preload_app = config('GUNICORN_PRELOAD_APP', default=False, cast=bool)
+
+
+def when_ready(server):
+    """Preload heavy AI dependencies before workers fork (AI_WARMUP)"""
+    import os
+    import django
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'moodcare.settings')
+    django.setup()
+
+    from ai_analysis.warmup import warmup_if_enabled
+    timings = warmup_if_enabled()
+    if timings:
+        server.log.info(f"AI warmup: {timings}")
+
+
+def post_fork(server, worker):
+    """Give each worker its own upstream connection pools"""
+    from ai_analysis.clients import reset_clients
+    reset_clients()
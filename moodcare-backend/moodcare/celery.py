@@ -0,0 +1,25 @@
+"""
+Celery application for MoodCare background jobs
+
+Run the voice analysis workers with a thread pool (the CPU-heavy feature
+extraction is handed to a process pool inside the task, and prefork
+children cannot start one). Thread pools do not enforce soft_time_limit;
+the voice task bounds each step with VOICE_*_TIMEOUT instead:
+
+    celery -A moodcare worker -Q voice --pool=threads --concurrency=8
+
+Story pools are refreshed on a schedule (CELERY_BEAT_SCHEDULE); the same
+workers pre-generate story continuations:
+
+    celery -A moodcare beat
+    celery -A moodcare worker -Q celery,story-pool,speculation --pool=threads --concurrency=4
+"""
+import os
+
+from celery import Celery
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'moodcare.settings')
+
+app = Celery('moodcare')
+app.config_from_object('django.conf:settings', namespace='CELERY')
+app.autodiscover_tasks()
@@ -52,6 +52,7 @@ INSTALLED_APPS = [
     'users',
     'emotions',
     'ai_analysis',
+    'sync',
 ]
 
 MIDDLEWARE = [
@@ -183,6 +184,11 @@ CORS_ALLOW_CREDENTIALS = True
 # OpenAI Settings
 OPENAI_API_KEY = config('OPENAI_API_KEY', default='')
 
+# Shared upstream HTTP pools (one per worker process, see ai_analysis.clients)
+OPENAI_MAX_CONNECTIONS = config('OPENAI_MAX_CONNECTIONS', default=100, cast=int)
+OPENAI_MAX_KEEPALIVE_CONNECTIONS = config('OPENAI_MAX_KEEPALIVE_CONNECTIONS', default=20, cast=int)
+OPENAI_KEEPALIVE_EXPIRY = config('OPENAI_KEEPALIVE_EXPIRY', default=30.0, cast=float)
+
 # Channels Configuration
 ASGI_APPLICATION = 'moodcare.asgi.application'
 CHANNEL_LAYERS = {
@@ -192,4 +198,164 @@ CHANNEL_LAYERS = {
             "hosts": [(config('REDIS_HOST', default='127.0.0.1'), config('REDIS_PORT', default=6379, cast=int))],
         },
     },
-}
\ No newline at end of file
+}
+
+# Cache Configuration
+CACHES = {
+    'default': {
+        'BACKEND': 'django_redis.cache.RedisCache',
+        'LOCATION': config(
+            'REDIS_CACHE_URL',
+            default=f"redis://{config('REDIS_HOST', default='127.0.0.1')}:{config('REDIS_PORT', default=6379, cast=int)}/1"
+        ),
+        'OPTIONS': {
+            'CLIENT_CLASS': 'django_redis.client.DefaultClient',
+            # A Redis outage degrades to cache misses instead of failed requests
+            'IGNORE_EXCEPTIONS': True,
+        },
+    }
+}
+
+# AI response cache (shared Redis tier + per-process LRU tier)
+AI_CACHE_TTL = config('AI_CACHE_TTL', default=60 * 60 * 24, cast=int)
+AI_CACHE_LOCAL_TTL = config('AI_CACHE_LOCAL_TTL', default=300, cast=int)
+AI_CACHE_LOCAL_MAX_ENTRIES = config('AI_CACHE_LOCAL_MAX_ENTRIES', default=1024, cast=int)
+
+# Single-flight coalescing of identical in-flight AI calls (ai_analysis/coalesce.py):
+# how long duplicates wait, and how long a leader's Redis lock outlives a crash
+AI_SINGLE_FLIGHT_TIMEOUT = config('AI_SINGLE_FLIGHT_TIMEOUT', default=90.0, cast=float)
+AI_SINGLE_FLIGHT_LOCK_TTL = config('AI_SINGLE_FLIGHT_LOCK_TTL', default=120, cast=int)
+AI_SINGLE_FLIGHT_POLL_INTERVAL = config('AI_SINGLE_FLIGHT_POLL_INTERVAL', default=0.05, cast=float)
+
+# Latency SLO guard per upstream endpoint (ai_analysis/upstream.py): total
+# deadline in seconds, and whether to hedge a second attempt after the p95
+AI_UPSTREAM_POLICIES = {
+    'emotion-analysis': {
+        'deadline': config('AI_UPSTREAM_ANALYSIS_DEADLINE', default=10.0, cast=float),
+        'hedge': config('AI_UPSTREAM_ANALYSIS_HEDGE', default=True, cast=bool),
+    },
+    'emotion-insights': {'deadline': config('AI_UPSTREAM_INSIGHTS_DEADLINE', default=20.0, cast=float)},
+    'story': {'deadline': config('AI_UPSTREAM_STORY_DEADLINE', default=60.0, cast=float)},
+    # Streamed stories: longest wait for the first token, and between tokens
+    'story-stream': {'deadline': config('AI_UPSTREAM_STORY_STREAM_DEADLINE', default=15.0, cast=float)},
+    'story-continuation': {'deadline': config('AI_UPSTREAM_CONTINUATION_DEADLINE', default=20.0, cast=float)},
+    # Background pre-generation; nobody is waiting, but it has its own breaker
+    'story-speculation': {'deadline': config('AI_UPSTREAM_SPECULATION_DEADLINE', default=60.0, cast=float)},
+    'story-pool': {'deadline': config('AI_UPSTREAM_STORY_POOL_DEADLINE', default=90.0, cast=float)},
+    'spotify': {'deadline': config('AI_UPSTREAM_SPOTIFY_DEADLINE', default=5.0, cast=float)},
+}
+# Circuit breaker: opens when failures (or slow calls) dominate the recent window
+AI_UPSTREAM_BREAKER = {
+    'window': config('AI_UPSTREAM_BREAKER_WINDOW', default=20, cast=int),
+    'failure_rate': config('AI_UPSTREAM_BREAKER_FAILURE_RATE', default=0.5, cast=float),
+    'cooldown': config('AI_UPSTREAM_BREAKER_COOLDOWN', default=30.0, cast=float),
+}
+AI_UPSTREAM_MAX_THREADS = config('AI_UPSTREAM_MAX_THREADS', default=64, cast=int)
+
+# Batch text analysis
+EMOTION_BATCH_MAX_ITEMS = config('EMOTION_BATCH_MAX_ITEMS', default=20, cast=int)
+EMOTION_BATCH_CONCURRENCY = config('EMOTION_BATCH_CONCURRENCY', default=5, cast=int)
+# Offline replay: entries accepted per /records/ingest/ request
+EMOTION_INGEST_MAX_ITEMS = config('EMOTION_INGEST_MAX_ITEMS', default=500, cast=int)
+
+# Text analysis tiers: local (lexicon only), llm, local-then-llm
+EMOTION_ANALYSIS_MODE = config('EMOTION_ANALYSIS_MODE', default='llm')
+EMOTION_ANALYSIS_TIER_MODES = {
+    'free': config('EMOTION_ANALYSIS_FREE_MODE', default=EMOTION_ANALYSIS_MODE),
+}
+# local-then-llm skips GPT when the lexicon is at least this confident
+EMOTION_LOCAL_CONFIDENCE = config('EMOTION_LOCAL_CONFIDENCE', default=0.75, cast=float)
+
+# Streaming export: rows fetched and encoded per chunk
+EMOTION_EXPORT_CHUNK_SIZE = config('EMOTION_EXPORT_CHUNK_SIZE', default=500, cast=int)
+
+# Dashboard insights: records in the LLM input window, and how many must be
+# new or edited before the stored insight is refreshed
+EMOTION_INSIGHTS_WINDOW = config('EMOTION_INSIGHTS_WINDOW', default=100, cast=int)
+EMOTION_INSIGHTS_REFRESH_RECORDS = config('EMOTION_INSIGHTS_REFRESH_RECORDS', default=5, cast=int)
+
+# Records summarized (emotions/history.py) for story prompts
+EMOTION_HISTORY_SUMMARY_RECORDS = config('EMOTION_HISTORY_SUMMARY_RECORDS', default=2000, cast=int)
+
+# Chart series (/records/timeseries/): upper bound on points per metric
+EMOTION_TIMESERIES_MAX_POINTS = config('EMOTION_TIMESERIES_MAX_POINTS', default=500, cast=int)
+
+# Story chapters returned per /stories/<id>/chapters/ call
+STORY_CHAPTER_PAGE_SIZE = config('STORY_CHAPTER_PAGE_SIZE', default=5, cast=int)
+
+# Next-chapter pre-generation (stories/speculation.py): choices pre-generated
+# per chapter and daily token budget per subscription tier
+STORY_SPECULATION_TIERS = {
+    'free': {'max_choices': 0, 'daily_tokens': 0},
+    'premium': {
+        'max_choices': config('STORY_SPECULATION_PREMIUM_CHOICES', default=2, cast=int),
+        'daily_tokens': config('STORY_SPECULATION_PREMIUM_TOKENS', default=40000, cast=int),
+    },
+    'professional': {
+        'max_choices': config('STORY_SPECULATION_PROFESSIONAL_CHOICES', default=4, cast=int),
+        'daily_tokens': config('STORY_SPECULATION_PROFESSIONAL_TOKENS', default=150000, cast=int),
+    },
+}
+# Tokens reserved per queued continuation until its real usage is known
+STORY_SPECULATION_TOKEN_ESTIMATE = config('STORY_SPECULATION_TOKEN_ESTIMATE', default=1500, cast=int)
+STORY_SPECULATION_TIME_LIMIT = config('STORY_SPECULATION_TIME_LIMIT', default=120, cast=int)
+
+# Pre-generated story pools (stories/pool.py), refreshed every
+# STORY_POOL_REFRESH_SECONDS. Target depth is the smoothed requests per
+# interval times STORY_POOL_HEADROOM, capped at STORY_POOL_MAX_DEPTH.
+STORY_POOL_ENABLED = config('STORY_POOL_ENABLED', default=True, cast=bool)
+STORY_POOL_REFRESH_SECONDS = config('STORY_POOL_REFRESH_SECONDS', default=300, cast=int)
+STORY_POOL_DEMAND_SMOOTHING = config('STORY_POOL_DEMAND_SMOOTHING', default=0.3, cast=float)
+STORY_POOL_HEADROOM = config('STORY_POOL_HEADROOM', default=1.5, cast=float)
+STORY_POOL_MAX_DEPTH = config('STORY_POOL_MAX_DEPTH', default=10, cast=int)
+STORY_POOL_MAX_AGE_HOURS = config('STORY_POOL_MAX_AGE_HOURS', default=24, cast=int)
+STORY_POOL_REFILL_CONCURRENCY = config('STORY_POOL_REFILL_CONCURRENCY', default=3, cast=int)
+STORY_POOL_TIME_LIMIT = config('STORY_POOL_TIME_LIMIT', default=600, cast=int)
+
+# Delta sync (api/v1/sync/)
+SYNC_PAGE_SIZE = config('SYNC_PAGE_SIZE', default=500, cast=int)
+# Rows newer than this are left for the next sync so late commits are not skipped
+SYNC_SETTLE_SECONDS = config('SYNC_SETTLE_SECONDS', default=2, cast=int)
+SYNC_TOMBSTONE_RETENTION_DAYS = config('SYNC_TOMBSTONE_RETENTION_DAYS', default=90, cast=int)
+
+# Heavy AI dependencies load on first use; AI_WARMUP preloads them in the
+# gunicorn master instead. IMPORT_TIME_BUDGET_MS is enforced by
+# `manage.py benchmark_import_time`.
+AI_WARMUP = config('AI_WARMUP', default=False, cast=bool)
+IMPORT_TIME_BUDGET_MS = config('IMPORT_TIME_BUDGET_MS', default=100, cast=int)
+
+# Voice notes are decoded in memory to 16 kHz mono PCM; longer audio is cut
+VOICE_MAX_SECONDS = config('VOICE_MAX_SECONDS', default=300, cast=int)
+FFMPEG_BINARY = config('FFMPEG_BINARY', default='ffmpeg')
+
+# Celery (background voice analysis)
+CELERY_BROKER_URL = config(
+    'CELERY_BROKER_URL',
+    default=f"redis://{config('REDIS_HOST', default='127.0.0.1')}:{config('REDIS_PORT', default=6379, cast=int)}/2"
+)
+CELERY_TASK_SERIALIZER = 'json'
+CELERY_ACCEPT_CONTENT = ['json']
+CELERY_TASK_IGNORE_RESULT = True
+CELERY_TASK_ACKS_LATE = True
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+CELERY_TASK_ROUTES = {
+    'emotions.tasks.analyze_voice_job': {'queue': 'voice'},
+    'stories.tasks.pregenerate_continuations': {'queue': 'speculation'},
+    'stories.tasks.refill_story_pool': {'queue': 'story-pool'},
+}
+CELERY_BEAT_SCHEDULE = {
+    'refresh-story-pools': {
+        'task': 'stories.tasks.refresh_story_pools',
+        'schedule': STORY_POOL_REFRESH_SECONDS,
+    },
+}
+# Run tasks inline (no worker needed) for local development
+CELERY_TASK_ALWAYS_EAGER = config('CELERY_TASK_ALWAYS_EAGER', default=False, cast=bool)
+VOICE_JOB_TIME_LIMIT = config('VOICE_JOB_TIME_LIMIT', default=300, cast=int)
+# The threads pool does not enforce VOICE_JOB_TIME_LIMIT, so each blocking
+# step of a voice job has its own deadline in seconds (the GPT call is
+# bounded by AI_UPSTREAM_POLICIES)
+VOICE_DECODE_TIMEOUT = config('VOICE_DECODE_TIMEOUT', default=30, cast=int)
+VOICE_TRANSCRIBE_TIMEOUT = config('VOICE_TRANSCRIBE_TIMEOUT', default=30, cast=int)
+VOICE_FEATURE_TIMEOUT = config('VOICE_FEATURE_TIMEOUT', default=60, cast=int)
+VOICE_FEATURE_PROCESSES = config('VOICE_FEATURE_PROCESSES', default=2, cast=int)
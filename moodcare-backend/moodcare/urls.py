@@ -40,16 +40,23 @@ def api_root(request):
             'emotions': {
                 'records': '/api/v1/emotions/records/',
                 'analyze_text': '/api/v1/emotions/records/analyze/text/',
+                'analyze_text_batch': '/api/v1/emotions/records/analyze_text_batch/',
+                'ingest': '/api/v1/emotions/records/ingest/',
                 'analyze_voice': '/api/v1/emotions/records/analyze/voice/',
+                'voice_job': '/api/v1/emotions/records/voice_jobs/<job_id>/',
                 'statistics': '/api/v1/emotions/records/statistics/',
                 'trends': '/api/v1/emotions/records/trends/',
+                'triggers': '/api/v1/emotions/records/triggers/',
+                'timeseries': '/api/v1/emotions/records/timeseries/',
                 'insights': '/api/v1/emotions/records/insights/'
             },
             'stories': {
                 'list': '/api/v1/stories/stories/',
                 'generate': '/api/v1/stories/stories/generate/',
+                'generate_stream': '/api/v1/stories/async/generate/stream/',
                 'templates': '/api/v1/stories/templates/'
             },
+            'sync': '/api/v1/sync/?sync_token=<token>',
             'music': {
                 'recommendations': '/api/v1/music/recommendations/',
                 'profile': '/api/v1/music/profile/',
@@ -71,6 +78,7 @@ urlpatterns = [
     path('api/v1/stories/', include('stories.urls')),
     path('api/v1/music/', include('music.urls')),
     path('api/v1/notifications/', include('notifications.urls')),
+    path('api/v1/sync/', include('sync.urls')),
     
     # Legacy endpoints (for backward compatibility)
     path('api/users/', include('users.urls')),
@@ -77,12 +77,14 @@ class MusicRecommendation(models.Model):
     play_count = models.IntegerField(default=0)
     
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     played_at = models.DateTimeField(null=True, blank=True)
     
     class Meta:
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['user', '-created_at']),
+            models.Index(fields=['user', 'updated_at']),
             models.Index(fields=['recommendation_type', 'recommendation_score']),
         ]
     
@@ -1,32 +1,27 @@
 """
 AI-powered music recommendation engine
 """
-import openai
-import spotipy
-from spotipy.oauth2 import SpotifyClientCredentials
 import json
 import random
 from typing import Dict, List, Optional
 from django.conf import settings
-import numpy as np
+from asgiref.sync import sync_to_async
+
+from ai_analysis.clients import get_openai_client, get_spotify_client, registry
+from ai_analysis.coalesce import SingleFlight
+from ai_analysis.upstream import guard_for
+
+# Identical concurrent requests share one Spotify lookup
+recommendation_flights = SingleFlight('music-recommendations')
 
 
 class MusicRecommender:
     """Generate personalized music recommendations based on emotional state"""
     
     def __init__(self):
-        # Initialize OpenAI
-        self.openai_client = openai.OpenAI(api_key=settings.OPENAI_API_KEY)
-        
-        # Initialize Spotify (if credentials available)
-        if hasattr(settings, 'SPOTIFY_CLIENT_ID'):
-            auth = SpotifyClientCredentials(
-                client_id=settings.SPOTIFY_CLIENT_ID,
-                client_secret=settings.SPOTIFY_CLIENT_SECRET
-            )
-            self.spotify = spotipy.Spotify(auth_manager=auth)
-        else:
-            self.spotify = None
+        # Shared OpenAI and Spotify clients (Spotify is None without credentials)
+        self.openai_client = get_openai_client()
+        self.spotify = get_spotify_client()
         
         # Emotion to music characteristic mapping
         self.emotion_music_map = {
@@ -148,7 +143,15 @@ class MusicRecommender:
         Returns:
             List of recommended tracks with metadata
         """
-        
+        key = recommendation_flights.make_key(
+            current_emotion, emotion_intensity, target_emotion, recommendation_type, preferences
+        )
+        return recommendation_flights.do(key, lambda: self._build_recommendations(
+            current_emotion, target_emotion, recommendation_type, preferences
+        ))
+    
+    def _build_recommendations(self, current_emotion: str, target_emotion: Optional[str],
+                               recommendation_type: str, preferences: Optional[Dict]) -> List[Dict]:
         # Get emotion characteristics
         emotion_profile = self.emotion_music_map.get(
             current_emotion, 
@@ -184,60 +187,66 @@ class MusicRecommender:
     def _get_spotify_recommendations(self, profile: Dict, preferences: Optional[Dict]) -> List[Dict]:
         """Get recommendations from Spotify API"""
         try:
-            # Build recommendation parameters
-            params = {
-                'limit': 10,
-                'market': 'US',
-                'target_valence': (profile['valence'][0] + profile['valence'][1]) / 2,
-                'target_energy': (profile['energy'][0] + profile['energy'][1]) / 2,
-                'target_tempo': (profile['tempo'][0] + profile['tempo'][1]) / 2
-            }
-            
-            # Add seed genres
-            if 'genres' in profile:
-                available_genres = self.spotify.recommendation_genre_seeds()['genres']
-                seed_genres = [g for g in profile['genres'] if g in available_genres][:3]
-                if seed_genres:
-                    params['seed_genres'] = seed_genres
-            
-            # Get recommendations
-            results = self.spotify.recommendations(**params)
-            
-            recommendations = []
-            for track in results['tracks']:
-                # Get audio features
-                audio_features = self.spotify.audio_features(track['id'])[0]
-                
-                rec = {
-                    'track_id': track['id'],
-                    'track_name': track['name'],
-                    'artist': ', '.join([a['name'] for a in track['artists']]),
-                    'album': track['album']['name'],
-                    'preview_url': track.get('preview_url'),
-                    'spotify_url': track['external_urls']['spotify'],
-                    'audio_features': {
-                        'valence': audio_features['valence'],
-                        'energy': audio_features['energy'],
-                        'tempo': audio_features['tempo'],
-                        'danceability': audio_features['danceability'],
-                        'instrumentalness': audio_features['instrumentalness'],
-                        'acousticness': audio_features['acousticness']
-                    },
-                    'recommendation_score': self._calculate_recommendation_score(
-                        audio_features, profile
-                    )
-                }
-                recommendations.append(rec)
-            
-            # Sort by recommendation score
-            recommendations.sort(key=lambda x: x['recommendation_score'], reverse=True)
-            
-            return recommendations
-            
+            # Bounded by the 'spotify' deadline; an open breaker skips straight to the mocks
+            return guard_for('spotify').call(
+                lambda timeout: self._fetch_spotify_recommendations(profile)
+            )
         except Exception as e:
             print(f"Spotify API error: {str(e)}")
             return self._generate_mock_recommendations(profile, preferences)
     
+    def _fetch_spotify_recommendations(self, profile: Dict) -> List[Dict]:
+        """Spotify calls behind _get_spotify_recommendations"""
+        # Build recommendation parameters
+        params = {
+            'limit': 10,
+            'market': 'US',
+            'target_valence': (profile['valence'][0] + profile['valence'][1]) / 2,
+            'target_energy': (profile['energy'][0] + profile['energy'][1]) / 2,
+            'target_tempo': (profile['tempo'][0] + profile['tempo'][1]) / 2
+        }
+        
+        # Add seed genres
+        if 'genres' in profile:
+            available_genres = self.spotify.recommendation_genre_seeds()['genres']
+            seed_genres = [g for g in profile['genres'] if g in available_genres][:3]
+            if seed_genres:
+                params['seed_genres'] = seed_genres
+        
+        # Get recommendations
+        results = self.spotify.recommendations(**params)
+        
+        recommendations = []
+        for track in results['tracks']:
+            # Get audio features
+            audio_features = self.spotify.audio_features(track['id'])[0]
+            
+            rec = {
+                'track_id': track['id'],
+                'track_name': track['name'],
+                'artist': ', '.join([a['name'] for a in track['artists']]),
+                'album': track['album']['name'],
+                'preview_url': track.get('preview_url'),
+                'spotify_url': track['external_urls']['spotify'],
+                'audio_features': {
+                    'valence': audio_features['valence'],
+                    'energy': audio_features['energy'],
+                    'tempo': audio_features['tempo'],
+                    'danceability': audio_features['danceability'],
+                    'instrumentalness': audio_features['instrumentalness'],
+                    'acousticness': audio_features['acousticness']
+                },
+                'recommendation_score': self._calculate_recommendation_score(
+                    audio_features, profile
+                )
+            }
+            recommendations.append(rec)
+        
+        # Sort by recommendation score
+        recommendations.sort(key=lambda x: x['recommendation_score'], reverse=True)
+        
+        return recommendations
+    
     def _generate_mock_recommendations(self, profile: Dict, preferences: Optional[Dict]) -> List[Dict]:
         """Generate mock recommendations when Spotify is not available"""
         
@@ -433,4 +442,38 @@ class MusicRecommender:
         if features.get('acousticness', 0) > 0.5:
             value += 0.05
         
-        return min(1.0, value)
\ No newline at end of file
+        return min(1.0, value)
+
+
+class AsyncMusicRecommender(MusicRecommender):
+    """
+    Awaitable recommender for ASGI views.
+    
+    Recommendations come from Spotify (spotipy is sync-only), so the lookup
+    runs in a worker thread instead of blocking the event loop.
+    """
+    
+    async def get_recommendations(self,
+                                  current_emotion: str,
+                                  emotion_intensity: int,
+                                  target_emotion: Optional[str] = None,
+                                  recommendation_type: str = 'mood_boost',
+                                  preferences: Optional[Dict] = None) -> List[Dict]:
+        """Async counterpart of MusicRecommender.get_recommendations"""
+        return await sync_to_async(super().get_recommendations, thread_sensitive=False)(
+            current_emotion=current_emotion,
+            emotion_intensity=emotion_intensity,
+            target_emotion=target_emotion,
+            recommendation_type=recommendation_type,
+            preferences=preferences
+        )
+
+
+def get_music_recommender() -> MusicRecommender:
+    """Process-wide MusicRecommender sharing the pooled upstream clients"""
+    return registry.get('music_recommender', MusicRecommender)
+
+
+def get_async_music_recommender() -> AsyncMusicRecommender:
+    """Process-wide AsyncMusicRecommender sharing the pooled upstream clients"""
+    return registry.get('async_music_recommender', AsyncMusicRecommender)
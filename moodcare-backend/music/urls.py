@@ -4,7 +4,8 @@ from .views import (
     MusicRecommendationViewSet,
     MusicProfileViewSet,
     MusicDiaryViewSet,
-    TherapeuticSoundViewSet
+    TherapeuticSoundViewSet,
+    async_generate_recommendations
 )
 
 # Create routers
@@ -19,6 +20,10 @@ app_name = 'music'
 urlpatterns = [
     path('', include(router.urls)),
     
+    # Native async generation endpoint (served without a threadpool under ASGI)
+    path('async/recommendations/generate/', async_generate_recommendations,
+         name='music-async-generate'),
+    
     # Custom music endpoints handled by ViewSets:
     # /recommendations/generate/ - Get AI recommendations
     # /recommendations/feedback/ - Submit feedback
@@ -3,6 +3,8 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.utils import timezone
+from django.http import JsonResponse
+from asgiref.sync import sync_to_async
 from django.db.models import Avg, Count, Sum, Q
 from datetime import datetime, timedelta
 import json
@@ -22,7 +24,8 @@ from .serializers import (
     MusicFeedbackSerializer,
     MusicAnalyticsSerializer
 )
-from .recommender import MusicRecommender
+from .recommender import get_music_recommender, get_async_music_recommender
+from ai_analysis.async_views import async_api_view
 
 
 class MusicRecommendationViewSet(viewsets.ModelViewSet):
@@ -54,7 +57,7 @@ class MusicRecommendationViewSet(viewsets.ModelViewSet):
             data = serializer.validated_data
             
             # Initialize recommender
-            recommender = MusicRecommender()
+            recommender = get_music_recommender()
             
             # Get recommendations
             recommendations = recommender.get_recommendations(
@@ -69,36 +72,43 @@ class MusicRecommendationViewSet(viewsets.ModelViewSet):
                 }
             )
             
-            # Save recommendations to database
-            saved_recommendations = []
-            for rec in recommendations:
-                music_rec = MusicRecommendation.objects.create(
-                    user=request.user,
-                    target_emotion=data.get('target_emotion', data['current_emotion']),
-                    recommendation_type=data.get('recommendation_type', 'mood_boost'),
-                    track_id=rec['track_id'],
-                    track_name=rec['track_name'],
-                    artist=rec['artist'],
-                    album=rec.get('album', ''),
-                    audio_features=rec.get('audio_features', {}),
-                    recommendation_score=rec.get('recommendation_score', 0.5),
-                    recommendation_reason=rec.get('recommendation_reason', '')
-                )
-                saved_recommendations.append(music_rec)
-            
-            # Serialize and return
-            response_serializer = MusicRecommendationSerializer(
-                saved_recommendations, many=True
+            return Response(
+                self._save_recommendations(request.user, data, recommendations),
+                status=status.HTTP_200_OK
             )
-            
-            return Response({
-                'recommendations': response_serializer.data,
-                'count': len(saved_recommendations),
-                'generation_time': timezone.now()
-            }, status=status.HTTP_200_OK)
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
+    @staticmethod
+    def _save_recommendations(user, data, recommendations):
+        """Save recommendations to database and build the response"""
+        saved_recommendations = []
+        for rec in recommendations:
+            music_rec = MusicRecommendation.objects.create(
+                user=user,
+                target_emotion=data.get('target_emotion', data['current_emotion']),
+                recommendation_type=data.get('recommendation_type', 'mood_boost'),
+                track_id=rec['track_id'],
+                track_name=rec['track_name'],
+                artist=rec['artist'],
+                album=rec.get('album', ''),
+                audio_features=rec.get('audio_features', {}),
+                recommendation_score=rec.get('recommendation_score', 0.5),
+                recommendation_reason=rec.get('recommendation_reason', '')
+            )
+            saved_recommendations.append(music_rec)
+        
+        # Serialize and return
+        response_serializer = MusicRecommendationSerializer(
+            saved_recommendations, many=True
+        )
+        
+        return {
+            'recommendations': response_serializer.data,
+            'count': len(saved_recommendations),
+            'generation_time': timezone.now()
+        }
+    
     @action(detail=True, methods=['post'], url_path='feedback')
     def feedback(self, request, pk=None):
         """Submit feedback for a music recommendation"""
@@ -445,4 +455,30 @@ class TherapeuticSoundViewSet(viewsets.ModelViewSet):
             'beta': 'Focus and concentration (13-30 Hz)',
             'gamma': 'Peak awareness and cognition (30-100 Hz)'
         }
-        return descriptions.get(state, 'Unknown brainwave state')
\ No newline at end of file
+        return descriptions.get(state, 'Unknown brainwave state')
+
+
+@async_api_view(['POST'])
+async def async_generate_recommendations(request):
+    """Generate music recommendations without holding a worker thread (ASGI)"""
+    serializer = MusicRecommendationRequestSerializer(data=request.data)
+    if not serializer.is_valid():
+        return JsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    
+    data = serializer.validated_data
+    recommendations = await get_async_music_recommender().get_recommendations(
+        current_emotion=data['current_emotion'],
+        emotion_intensity=data['emotion_intensity'],
+        target_emotion=data.get('target_emotion'),
+        recommendation_type=data.get('recommendation_type', 'mood_boost'),
+        preferences={
+            'genres': data.get('genre_preference', []),
+            'energy_level': data.get('energy_level'),
+            'context': data.get('context')
+        }
+    )
+    
+    response_data = await sync_to_async(MusicRecommendationViewSet._save_recommendations)(
+        request.user, data, recommendations
+    )
+    return JsonResponse(response_data, status=status.HTTP_200_OK)
@@ -1,5 +1,7 @@
 import json
+from contextlib import aclosing
 from datetime import datetime
+from django.core.serializers.json import DjangoJSONEncoder
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
 from asgiref.sync import sync_to_async
@@ -42,6 +44,17 @@ class BaseConsumer(AsyncWebsocketConsumer):
     async def receive_json(self, content):
         """Receive and parse JSON data"""
         return json.loads(content)
+    
+    async def voice_analysis_completed(self, event):
+        """백그라운드 음성 분석 완료 알림"""
+        await self.send_json({
+            'type': 'voice_analysis_completed',
+            'job_id': event['job_id'],
+            'status': event['status'],
+            'record': event.get('record'),
+            'error': event.get('error', ''),
+            'timestamp': event['timestamp']
+        })
 
 
 class ChatConsumer(BaseConsumer):
@@ -369,6 +382,51 @@ class MusicConsumer(BaseConsumer):
         })
 
 
+class StoryStreamConsumer(BaseConsumer):
+    """AI 스토리 스트리밍 생성 Consumer"""
+    
+    async def connect(self):
+        self.generation = None
+        await super().connect()
+    
+    async def disconnect(self, close_code):
+        # 연결이 끊기면 생성 중단 (업스트림 스트림도 닫힘, 스토리는 저장되지 않음)
+        if self.generation is not None:
+            self.generation.cancel()
+        await super().disconnect(close_code)
+    
+    async def receive(self, text_data):
+        """스토리 생성 요청 수신 (StoryCreateRequestSerializer 형식)"""
+        from stories.serializers import StoryCreateRequestSerializer
+        
+        data = json.loads(text_data)
+        if data.get('action') != 'generate':
+            return
+        
+        if self.generation is not None and not self.generation.done():
+            await self.send_json({
+                'type': 'error',
+                'message': 'A story is already being generated'
+            })
+            return
+        
+        serializer = StoryCreateRequestSerializer(data=data.get('story', {}))
+        if not serializer.is_valid():
+            await self.send_json({'type': 'error', 'errors': serializer.errors})
+            return
+        
+        # 별도 태스크로 실행해야 생성 중에도 disconnect 메시지를 처리할 수 있음
+        self.generation = asyncio.create_task(self.stream_story(serializer.validated_data))
+    
+    async def stream_story(self, data):
+        """제목, 본문/챕터 델타, 저장 완료(saved) 이벤트를 순서대로 전송"""
+        from stories.views import story_stream_events
+        
+        async with aclosing(story_stream_events(self.user, data)) as events:
+            async for event in events:
+                await self.send(text_data=json.dumps(event, cls=DjangoJSONEncoder))
+
+
 class NotificationConsumer(BaseConsumer):
     """실시간 알림 Consumer"""
     
@@ -6,4 +6,5 @@ websocket_urlpatterns = [
     re_path(r'ws/emotion/$', consumers.EmotionConsumer.as_asgi()),
     re_path(r'ws/music/$', consumers.MusicConsumer.as_asgi()),
     re_path(r'ws/notifications/$', consumers.NotificationConsumer.as_asgi()),
+    re_path(r'ws/stories/generate/$', consumers.StoryStreamConsumer.as_asgi()),
 ]
\ No newline at end of file
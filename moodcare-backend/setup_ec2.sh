@@ -127,9 +127,70 @@ Restart=on-failure
 WantedBy=multi-user.target
 EOL
 
-# Reload systemd and enable service
+# Background voice analysis worker (Celery)
+sudo tee /etc/systemd/system/moodcare-voice-worker.service > /dev/null << EOL
+[Unit]
+Description=MoodCare voice analysis worker
+After=network.target
+
+[Service]
+Type=simple
+User=ubuntu
+Group=ubuntu
+WorkingDirectory=/home/ubuntu/moodcare/moodcare-backend
+Environment="PATH=/home/ubuntu/moodcare/moodcare-backend/venv/bin"
+ExecStart=/home/ubuntu/moodcare/moodcare-backend/venv/bin/celery -A moodcare worker -Q voice --pool=threads --concurrency=8 --loglevel=info
+Restart=on-failure
+
+[Install]
+WantedBy=multi-user.target
+EOL
+
+# Background worker for the default queue (batched offline uploads), story
+# chapter pre-generation and story pool refills
+sudo tee /etc/systemd/system/moodcare-worker.service > /dev/null << EOL
+[Unit]
+Description=MoodCare background worker
+After=network.target
+
+[Service]
+Type=simple
+User=ubuntu
+Group=ubuntu
+WorkingDirectory=/home/ubuntu/moodcare/moodcare-backend
+Environment="PATH=/home/ubuntu/moodcare/moodcare-backend/venv/bin"
+ExecStart=/home/ubuntu/moodcare/moodcare-backend/venv/bin/celery -A moodcare worker -Q celery,story-pool,speculation --pool=threads --concurrency=4 --loglevel=info
+Restart=on-failure
+
+[Install]
+WantedBy=multi-user.target
+EOL
+
+# Scheduler for periodic tasks (story pool demand and refills)
+sudo tee /etc/systemd/system/moodcare-beat.service > /dev/null << EOL
+[Unit]
+Description=MoodCare periodic task scheduler
+After=network.target
+
+[Service]
+Type=simple
+User=ubuntu
+Group=ubuntu
+WorkingDirectory=/home/ubuntu/moodcare/moodcare-backend
+Environment="PATH=/home/ubuntu/moodcare/moodcare-backend/venv/bin"
+ExecStart=/home/ubuntu/moodcare/moodcare-backend/venv/bin/celery -A moodcare beat --loglevel=info
+Restart=on-failure
+
+[Install]
+WantedBy=multi-user.target
+EOL
+
+# Reload systemd and enable services
 sudo systemctl daemon-reload
 sudo systemctl enable moodcare
+sudo systemctl enable moodcare-voice-worker
+sudo systemctl enable moodcare-worker
+sudo systemctl enable moodcare-beat
 
 echo "✅ EC2 setup complete!"
 echo ""
@@ -137,7 +198,7 @@ echo "📋 Next steps:"
 echo "1. Edit .env file to add your API keys"
 echo "2. Start the server with: tmux new -s moodcare"
 echo "3. In tmux, run: source venv/bin/activate && python manage.py runserver 0.0.0.0:8000"
-echo "4. Or use systemd: sudo systemctl start moodcare"
+echo "4. Or use systemd: sudo systemctl start moodcare moodcare-voice-worker moodcare-worker moodcare-beat"
 echo ""
 echo "🌐 Your server will be accessible at:"
 echo "   http://$(curl -s http://169.254.169.254/latest/meta-data/public-ipv4):8000"
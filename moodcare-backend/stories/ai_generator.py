@@ -1,18 +1,30 @@
 """
 AI Story Generator using GPT-4
 """
-import openai
 import json
-from typing import Dict, List, Optional
+import logging
+from typing import AsyncIterator, Dict, List, Optional
 from django.conf import settings
 import random
 
+from ai_analysis.clients import get_async_openai_client, get_openai_client, registry
+from ai_analysis.coalesce import SingleFlight
+from ai_analysis.jsonstream import IncrementalJSONParser
+from ai_analysis.upstream import acreate_completion, create_completion, guard_for
+from emotions import history
+
+logger = logging.getLogger(__name__)
+
+# Identical concurrent generate requests from one user (e.g. a double submit)
+# share one story; the key includes the user, so users never share a story
+story_flights = SingleFlight('story')
+
 
 class StoryGenerator:
     """Generate interactive stories based on emotional context"""
     
     def __init__(self):
-        self.client = openai.OpenAI(api_key=settings.OPENAI_API_KEY)
+        self.client = get_openai_client()
         
         # Story templates for different emotions
         self.emotion_themes = {
@@ -38,7 +50,9 @@ class StoryGenerator:
                       emotion_intensity: int,
                       target_emotion: Optional[str] = None,
                       preferences: Optional[Dict] = None,
-                      length: str = 'medium') -> Dict:
+                      length: str = 'medium',
+                      emotion_history: Optional[Dict] = None,
+                      user_id: Optional[int] = None) -> Dict:
         """
         Generate a personalized story based on emotional state
         
@@ -49,11 +63,59 @@ class StoryGenerator:
             target_emotion: Desired emotional state after reading
             preferences: User preferences (themes, characters, etc.)
             length: Story length (short, medium, long)
+            emotion_history: Summary from emotions.history.summarize_user,
+                added to the prompt as a fixed-size block
+            user_id: Requesting user; identical concurrent requests from
+                the same user share one generation (none without it)
         
         Returns:
             Dictionary containing story content and metadata
         """
         
+        try:
+            return self.build_story(
+                story_type, current_emotion, emotion_intensity,
+                target_emotion, preferences, length, emotion_history, user_id=user_id
+            )
+            
+        except Exception as e:
+            logger.warning(f"Story generation failed, using the fallback story: {e}")
+            return self._get_fallback_story(story_type, current_emotion)
+    
+    def build_story(self, story_type: str, current_emotion: str, emotion_intensity: int,
+                    target_emotion: Optional[str] = None, preferences: Optional[Dict] = None,
+                    length: str = 'medium', emotion_history: Optional[Dict] = None,
+                    user_id: Optional[int] = None, endpoint: str = 'story') -> Dict:
+        """
+        New story; raises instead of falling back.
+        
+        Only calls for a ``user_id`` are coalesced. The story pool passes
+        none, so its stories for the same arguments are each distinct.
+        """
+        request, selected_theme = self._story_request(
+            story_type, current_emotion, emotion_intensity,
+            target_emotion, preferences, length, emotion_history
+        )
+        
+        # Generate story with GPT-4
+        def generate():
+            return self._parse_story(
+                create_completion(self.client, request, endpoint),
+                selected_theme, story_type, current_emotion, target_emotion
+            )
+        
+        if user_id is None:
+            return generate()
+        key = story_flights.make_key(
+            user_id, story_type, current_emotion, emotion_intensity,
+            target_emotion, preferences, length, emotion_history
+        )
+        return story_flights.do(key, generate)
+    
+    def _story_request(self, story_type, current_emotion, emotion_intensity,
+                       target_emotion, preferences, length, emotion_history=None):
+        """Build chat completion arguments and pick the theme for a new story"""
+        
         # Select appropriate themes
         themes = self.emotion_themes.get(current_emotion, ['journey'])
         selected_theme = random.choice(themes)
@@ -64,49 +126,54 @@ class StoryGenerator:
         # Build story prompt
         prompt = self._build_story_prompt(
             story_type, current_emotion, emotion_intensity,
-            target_emotion, selected_theme, preferences, min_words, max_words
+            target_emotion, selected_theme, preferences, min_words, max_words,
+            emotion_history
         )
         
-        try:
-            # Generate story with GPT-4
-            response = self.client.chat.completions.create(
-                model="gpt-4-turbo-preview",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are a master storyteller and therapeutic narrative designer. Create immersive, emotionally intelligent stories that help people process and transform their emotions."
-                    },
-                    {"role": "user", "content": prompt}
-                ],
-                response_format={"type": "json_object"},
-                temperature=0.8,
-                max_tokens=4000
+        request = {
+            'model': "gpt-4-turbo-preview",
+            'messages': [
+                {
+                    "role": "system",
+                    "content": "You are a master storyteller and therapeutic narrative designer. Create immersive, emotionally intelligent stories that help people process and transform their emotions."
+                },
+                {"role": "user", "content": prompt}
+            ],
+            'response_format': {"type": "json_object"},
+            'temperature': 0.8,
+            'max_tokens': 4000
+        }
+        return request, selected_theme
+    
+    def _parse_story(self, response, selected_theme, story_type,
+                     current_emotion, target_emotion) -> Dict:
+        """Parse a story completion and add metadata"""
+        return self._finish_story(
+            json.loads(response.choices[0].message.content),
+            selected_theme, story_type, current_emotion, target_emotion
+        )
+    
+    def _finish_story(self, story_data, selected_theme, story_type,
+                      current_emotion, target_emotion) -> Dict:
+        """Add metadata to the story JSON returned by the model"""
+        # Add metadata
+        story_data['theme'] = selected_theme
+        story_data['word_count'] = len(story_data.get('content', '').split())
+        story_data['reading_time'] = story_data['word_count'] // 200  # Average reading speed
+        
+        # Generate interactive choices if not present
+        if 'choices' not in story_data and story_type in ['adventure', 'fantasy']:
+            story_data['choices'] = self._generate_choices(
+                story_data['content'],
+                current_emotion,
+                target_emotion
             )
-            
-            # Parse response
-            story_data = json.loads(response.choices[0].message.content)
-            
-            # Add metadata
-            story_data['theme'] = selected_theme
-            story_data['word_count'] = len(story_data.get('content', '').split())
-            story_data['reading_time'] = story_data['word_count'] // 200  # Average reading speed
-            
-            # Generate interactive choices if not present
-            if 'choices' not in story_data and story_type in ['adventure', 'fantasy']:
-                story_data['choices'] = self._generate_choices(
-                    story_data['content'],
-                    current_emotion,
-                    target_emotion
-                )
-            
-            return story_data
-            
-        except Exception as e:
-            print(f"Error generating story: {str(e)}")
-            return self._get_fallback_story(story_type, current_emotion)
+        
+        return story_data
     
     def _build_story_prompt(self, story_type, current_emotion, intensity,
-                           target_emotion, theme, preferences, min_words, max_words):
+                           target_emotion, theme, preferences, min_words, max_words,
+                           emotion_history=None):
         """Build detailed prompt for story generation"""
         
         prompt = f"""
@@ -123,6 +190,10 @@ class StoryGenerator:
         - Style: Immersive, therapeutic, and emotionally resonant
         """
         
+        if emotion_history and emotion_history.get('records'):
+            prompt += "\n\nEMOTIONAL HISTORY (summary, for subtle personalization):\n"
+            prompt += history.render(emotion_history) + "\n"
+        
         if preferences:
             prompt += f"\n\nUSER PREFERENCES:\n"
             for key, value in preferences.items():
@@ -205,6 +276,30 @@ class StoryGenerator:
             Dictionary with next chapter content
         """
         
+        try:
+            return self.generate_continuation(choice_id, story_context)
+            
+        except Exception as e:
+            logger.warning(f"Story continuation failed, using the fallback chapter: {e}")
+            return self._get_fallback_continuation(story_context)
+    
+    def generate_continuation(self, choice_id: str, story_context: Dict,
+                              endpoint: str = 'story-continuation') -> Dict:
+        """Next chapter for a choice; raises instead of falling back (used for pre-generation)"""
+        response = create_completion(
+            self.client, self._continuation_request(choice_id, story_context), endpoint
+        )
+        return self._parse_continuation(response)
+    
+    @staticmethod
+    def _parse_continuation(response) -> Dict:
+        chapter = json.loads(response.choices[0].message.content)
+        chapter['total_tokens'] = response.usage.total_tokens if response.usage else 0
+        return chapter
+    
+    def _continuation_request(self, choice_id: str, story_context: Dict) -> Dict:
+        """Build chat completion arguments for the next chapter"""
+        
         prompt = f"""
         Continue this interactive story based on the user's choice:
         
@@ -230,30 +325,27 @@ class StoryGenerator:
         - "key_development": string
         """
         
-        try:
-            response = self.client.chat.completions.create(
-                model="gpt-4-turbo-preview",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are continuing an interactive therapeutic story. Maintain consistency while advancing the narrative based on user choices."
-                    },
-                    {"role": "user", "content": prompt}
-                ],
-                response_format={"type": "json_object"},
-                temperature=0.7,
-                max_tokens=1000
-            )
-            
-            return json.loads(response.choices[0].message.content)
-            
-        except Exception as e:
-            print(f"Error continuing story: {str(e)}")
-            return {
-                'chapter_number': story_context.get('current_chapter', 1) + 1,
-                'content': 'The story continues on your chosen path...',
-                'emotional_tone': 'neutral'
-            }
+        return {
+            'model': "gpt-4-turbo-preview",
+            'messages': [
+                {
+                    "role": "system",
+                    "content": "You are continuing an interactive therapeutic story. Maintain consistency while advancing the narrative based on user choices."
+                },
+                {"role": "user", "content": prompt}
+            ],
+            'response_format': {"type": "json_object"},
+            'temperature': 0.7,
+            'max_tokens': 1000
+        }
+    
+    def _get_fallback_continuation(self, story_context: Dict) -> Dict:
+        """Return a minimal next chapter if continuation fails"""
+        return {
+            'chapter_number': story_context.get('current_chapter', 1) + 1,
+            'content': 'The story continues on your chosen path...',
+            'emotional_tone': 'neutral'
+        }
     
     def _get_fallback_story(self, story_type: str, emotion: str) -> Dict:
         """Return a fallback story if generation fails"""
@@ -287,4 +379,154 @@ class StoryGenerator:
             }
         }
         
-        return fallback_stories.get(story_type, fallback_stories['healing'])
\ No newline at end of file
+        return fallback_stories.get(story_type, fallback_stories['healing'])
+
+
+class AsyncStoryGenerator(StoryGenerator):
+    """Story generation on the async OpenAI client for ASGI views"""
+    
+    @property
+    def async_client(self):
+        return get_async_openai_client()
+    
+    async def generate_story(self,
+                             story_type: str,
+                             current_emotion: str,
+                             emotion_intensity: int,
+                             target_emotion: Optional[str] = None,
+                             preferences: Optional[Dict] = None,
+                             length: str = 'medium',
+                             emotion_history: Optional[Dict] = None,
+                             user_id: Optional[int] = None) -> Dict:
+        """Async counterpart of StoryGenerator.generate_story"""
+        request, selected_theme = self._story_request(
+            story_type, current_emotion, emotion_intensity,
+            target_emotion, preferences, length, emotion_history
+        )
+        
+        async def fetch():
+            response = await acreate_completion(self.async_client, request, 'story')
+            return self._parse_story(
+                response, selected_theme, story_type, current_emotion, target_emotion
+            )
+        
+        try:
+            if user_id is None:
+                return await fetch()
+            key = story_flights.make_key(
+                user_id, story_type, current_emotion, emotion_intensity,
+                target_emotion, preferences, length, emotion_history
+            )
+            return await story_flights.ado(key, fetch)
+            
+        except Exception as e:
+            logger.warning(f"Async story generation failed, using the fallback story: {e}")
+            return self._get_fallback_story(story_type, current_emotion)
+    
+    async def stream_story(self,
+                           story_type: str,
+                           current_emotion: str,
+                           emotion_intensity: int,
+                           target_emotion: Optional[str] = None,
+                           preferences: Optional[Dict] = None,
+                           length: str = 'medium',
+                           emotion_history: Optional[Dict] = None) -> AsyncIterator[Dict]:
+        """
+        Generate a story like generate_story, yielding it while tokens arrive
+        
+        Yields ``title``, ``content_delta``, ``chapter_delta`` (index, text)
+        and ``chapter`` (index, chapter) events as the JSON is parsed, then
+        one ``story`` event with the data generate_story would return.
+        If generation fails, an ``error`` event comes first and the story
+        is the fallback (``fallback`` true); it replaces any text streamed
+        so far. Streams are not
+        coalesced: every reader gets its own tokens. Closing the generator
+        early closes the upstream stream.
+        """
+        request, selected_theme = self._story_request(
+            story_type, current_emotion, emotion_intensity,
+            target_emotion, preferences, length, emotion_history
+        )
+        
+        parser = IncrementalJSONParser()
+        stream = None
+        streamed = False
+        try:
+            # The guard bounds the wait for the first token; the same timeout
+            # then applies to every read, so a stalled stream fails too
+            stream = await acreate_completion(
+                self.async_client, {**request, 'stream': True}, 'story-stream'
+            )
+            async for chunk in stream:
+                text = chunk.choices[0].delta.content if chunk.choices else None
+                if not text:
+                    continue
+                for event in parser.feed(text):
+                    message = self._stream_message(event)
+                    if message is not None:
+                        yield message
+            streamed = True
+            
+            story_data = self._finish_story(
+                parser.close(), selected_theme, story_type, current_emotion, target_emotion
+            )
+            fallback = False
+            
+        except Exception as e:
+            logger.warning(f"Story stream failed, sending the fallback story: {e}")
+            if stream is not None and not streamed:
+                # The guard counted the call once the response started; a
+                # stream that breaks or stalls after that is a failure too
+                guard_for('story-stream').stream_failed(e)
+            yield {
+                'type': 'error',
+                'message': 'Story generation failed; a fallback story follows',
+                'fallback': True
+            }
+            story_data = self._get_fallback_story(story_type, current_emotion)
+            fallback = True
+        finally:
+            if stream is not None:
+                await stream.response.aclose()
+        
+        yield {'type': 'story', 'story': story_data, 'fallback': fallback}
+    
+    @staticmethod
+    def _stream_message(event) -> Optional[Dict]:
+        """Client event for a parser event; other fields only arrive with the final story"""
+        kind, path, value = event
+        if kind == 'delta':
+            if path == ('content',):
+                return {'type': 'content_delta', 'text': value}
+            if len(path) == 3 and path[0] == 'chapters' and path[2] == 'text':
+                return {'type': 'chapter_delta', 'index': path[1], 'text': value}
+        elif path == ('title',):
+            return {'type': 'title', 'title': value}
+        elif len(path) == 2 and path[0] == 'chapters' and isinstance(value, dict):
+            return {'type': 'chapter', 'index': path[1], 'chapter': value}
+        return None
+    
+    async def continue_story(self, story_id: str, choice_id: str,
+                             story_context: Dict) -> Dict:
+        """Async counterpart of StoryGenerator.continue_story"""
+        try:
+            response = await acreate_completion(
+                self.async_client, self._continuation_request(choice_id, story_context),
+                'story-continuation'
+            )
+            
+            return self._parse_continuation(response)
+            
+        except Exception as e:
+            logger.warning(f"Async story continuation failed, using the fallback chapter: {e}")
+            return self._get_fallback_continuation(story_context)
+
+
+def get_story_generator() -> StoryGenerator:
+    """Process-wide StoryGenerator sharing the pooled upstream clients"""
+    return registry.get('story_generator', StoryGenerator)
+
+
+def get_async_story_generator() -> AsyncStoryGenerator:
+    """Process-wide AsyncStoryGenerator sharing the pooled upstream clients"""
+    return registry.get('async_story_generator', AsyncStoryGenerator)
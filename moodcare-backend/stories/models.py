@@ -18,7 +18,9 @@ class Story(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='stories')
     title = models.CharField(max_length=255)
-    content = models.TextField()
+    # Opening excerpt used as context for continuations; the text itself
+    # lives in StoryChapter rows so the story row stays small
+    summary = models.TextField(blank=True, default='')
     story_type = models.CharField(max_length=20, choices=STORY_TYPES, default='healing')
     
     # Emotion context
@@ -41,12 +43,147 @@ class Story(models.Model):
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['user', '-created_at']),
+            models.Index(fields=['user', 'updated_at']),
             models.Index(fields=['story_type', 'is_completed']),
         ]
     
     def __str__(self):
         return f"{self.title} - {self.user.username}"
 
+class StoryChapter(models.Model):
+    """One chapter of a story; chapters are appended, never rewritten"""
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    story = models.ForeignKey(Story, on_delete=models.CASCADE, related_name='chapters')
+    # Denormalized from the story for per-user sync and ownership checks
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='story_chapters')
+    number = models.PositiveIntegerField()
+    title = models.CharField(max_length=255, blank=True, default='')
+    content = models.TextField()
+    
+    # The choice that led here, and the choices offered at the end
+    choice_id = models.CharField(max_length=50, null=True, blank=True)
+    choices = models.JSONField(default=list)
+    emotional_tone = models.CharField(max_length=50, blank=True, default='')
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['story', 'number']
+        constraints = [
+            models.UniqueConstraint(fields=['story', 'number'], name='unique_story_chapter_number'),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'updated_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.story.title} - Chapter {self.number}"
+
+class SpeculativeChapter(models.Model):
+    """
+    A continuation generated ahead of time for one choice offered at a chapter.
+    
+    Rows are kept (without their chapter data once settled) for the hit
+    rate and wasted-token statistics in stories.speculation.stats().
+    """
+    
+    STATUS_PENDING = 'pending'      # queued or generating
+    STATUS_READY = 'ready'          # generated, waiting for the reader
+    STATUS_USED = 'used'            # served by continue_story (hit)
+    STATUS_LATE = 'late'            # chosen while still generating (miss)
+    STATUS_MISSED = 'missed'        # chosen without a pre-generation (miss)
+    STATUS_WASTED = 'wasted'        # generated but another choice was made
+    STATUS_CANCELLED = 'cancelled'  # dropped before it was generated
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_READY, 'Ready'),
+        (STATUS_USED, 'Used'),
+        (STATUS_LATE, 'Late'),
+        (STATUS_MISSED, 'Missed'),
+        (STATUS_WASTED, 'Wasted'),
+        (STATUS_CANCELLED, 'Cancelled'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    story = models.ForeignKey(Story, on_delete=models.CASCADE, related_name='speculative_chapters')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='speculative_chapters')
+    chapter = models.PositiveIntegerField(help_text="Chapter at which the choice is offered")
+    choice_id = models.CharField(max_length=50)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    data = models.JSONField(default=dict)  # continue_story result while ready
+    total_tokens = models.IntegerField(default=0)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['story', 'chapter', 'choice_id'], name='unique_speculative_chapter'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'created_at']),
+            models.Index(fields=['created_at', 'status']),
+        ]
+    
+    def __str__(self):
+        return f"{self.story_id} chapter {self.chapter} / {self.choice_id}: {self.status}"
+
+class StoryPoolSlot(models.Model):
+    """
+    One pool of ready-made stories for a common kind of generate request.
+    
+    Demand is counted per refresh interval and smoothed into ``demand``;
+    stories.pool.refresh() derives ``target_depth`` from it.
+    """
+    
+    story_type = models.CharField(max_length=20, choices=Story.STORY_TYPES)
+    current_emotion = models.CharField(max_length=50)
+    intensity_bucket = models.PositiveSmallIntegerField()
+    length = models.CharField(max_length=10)
+    
+    requests = models.PositiveIntegerField(default=0)  # since the last refresh
+    demand = models.FloatField(default=0.0)  # smoothed requests per refresh interval
+    target_depth = models.PositiveIntegerField(default=0)
+    hits = models.PositiveIntegerField(default=0)
+    misses = models.PositiveIntegerField(default=0)
+    expired = models.PositiveIntegerField(default=0)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['story_type', 'current_emotion', 'intensity_bucket', 'length'],
+                name='unique_story_pool_slot'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.story_type}/{self.current_emotion}/{self.intensity_bucket}/{self.length}"
+
+class PooledStory(models.Model):
+    """A generated story waiting in a pool; deleted when claimed"""
+    
+    slot = models.ForeignKey(StoryPoolSlot, on_delete=models.CASCADE, related_name='stories')
+    story_data = models.JSONField()  # StoryGenerator.generate_story result
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['slot', 'created_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.slot} - {self.story_data.get('title', '')}"
+
 class StoryInteraction(models.Model):
     """Track user interactions with stories"""
     
@@ -0,0 +1,191 @@
+"""
+Pool of pre-generated stories for common generate requests
+
+Many generate requests ask for the same kind of story (a short healing
+story for sadness, say). Stories are generated ahead of time into pools
+keyed by (story_type, current_emotion, intensity bucket, length), and
+StoryViewSet.generate claims one in a single query instead of waiting for
+the model.
+
+Only requests without preferences or a target emotion are served from a
+pool; anything more specific is generated live, personalized with the
+user's emotion history. Pooled stories are generated without it.
+
+Every STORY_POOL_REFRESH_SECONDS, stories.tasks.refresh_story_pools folds
+each pool's requests into a smoothed demand and sets its target depth.
+stories.tasks.refill_story_pool then generates the shortfall. Pools
+nobody asks for drain to zero, and stories older than
+STORY_POOL_MAX_AGE_HOURS are dropped.
+"""
+import logging
+from datetime import timedelta
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from emotions.models import Emotion
+from .models import PooledStory, StoryPoolSlot
+
+logger = logging.getLogger(__name__)
+
+# Inclusive intensity ranges pooled together; stories are written for the midpoint
+INTENSITY_BUCKETS = ((1, 3), (4, 7), (8, 10))
+POOLED_EMOTIONS = {emotion for emotion, _ in Emotion.EMOTION_TYPES}
+# Attempts to take a story before treating the request as a miss
+CLAIM_ATTEMPTS = 3
+
+
+def intensity_bucket(intensity: int) -> int:
+    for bucket, (low, high) in enumerate(INTENSITY_BUCKETS):
+        if low <= intensity <= high:
+            return bucket
+    return len(INTENSITY_BUCKETS) - 1
+
+
+def bucket_intensity(bucket: int) -> int:
+    low, high = INTENSITY_BUCKETS[bucket]
+    return (low + high) // 2
+
+
+def slot_key(data: Dict) -> Optional[Dict]:
+    """
+    Pool key for a validated StoryCreateRequestSerializer payload, or None
+    when the request is too specific to be served from a pool
+    """
+    if not getattr(settings, 'STORY_POOL_ENABLED', True):
+        return None
+    if data.get('preferences') or data.get('target_emotion'):
+        return None
+    emotion = data['current_emotion'].strip().lower()
+    if emotion not in POOLED_EMOTIONS:
+        return None
+    return {
+        'story_type': data['story_type'],
+        'current_emotion': emotion,
+        'intensity_bucket': intensity_bucket(data['emotion_intensity']),
+        'length': data.get('length', 'medium'),
+    }
+
+
+def claim(data: Dict) -> Optional[Dict]:
+    """
+    Take a pooled story matching the request, or None to generate live.
+
+    Concurrent claims never get the same story: a story is taken by
+    deleting its row, and a claim that loses the race tries the next one.
+    """
+    key = slot_key(data)
+    if key is None:
+        return None
+
+    slot, _ = StoryPoolSlot.objects.get_or_create(**key)
+    story_data = None
+    for _ in range(CLAIM_ATTEMPTS):
+        with transaction.atomic():
+            pooled = (
+                PooledStory.objects.select_for_update(skip_locked=True)
+                .filter(slot=slot).order_by('created_at').first()
+            )
+            if pooled is None:
+                break
+            if PooledStory.objects.filter(pk=pooled.pk).delete()[0]:
+                story_data = pooled.story_data
+                break
+
+    counter = 'hits' if story_data is not None else 'misses'
+    StoryPoolSlot.objects.filter(pk=slot.pk).update(
+        requests=F('requests') + 1, **{counter: F(counter) + 1}
+    )
+    if slot.target_depth and PooledStory.objects.filter(slot=slot).count() < slot.target_depth:
+        schedule_refill(slot)
+    return story_data
+
+
+def target_depth(demand: float) -> int:
+    """Stories to keep ready for a smoothed demand per refresh interval"""
+    depth = int(demand * getattr(settings, 'STORY_POOL_HEADROOM', 1.5) + 0.5)
+    return min(depth, getattr(settings, 'STORY_POOL_MAX_DEPTH', 10))
+
+
+def refresh() -> List[StoryPoolSlot]:
+    """
+    Fold each pool's requests into its demand, set its target depth and
+    drop stale stories. Returns the slots below their target.
+    """
+    smoothing = getattr(settings, 'STORY_POOL_DEMAND_SMOOTHING', 0.3)
+    max_age = timedelta(hours=getattr(settings, 'STORY_POOL_MAX_AGE_HOURS', 24))
+    stale = PooledStory.objects.filter(created_at__lt=timezone.now() - max_age)
+
+    below_target = []
+    slots = StoryPoolSlot.objects.annotate(depth=Count('stories'))
+    for slot in slots:
+        expired = stale.filter(slot=slot).delete()[0]
+        demand = smoothing * slot.requests + (1 - smoothing) * slot.demand
+        target = target_depth(demand)
+        # Requests counted meanwhile are kept for the next refresh
+        StoryPoolSlot.objects.filter(pk=slot.pk).update(
+            requests=F('requests') - slot.requests, demand=demand,
+            target_depth=target, expired=F('expired') + expired,
+            updated_at=timezone.now()
+        )
+        slot.demand, slot.target_depth = demand, target
+        if slot.depth - expired < target:
+            below_target.append(slot)
+    return below_target
+
+
+def refill_lock(slot_id: int) -> str:
+    return f"story-pool:refill:{slot_id}"
+
+
+def schedule_refill(slot: StoryPoolSlot):
+    """Queue a refill of one pool, unless one is already running"""
+    from .tasks import refill_story_pool
+
+    if cache.get(refill_lock(slot.pk)):
+        return
+    slot_id = slot.pk
+
+    def enqueue():
+        try:
+            refill_story_pool.delay(slot_id)
+        except Exception as e:
+            # The periodic refresh will catch up; never fail the request for it
+            logger.warning(f"Could not queue a refill of story pool {slot_id}: {e}")
+
+    transaction.on_commit(enqueue)
+
+
+def stats() -> Dict:
+    """Depth, target, demand and hit rate per pool"""
+    slots = StoryPoolSlot.objects.annotate(depth=Count('stories')).order_by(
+        'story_type', 'current_emotion', 'intensity_bucket', 'length'
+    )
+    pools = []
+    hits = misses = 0
+    for slot in slots:
+        hits += slot.hits
+        misses += slot.misses
+        pools.append({
+            'story_type': slot.story_type,
+            'current_emotion': slot.current_emotion,
+            'intensity': list(INTENSITY_BUCKETS[slot.intensity_bucket]),
+            'length': slot.length,
+            'depth': slot.depth,
+            'target_depth': slot.target_depth,
+            'demand': round(slot.demand, 3),
+            'hits': slot.hits,
+            'misses': slot.misses,
+            'expired': slot.expired,
+        })
+    lookups = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': round(hits / lookups, 4) if lookups else 0.0,
+        'pools': pools,
+    }
@@ -1,22 +1,47 @@
 from rest_framework import serializers
-from .models import Story, StoryInteraction, StoryTemplate
+from .models import Story, StoryChapter, StoryInteraction, StoryTemplate
 
 
 class StorySerializer(serializers.ModelSerializer):
-    """Serializer for Story model"""
+    """Story metadata for lists; no chapter text or large JSON fields"""
     user = serializers.StringRelatedField(read_only=True)
     
     class Meta:
         model = Story
         fields = [
-            'id', 'user', 'title', 'content', 'story_type',
-            'emotion_context', 'emotion_tags', 'current_chapter',
-            'choices_made', 'story_branches', 'reading_time',
-            'is_completed', 'created_at', 'updated_at', 'last_read_at'
+            'id', 'user', 'title', 'story_type', 'emotion_tags', 'current_chapter',
+            'reading_time', 'is_completed', 'created_at', 'updated_at', 'last_read_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
 
 
+class StoryDetailSerializer(StorySerializer):
+    """Story with its chapter outline; chapter text comes from the chapters endpoint"""
+    chapters = serializers.SerializerMethodField()
+    
+    class Meta(StorySerializer.Meta):
+        fields = StorySerializer.Meta.fields + [
+            'summary', 'emotion_context', 'choices_made', 'story_branches', 'chapters'
+        ]
+    
+    def get_chapters(self, obj):
+        return list(
+            obj.chapters.order_by('number').values('number', 'title', 'emotional_tone', 'created_at')
+        )
+
+
+class StoryChapterSerializer(serializers.ModelSerializer):
+    """Serializer for StoryChapter model"""
+    
+    class Meta:
+        model = StoryChapter
+        fields = [
+            'number', 'title', 'content', 'choice_id', 'choices',
+            'emotional_tone', 'created_at'
+        ]
+        read_only_fields = fields
+
+
 class StoryCreateRequestSerializer(serializers.Serializer):
     """Serializer for story generation request"""
     story_type = serializers.ChoiceField(choices=Story.STORY_TYPES)
@@ -0,0 +1,222 @@
+"""
+Speculative pre-generation of story continuations
+
+While the reader is on a chapter, a background task generates the next
+chapter for each choice offered there (stories.tasks.pregenerate_continuations),
+stored as SpeculativeChapter rows keyed by (story, chapter, choice_id).
+continue_story claims the row for the picked choice and serves it without
+an LLM round trip; otherwise it generates live as before.
+
+Work is bounded per subscription tier (STORY_SPECULATION_TIERS): how many
+choices are pre-generated per chapter and how many tokens a user's
+speculation may spend per day. Once a choice is made, pending work for
+the other choices is cancelled. Results finished for them count as
+wasted tokens in ``stats()``.
+"""
+import logging
+from datetime import timedelta
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from .models import SpeculativeChapter, StoryChapter
+
+logger = logging.getLogger(__name__)
+
+# Lookups a choice can end in; hits are STATUS_USED
+LOOKUP_STATUSES = (
+    SpeculativeChapter.STATUS_USED, SpeculativeChapter.STATUS_LATE, SpeculativeChapter.STATUS_MISSED,
+)
+# Generated for nothing: another choice was made, or the reader was faster
+WASTED_STATUSES = (SpeculativeChapter.STATUS_WASTED, SpeculativeChapter.STATUS_LATE)
+
+
+def tier_budget(user) -> Dict:
+    tiers = getattr(settings, 'STORY_SPECULATION_TIERS', {})
+    return tiers.get(getattr(user, 'subscription_tier', 'free'), {'max_choices': 0, 'daily_tokens': 0})
+
+
+def token_estimate() -> int:
+    return getattr(settings, 'STORY_SPECULATION_TOKEN_ESTIMATE', 1500)
+
+
+def offered_choice_ids(choices, chapter: int) -> List[str]:
+    """
+    Choice IDs a reader can pick at the end of ``chapter``.
+
+    Accepts decision points with ``options`` (as from
+    StoryGenerator._generate_choices, where the point for the next chapter
+    is offered) or a flat list of choices with ``id``.
+    """
+    points = [point for point in choices or [] if isinstance(point, dict)]
+    with_options = [point for point in points if point.get('options')]
+    if with_options:
+        current = [point for point in with_options if point.get('chapter') == chapter + 1]
+        return [
+            str(option['id'])
+            for point in current or with_options[:1]
+            for option in point['options']
+            if isinstance(option, dict) and option.get('id')
+        ]
+    return [str(point['id']) for point in points if point.get('id')]
+
+
+def choice_context(story, choice_id: str) -> Dict:
+    """The continuation context continue_story would build for this choice"""
+    return {
+        'current_chapter': story.current_chapter,
+        'choices_made': story.choices_made + [{
+            'chapter': story.current_chapter,
+            'choice_id': choice_id,
+            'timestamp': timezone.now().isoformat()
+        }],
+        'summary': story.summary
+    }
+
+
+def tokens_available(user) -> int:
+    """Today's remaining speculation tokens; pending work counts at the estimate"""
+    since = timezone.localtime().replace(hour=0, minute=0, second=0, microsecond=0)
+    today = SpeculativeChapter.objects.filter(user=user, created_at__gte=since)
+    spent = today.aggregate(total=Sum('total_tokens'))['total'] or 0
+    pending = today.filter(status=SpeculativeChapter.STATUS_PENDING).count()
+    return tier_budget(user).get('daily_tokens', 0) - spent - pending * token_estimate()
+
+
+def reserve(story) -> List[SpeculativeChapter]:
+    """Pending rows for the choices to pre-generate at the story's current chapter"""
+    budget = tier_budget(story.user)
+    chapter = StoryChapter.objects.filter(story=story, number=story.current_chapter).first()
+    if chapter is None or budget.get('max_choices', 0) <= 0:
+        return []
+
+    choice_ids = offered_choice_ids(chapter.choices, story.current_chapter)
+    affordable = max(0, tokens_available(story.user) // token_estimate())
+    rows = []
+    for choice_id in choice_ids[:min(budget['max_choices'], affordable)]:
+        row, created = SpeculativeChapter.objects.get_or_create(
+            story=story, chapter=story.current_chapter, choice_id=choice_id,
+            defaults={'user': story.user}
+        )
+        if created:
+            rows.append(row)
+    return rows
+
+
+def is_wanted(row: SpeculativeChapter) -> bool:
+    """Still pending and the reader is still on that chapter"""
+    return SpeculativeChapter.objects.filter(
+        pk=row.pk, status=SpeculativeChapter.STATUS_PENDING,
+        story__current_chapter=row.chapter
+    ).exists()
+
+
+def store(row: SpeculativeChapter, data: Dict):
+    """Save a generated continuation; if it is no longer wanted, count it as waste"""
+    tokens = data.get('total_tokens', 0)
+    stored = SpeculativeChapter.objects.filter(
+        pk=row.pk, status=SpeculativeChapter.STATUS_PENDING
+    ).update(status=SpeculativeChapter.STATUS_READY, data=data, total_tokens=tokens,
+             updated_at=timezone.now())
+    if stored:
+        return
+    # Cancelled or chosen while generating: keep the tokens for the statistics
+    SpeculativeChapter.objects.filter(
+        pk=row.pk, status=SpeculativeChapter.STATUS_CANCELLED
+    ).update(status=SpeculativeChapter.STATUS_WASTED, total_tokens=tokens, updated_at=timezone.now())
+    SpeculativeChapter.objects.filter(
+        pk=row.pk, status=SpeculativeChapter.STATUS_LATE
+    ).update(total_tokens=tokens, updated_at=timezone.now())
+
+
+def fail(row: SpeculativeChapter):
+    SpeculativeChapter.objects.filter(
+        pk=row.pk, status=SpeculativeChapter.STATUS_PENDING
+    ).update(status=SpeculativeChapter.STATUS_FAILED, updated_at=timezone.now())
+
+
+def claim(story, choice_id: str) -> Optional[Dict]:
+    """
+    The pre-generated continuation for ``choice_id`` at the current
+    chapter, or None when continue_story must generate it live.
+    """
+    with transaction.atomic():
+        row, created = SpeculativeChapter.objects.select_for_update().get_or_create(
+            story=story, chapter=story.current_chapter, choice_id=choice_id,
+            defaults={'user_id': story.user_id, 'status': SpeculativeChapter.STATUS_MISSED}
+        )
+        if created:
+            return None
+        if row.status == SpeculativeChapter.STATUS_READY:
+            data = row.data
+            row.status = SpeculativeChapter.STATUS_USED
+            row.data = {}
+            row.save(update_fields=['status', 'data', 'updated_at'])
+            return data
+        if row.status == SpeculativeChapter.STATUS_PENDING:
+            row.status = SpeculativeChapter.STATUS_LATE
+            row.save(update_fields=['status', 'updated_at'])
+        return None
+
+
+def settle(story, chapter: int, choice_id: str):
+    """After a choice at ``chapter``: drop the other choices' speculation"""
+    others = SpeculativeChapter.objects.filter(story=story, chapter=chapter).exclude(choice_id=choice_id)
+    now = timezone.now()
+    others.filter(status=SpeculativeChapter.STATUS_PENDING).update(
+        status=SpeculativeChapter.STATUS_CANCELLED, updated_at=now
+    )
+    others.filter(status=SpeculativeChapter.STATUS_READY).update(
+        status=SpeculativeChapter.STATUS_WASTED, data={}, updated_at=now
+    )
+
+
+def schedule(story, user, choices):
+    """Queue pre-generation for the choices just offered at the story's current chapter"""
+    if tier_budget(user).get('max_choices', 0) <= 0:
+        return
+    if not offered_choice_ids(choices, story.current_chapter):
+        return
+
+    from .tasks import pregenerate_continuations
+
+    story_id, chapter = str(story.pk), story.current_chapter
+
+    def enqueue():
+        try:
+            pregenerate_continuations.delay(story_id, chapter)
+        except Exception as e:
+            # Speculation is an optimization; never fail the request for it
+            logger.warning(f"Could not queue pre-generation for story {story_id}: {e}")
+
+    transaction.on_commit(enqueue)
+
+
+def stats(hours: int = 24) -> Dict:
+    """Hit rate and token waste of speculation started in the last ``hours``"""
+    since = timezone.now() - timedelta(hours=hours)
+    rows = SpeculativeChapter.objects.filter(created_at__gte=since).values('status').annotate(
+        count=Count('id'), tokens=Sum('total_tokens')
+    )
+    by_status = {row['status']: {'count': row['count'], 'tokens': row['tokens'] or 0} for row in rows}
+
+    def total(statuses, key):
+        return sum(by_status.get(status, {}).get(key, 0) for status in statuses)
+
+    lookups = total(LOOKUP_STATUSES, 'count')
+    hits = total([SpeculativeChapter.STATUS_USED], 'count')
+    generated = sum(entry['tokens'] for entry in by_status.values())
+    wasted = total(WASTED_STATUSES, 'tokens')
+    return {
+        'hours': hours,
+        'by_status': by_status,
+        'lookups': lookups,
+        'hits': hits,
+        'hit_rate': round(hits / lookups, 4) if lookups else 0.0,
+        'tokens_generated': generated,
+        'tokens_wasted': wasted,
+        'waste_rate': round(wasted / generated, 4) if generated else 0.0,
+    }
@@ -0,0 +1,119 @@
+"""
+Background jobs for stories
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from celery import shared_task
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+
+from .models import PooledStory, Story, StoryPoolSlot
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(
+    acks_late=True,
+    soft_time_limit=getattr(settings, 'STORY_SPECULATION_TIME_LIMIT', 120),
+)
+def pregenerate_continuations(story_id: str, chapter: int):
+    """
+    Generate the next chapter for the choices offered at ``chapter``
+    ahead of the reader (see stories.speculation).
+
+    Choices are generated concurrently. A choice is skipped if the reader
+    has already moved on by the time its turn comes.
+    """
+    from . import speculation
+    from .ai_generator import get_story_generator
+
+    story = Story.objects.select_related('user').filter(pk=story_id).first()
+    if story is None or story.current_chapter != chapter:
+        return
+
+    rows = speculation.reserve(story)
+    if not rows:
+        return
+
+    generator = get_story_generator()
+
+    def generate(row):
+        try:
+            if not speculation.is_wanted(row):
+                return
+            data = generator.generate_continuation(
+                row.choice_id, speculation.choice_context(story, row.choice_id),
+                endpoint='story-speculation'
+            )
+            speculation.store(row, data)
+        except Exception as e:
+            logger.warning(f"Pre-generating story {story_id} choice {row.choice_id} failed: {e}")
+            speculation.fail(row)
+        finally:
+            connection.close()
+
+    with ThreadPoolExecutor(max_workers=len(rows)) as executor:
+        list(executor.map(generate, rows))
+
+
+@shared_task(acks_late=True)
+def refresh_story_pools():
+    """
+    Periodic (CELERY_BEAT_SCHEDULE): update pool demand and target depths,
+    then queue a refill for each pool below its target.
+    """
+    from . import pool
+
+    for slot in pool.refresh():
+        pool.schedule_refill(slot)
+
+
+@shared_task(
+    acks_late=True,
+    soft_time_limit=getattr(settings, 'STORY_POOL_TIME_LIMIT', 600),
+)
+def refill_story_pool(slot_id: int):
+    """
+    Generate stories into one pool until it reaches its target depth.
+
+    Up to STORY_POOL_REFILL_CONCURRENCY stories are generated at a time.
+    A cache lock keeps a second refill of the same pool from overfilling it.
+    """
+    from . import pool
+    from .ai_generator import get_story_generator
+
+    lock = pool.refill_lock(slot_id)
+    if not cache.add(lock, 1, timeout=getattr(settings, 'STORY_POOL_TIME_LIMIT', 600)):
+        return
+    try:
+        slot = StoryPoolSlot.objects.filter(pk=slot_id).first()
+        if slot is None:
+            return
+        missing = slot.target_depth - PooledStory.objects.filter(slot=slot).count()
+        if missing <= 0:
+            return
+
+        generator = get_story_generator()
+
+        def generate(_):
+            try:
+                story_data = generator.build_story(
+                    story_type=slot.story_type,
+                    current_emotion=slot.current_emotion,
+                    emotion_intensity=pool.bucket_intensity(slot.intensity_bucket),
+                    length=slot.length,
+                    endpoint='story-pool'
+                )
+                PooledStory.objects.create(slot=slot, story_data=story_data)
+            except Exception as e:
+                logger.warning(f"Generating a story for pool {slot} failed: {e}")
+            finally:
+                connection.close()
+
+        concurrency = max(1, min(getattr(settings, 'STORY_POOL_REFILL_CONCURRENCY', 3), missing))
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(generate, range(missing)))
+    finally:
+        cache.delete(lock)
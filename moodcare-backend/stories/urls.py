@@ -1,6 +1,12 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import StoryViewSet, StoryTemplateViewSet
+from .views import (
+    StoryViewSet,
+    StoryTemplateViewSet,
+    async_generate_story,
+    async_generate_story_stream,
+    async_continue_story
+)
 
 # Create routers
 router = DefaultRouter()
@@ -12,9 +18,16 @@ app_name = 'stories'
 urlpatterns = [
     path('', include(router.urls)),
     
+    # Native async generation endpoints (served without a threadpool under ASGI)
+    path('async/generate/', async_generate_story, name='story-async-generate'),
+    # Server-sent events: title, content/chapter deltas, then "saved" with the story id
+    path('async/generate/stream/', async_generate_story_stream, name='story-async-generate-stream'),
+    path('async/<uuid:pk>/continue/', async_continue_story, name='story-async-continue'),
+    
     # Custom story endpoints handled by ViewSet:
     # /stories/generate/ - Generate new story
     # /stories/{id}/continue/ - Continue interactive story
+    # /stories/{id}/chapters/?after=<n> - Chapter text, a page at a time
     # /stories/{id}/interact/ - Record interaction
     # /stories/{id}/complete/ - Mark as completed
     # /stories/library/ - User's story library
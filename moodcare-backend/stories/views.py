@@ -1,14 +1,21 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
+from django.conf import settings
 from django.utils import timezone
-from django.db.models import Count, Q
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse, StreamingHttpResponse
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from django.db.models import Count, Q, Sum
 import json
 
-from .models import Story, StoryInteraction, StoryTemplate
+from .models import Story, StoryChapter, StoryInteraction, StoryTemplate
 from .serializers import (
     StorySerializer,
+    StoryDetailSerializer,
+    StoryChapterSerializer,
     StoryCreateRequestSerializer,
     StoryInteractionSerializer,
     StoryChoiceSerializer,
@@ -16,18 +23,32 @@ from .serializers import (
     StoryTemplateSerializer,
     StoryProgressSerializer
 )
-from .ai_generator import StoryGenerator
+from .ai_generator import get_story_generator, get_async_story_generator
+from . import pool, speculation
+from ai_analysis.async_views import async_api_view
+from emotions.history import summarize_user
 from emotions.models import Emotion
 
+# Story columns list views never show
+LIST_DEFERRED_FIELDS = ('summary', 'emotion_context', 'choices_made', 'story_branches')
+MAX_CHAPTER_PAGE_SIZE = 20
+
 
 class StoryViewSet(viewsets.ModelViewSet):
     """ViewSet for interactive AI-generated stories"""
     serializer_class = StorySerializer
     permission_classes = [IsAuthenticated]
     
+    def get_serializer_class(self):
+        if self.action == 'retrieve':
+            return StoryDetailSerializer
+        return StorySerializer
+    
     def get_queryset(self):
         """Get user's stories"""
         queryset = Story.objects.filter(user=self.request.user)
+        if self.action in ('list', 'library'):
+            queryset = queryset.defer(*LIST_DEFERRED_FIELDS).select_related('user')
         
         # Filter by story type
         story_type = self.request.query_params.get('type')
@@ -48,70 +69,29 @@ class StoryViewSet(viewsets.ModelViewSet):
         if serializer.is_valid():
             data = serializer.validated_data
             
-            # Get user's current emotional state
-            recent_emotion = Emotion.objects.filter(
-                user=request.user
-            ).order_by('-created_at').first()
-            
-            emotion_context = {}
-            if recent_emotion:
-                emotion_context = {
-                    'emotion': recent_emotion.emotion_type,
-                    'intensity': recent_emotion.intensity,
-                    'triggers': recent_emotion.triggers or [],
-                    'context': {
-                        'location': recent_emotion.location,
-                        'activity': recent_emotion.activity,
-                        'weather': recent_emotion.weather
-                    }
-                }
+            emotion_context = self._get_emotion_context(request.user)
             
-            # Initialize story generator
-            generator = StoryGenerator()
-            
-            # Generate story
-            story_data = generator.generate_story(
-                story_type=data['story_type'],
-                current_emotion=data['current_emotion'],
-                emotion_intensity=data['emotion_intensity'],
-                target_emotion=data.get('target_emotion'),
-                preferences=data.get('preferences', {}),
-                length=data.get('length', 'medium')
-            )
-            
-            # Create story in database
-            story = Story.objects.create(
-                user=request.user,
-                title=story_data.get('title', 'Untitled Story'),
-                content=story_data.get('content', ''),
-                story_type=data['story_type'],
-                emotion_context=emotion_context,
-                emotion_tags=[
-                    data['current_emotion'],
-                    data.get('target_emotion', 'balanced')
-                ],
-                reading_time=story_data.get('reading_time', 5),
-                story_branches=story_data.get('branches', {}),
-                last_read_at=timezone.now()
-            )
-            
-            # Prepare response
-            response_data = {
-                'story_id': story.id,
-                'title': story.title,
-                'first_chapter': story_data.get('chapters', [{}])[0].get('text', story.content[:500]),
-                'choices': story_data.get('choices', []),
-                'estimated_reading_time': story.reading_time,
-                'emotion_journey': story_data.get('emotional_arc', [])
-            }
-            
-            response_serializer = StoryGenerationResponseSerializer(data=response_data)
-            if response_serializer.is_valid():
-                return Response(
-                    response_serializer.validated_data,
-                    status=status.HTTP_201_CREATED
+            # Common requests are served from the pre-generated pool
+            story_data = pool.claim(data)
+            if story_data is None:
+                # Initialize story generator
+                generator = get_story_generator()
+                
+                # Generate story
+                story_data = generator.generate_story(
+                    story_type=data['story_type'],
+                    current_emotion=data['current_emotion'],
+                    emotion_intensity=data['emotion_intensity'],
+                    target_emotion=data.get('target_emotion'),
+                    preferences=data.get('preferences', {}),
+                    length=data.get('length', 'medium'),
+                    emotion_history=summarize_user(request.user),
+                    user_id=request.user.pk
                 )
             
+            response_data = self._save_generated_story(
+                request.user, data, story_data, emotion_context
+            )
             return Response(response_data, status=status.HTTP_201_CREATED)
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -128,54 +108,49 @@ class StoryViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Record the choice
-        story.choices_made.append({
-            'chapter': story.current_chapter,
-            'choice_id': choice_id,
-            'timestamp': timezone.now().isoformat()
-        })
+        # Served from pre-generation when it finished in time, else generated now
+        story_context = self._record_choice(story, choice_id)
+        next_chapter_data = speculation.claim(story, choice_id)
+        if next_chapter_data is None:
+            generator = get_story_generator()
+            next_chapter_data = generator.continue_story(
+                story_id=str(story.id),
+                choice_id=choice_id,
+                story_context=story_context
+            )
         
-        # Generate next chapter
-        generator = StoryGenerator()
-        next_chapter_data = generator.continue_story(
-            story_id=str(story.id),
-            choice_id=choice_id,
-            story_context={
-                'current_chapter': story.current_chapter,
-                'choices_made': story.choices_made,
-                'summary': story.content[:500]  # Brief summary
-            }
+        response_data = self._apply_next_chapter(
+            story, request.user, choice_id,
+            request.data.get('choice_text', ''), next_chapter_data
         )
+        return Response(response_data, status=status.HTTP_200_OK)
+    
+    @action(detail=True, methods=['get'], url_path='chapters')
+    def chapters(self, request, pk=None):
+        """
+        Chapter text, fetched lazily: chapters numbered after ``after``
+        (default 0), at most ``limit`` (STORY_CHAPTER_PAGE_SIZE) per call
+        """
+        story = self.get_object()
+        try:
+            after = int(request.query_params.get('after', 0))
+            limit = int(request.query_params.get(
+                'limit', getattr(settings, 'STORY_CHAPTER_PAGE_SIZE', 5)
+            ))
+        except ValueError:
+            return Response(
+                {'error': 'after and limit must be integers'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        limit = max(1, min(limit, MAX_CHAPTER_PAGE_SIZE))
         
-        # Update story
-        story.current_chapter = next_chapter_data.get('chapter_number', story.current_chapter + 1)
-        
-        # Append new chapter to content
-        new_chapter_text = next_chapter_data.get('content', '')
-        story.content += f"\n\n## Chapter {story.current_chapter}\n\n{new_chapter_text}"
-        
-        # Update branches if provided
-        if 'branches' in next_chapter_data:
-            story.story_branches.update(next_chapter_data['branches'])
-        
-        story.last_read_at = timezone.now()
-        story.save()
-        
-        # Create interaction record
-        StoryInteraction.objects.create(
-            story=story,
-            user=request.user,
-            interaction_type='choice',
-            chapter=story.current_chapter - 1,
-            choice_id=choice_id,
-            choice_text=request.data.get('choice_text', '')
+        chapters = list(
+            StoryChapter.objects.filter(story=story, number__gt=after).order_by('number')[:limit + 1]
         )
-        
         return Response({
-            'chapter_number': story.current_chapter,
-            'chapter_content': new_chapter_text,
-            'choices': next_chapter_data.get('choices', []),
-            'emotional_tone': next_chapter_data.get('emotional_tone', 'neutral')
+            'story_id': story.id,
+            'chapters': StoryChapterSerializer(chapters[:limit], many=True).data,
+            'has_more': len(chapters) > limit
         }, status=status.HTTP_200_OK)
     
     @action(detail=True, methods=['post'], url_path='interact')
@@ -273,12 +248,29 @@ class StoryViewSet(viewsets.ModelViewSet):
             'total_stories': stories.count(),
             'completed_count': stories.filter(is_completed=True).count(),
             'in_progress_count': stories.filter(is_completed=False).count(),
-            'total_reading_time': sum(s.reading_time for s in stories),
+            'total_reading_time': stories.aggregate(total=Sum('reading_time'))['total'] or 0,
             'favorite_type': self._get_favorite_story_type(stories)
         }
         
         return Response(library, status=status.HTTP_200_OK)
     
+    @action(detail=False, methods=['get'], permission_classes=[IsAdminUser])
+    def speculation_stats(self, request):
+        """Hit rate and wasted tokens of next-chapter pre-generation (?hours=24)"""
+        try:
+            hours = int(request.query_params.get('hours', 24))
+        except ValueError:
+            return Response(
+                {'error': 'hours must be an integer'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response(speculation.stats(hours), status=status.HTTP_200_OK)
+    
+    @action(detail=False, methods=['get'], permission_classes=[IsAdminUser])
+    def pool_stats(self, request):
+        """Depth, target depth, demand and hit rate of the pre-generated story pools"""
+        return Response(pool.stats(), status=status.HTTP_200_OK)
+    
     @action(detail=True, methods=['get'], url_path='progress')
     def progress(self, request, pk=None):
         """Get reading progress for a story"""
@@ -324,6 +316,153 @@ class StoryViewSet(viewsets.ModelViewSet):
         
         return Response(progress_data, status=status.HTTP_200_OK)
     
+    @staticmethod
+    def _get_emotion_context(user):
+        """Get user's current emotional state"""
+        recent_emotion = Emotion.objects.filter(
+            user=user
+        ).order_by('-created_at').first()
+        
+        emotion_context = {}
+        if recent_emotion:
+            emotion_context = {
+                'emotion': recent_emotion.emotion_type,
+                'intensity': recent_emotion.intensity,
+                'triggers': recent_emotion.triggers or [],
+                'context': {
+                    'location': recent_emotion.location,
+                    'activity': recent_emotion.activity,
+                    'weather': recent_emotion.weather
+                }
+            }
+        return emotion_context
+    
+    @staticmethod
+    def _create_story(user, story_data, **fields):
+        """Create a story row and its opening chapter from generated story data"""
+        content = story_data.get('content', '')
+        chapters = story_data.get('chapters') or [{}]
+        with transaction.atomic():
+            story = Story.objects.create(
+                user=user,
+                summary=content[:500],
+                last_read_at=timezone.now(),
+                **fields
+            )
+            StoryChapter.objects.create(
+                story=story,
+                user=user,
+                number=1,
+                title=chapters[0].get('title', ''),
+                content=content,
+                choices=story_data.get('choices', [])
+            )
+            speculation.schedule(story, user, story_data.get('choices', []))
+        return story
+    
+    @staticmethod
+    def _save_generated_story(user, data, story_data, emotion_context):
+        """Create the story in database and build the generation response"""
+        story = StoryViewSet._create_story(
+            user,
+            story_data,
+            title=story_data.get('title', 'Untitled Story'),
+            story_type=data['story_type'],
+            emotion_context=emotion_context,
+            emotion_tags=[
+                data['current_emotion'],
+                data.get('target_emotion', 'balanced')
+            ],
+            reading_time=story_data.get('reading_time', 5),
+            story_branches=story_data.get('branches', {})
+        )
+        
+        # Prepare response
+        response_data = {
+            'story_id': story.id,
+            'title': story.title,
+            'first_chapter': story_data.get('chapters', [{}])[0].get('text', story.summary),
+            'choices': story_data.get('choices', []),
+            'estimated_reading_time': story.reading_time,
+            'emotion_journey': story_data.get('emotional_arc', [])
+        }
+        
+        response_serializer = StoryGenerationResponseSerializer(data=response_data)
+        if response_serializer.is_valid():
+            return response_serializer.validated_data
+        
+        return response_data
+    
+    @staticmethod
+    def _record_choice(story, choice_id):
+        """Record the choice and return the context for the next chapter"""
+        story.choices_made.append({
+            'chapter': story.current_chapter,
+            'choice_id': choice_id,
+            'timestamp': timezone.now().isoformat()
+        })
+        
+        return {
+            'current_chapter': story.current_chapter,
+            'choices_made': story.choices_made,
+            'summary': story.summary
+        }
+    
+    @staticmethod
+    def _apply_next_chapter(story, user, choice_id, choice_text, next_chapter_data):
+        """
+        Append the generated chapter as its own row and log the interaction.
+        
+        The write is proportional to the chapter: earlier chapters are never
+        rewritten and the story row only updates its small metadata columns.
+        """
+        previous_chapter = story.current_chapter
+        # Chapter numbers only move forward, whatever number the model returns
+        story.current_chapter = max(
+            next_chapter_data.get('chapter_number') or 0, previous_chapter + 1
+        )
+        new_chapter_text = next_chapter_data.get('content', '')
+        update_fields = ['current_chapter', 'choices_made', 'last_read_at', 'updated_at']
+        
+        # Update branches if provided
+        if 'branches' in next_chapter_data:
+            story.story_branches.update(next_chapter_data['branches'])
+            update_fields.append('story_branches')
+        
+        story.last_read_at = timezone.now()
+        with transaction.atomic():
+            StoryChapter.objects.create(
+                story=story,
+                user=user,
+                number=story.current_chapter,
+                title=next_chapter_data.get('chapter_title', ''),
+                content=new_chapter_text,
+                choice_id=choice_id,
+                choices=next_chapter_data.get('choices', []),
+                emotional_tone=next_chapter_data.get('emotional_tone', '')
+            )
+            story.save(update_fields=update_fields)
+            
+            # Create interaction record
+            StoryInteraction.objects.create(
+                story=story,
+                user=user,
+                interaction_type='choice',
+                chapter=previous_chapter,
+                choice_id=choice_id,
+                choice_text=choice_text
+            )
+            
+            speculation.settle(story, previous_chapter, choice_id)
+            speculation.schedule(story, user, next_chapter_data.get('choices', []))
+        
+        return {
+            'chapter_number': story.current_chapter,
+            'chapter_content': new_chapter_text,
+            'choices': next_chapter_data.get('choices', []),
+            'emotional_tone': next_chapter_data.get('emotional_tone', 'neutral')
+        }
+    
     def _get_favorite_story_type(self, stories):
         """Determine user's favorite story type"""
         type_counts = stories.values('story_type').annotate(
@@ -378,26 +517,27 @@ class StoryTemplateViewSet(viewsets.ReadOnlyModelViewSet):
             emotion_intensity = recent_emotion.intensity
         
         # Generate story using template
-        generator = StoryGenerator()
+        generator = get_story_generator()
         story_data = generator.generate_story(
             story_type=template.story_type,
             current_emotion=current_emotion,
             emotion_intensity=emotion_intensity,
             target_emotion=template.target_emotions[0] if template.target_emotions else None,
             preferences={'template_id': template.id},
-            length='medium'
+            length='medium',
+            emotion_history=summarize_user(request.user),
+            user_id=request.user.pk
         )
         
         # Create story
-        story = Story.objects.create(
-            user=request.user,
+        story = StoryViewSet._create_story(
+            request.user,
+            story_data,
             title=story_data.get('title', template.name),
-            content=story_data.get('content', ''),
             story_type=template.story_type,
             emotion_tags=template.target_emotions,
             reading_time=story_data.get('reading_time', 10),
-            story_branches=template.template_structure,
-            last_read_at=timezone.now()
+            story_branches=template.template_structure
         )
         
         return Response({
@@ -405,4 +545,111 @@ class StoryTemplateViewSet(viewsets.ReadOnlyModelViewSet):
             'template_id': template.id,
             'title': story.title,
             'message': 'Story generated from template successfully'
-        }, status=status.HTTP_201_CREATED)
\ No newline at end of file
+        }, status=status.HTTP_201_CREATED)
+
+
+@async_api_view(['POST'])
+async def async_generate_story(request):
+    """Generate a new AI story without holding a worker thread (ASGI)"""
+    serializer = StoryCreateRequestSerializer(data=request.data)
+    if not serializer.is_valid():
+        return JsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    
+    data = serializer.validated_data
+    emotion_context = await sync_to_async(StoryViewSet._get_emotion_context)(request.user)
+    
+    story_data = await sync_to_async(pool.claim)(data)
+    if story_data is None:
+        story_data = await get_async_story_generator().generate_story(
+            story_type=data['story_type'],
+            current_emotion=data['current_emotion'],
+            emotion_intensity=data['emotion_intensity'],
+            target_emotion=data.get('target_emotion'),
+            preferences=data.get('preferences', {}),
+            length=data.get('length', 'medium'),
+            emotion_history=await sync_to_async(summarize_user)(request.user),
+            user_id=request.user.pk
+        )
+    
+    response_data = await sync_to_async(StoryViewSet._save_generated_story)(
+        request.user, data, story_data, emotion_context
+    )
+    return JsonResponse(response_data, status=status.HTTP_201_CREATED)
+
+
+@async_api_view(['POST'])
+async def async_continue_story(request, pk):
+    """Continue an interactive story without holding a worker thread (ASGI)"""
+    choice_id = request.data.get('choice_id')
+    if not choice_id:
+        return JsonResponse(
+            {'error': 'choice_id is required'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    story = await Story.objects.filter(user=request.user, pk=pk).afirst()
+    if story is None:
+        return JsonResponse({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
+    
+    story_context = StoryViewSet._record_choice(story, choice_id)
+    next_chapter_data = await sync_to_async(speculation.claim)(story, choice_id)
+    if next_chapter_data is None:
+        next_chapter_data = await get_async_story_generator().continue_story(
+            story_id=str(story.id),
+            choice_id=choice_id,
+            story_context=story_context
+        )
+    
+    response_data = await sync_to_async(StoryViewSet._apply_next_chapter)(
+        story, request.user, choice_id,
+        request.data.get('choice_text', ''), next_chapter_data
+    )
+    return JsonResponse(response_data, status=status.HTTP_200_OK)
+
+
+async def story_stream_events(user, data):
+    """
+    Streamed generation events for a validated StoryCreateRequestSerializer
+    payload, then a ``saved`` event once the Story row is persisted.
+    
+    Shared by the SSE endpoint and realtime.consumers.StoryStreamConsumer.
+    Nothing is saved if the reader goes away before the stream completes.
+    """
+    emotion_context = await sync_to_async(StoryViewSet._get_emotion_context)(user)
+    emotion_history = await sync_to_async(summarize_user)(user)
+    
+    async for event in get_async_story_generator().stream_story(
+        story_type=data['story_type'],
+        current_emotion=data['current_emotion'],
+        emotion_intensity=data['emotion_intensity'],
+        target_emotion=data.get('target_emotion'),
+        preferences=data.get('preferences', {}),
+        length=data.get('length', 'medium'),
+        emotion_history=emotion_history
+    ):
+        if event['type'] != 'story':
+            yield event
+            continue
+        
+        response_data = await sync_to_async(StoryViewSet._save_generated_story)(
+            user, data, event['story'], emotion_context
+        )
+        yield {'type': 'saved', 'fallback': event['fallback'], **response_data}
+
+
+@async_api_view(['POST'])
+async def async_generate_story_stream(request):
+    """Stream a new AI story as server-sent events while it is written (ASGI)"""
+    serializer = StoryCreateRequestSerializer(data=request.data)
+    if not serializer.is_valid():
+        return JsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    
+    async def server_sent_events():
+        async for event in story_stream_events(request.user, serializer.validated_data):
+            yield f"event: {event['type']}\ndata: {json.dumps(event, cls=DjangoJSONEncoder)}\n\n"
+    
+    response = StreamingHttpResponse(server_sent_events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Let nginx pass events through instead of buffering the whole story
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,136 @@
+"""
+Delta sync
+
+A sync token is a signed map of per-entity (updated_at, pk) watermarks.
+Each request returns rows changed after those watermarks, plus
+tombstones for deletes, and a new token. Rows are only read up to
+``now - SYNC_SETTLE_SECONDS`` so a transaction that commits late with an
+older updated_at is still picked up. When nothing changed the token
+comes back unchanged. Its hash is the ETag, so a steady-state app open
+is a 304.
+"""
+import hashlib
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from django.conf import settings
+from django.core import signing
+from django.db.models import Q
+from django.utils import timezone
+
+from .entities import installed_entities
+from .models import SyncTombstone
+
+TOKEN_SALT = 'moodcare.sync'
+TOKEN_VERSION = 1
+TOMBSTONES = 'tombstones'
+
+
+class InvalidSyncToken(Exception):
+    """Raised for tokens that are malformed, tampered with or not the caller's"""
+
+
+def encode_token(user_id: int, watermarks: Dict[str, list]) -> str:
+    return signing.dumps(
+        {'v': TOKEN_VERSION, 'u': user_id, 'w': watermarks}, salt=TOKEN_SALT, compress=True
+    )
+
+
+def decode_token(token: str, user_id: int) -> Dict[str, list]:
+    try:
+        payload = signing.loads(token, salt=TOKEN_SALT)
+    except signing.BadSignature:
+        raise InvalidSyncToken('invalid sync token')
+    if payload.get('v') != TOKEN_VERSION or payload.get('u') != user_id:
+        raise InvalidSyncToken('sync token belongs to another user or version')
+    return payload['w']
+
+
+def token_etag(token: str) -> str:
+    return '"{}"'.format(hashlib.sha256(token.encode('ascii')).hexdigest()[:32])
+
+
+def _after(queryset, time_field: str, watermark: Optional[list]):
+    if not watermark:
+        return queryset
+    moment, pk = datetime.fromisoformat(watermark[0]), watermark[1]
+    return queryset.filter(
+        Q(**{f'{time_field}__gt': moment}) | Q(**{time_field: moment, 'pk__gt': pk})
+    )
+
+
+def _watermark(moment, pk) -> list:
+    return [moment.isoformat(), str(pk)]
+
+
+def collect_changes(user, token: Optional[str] = None, limit: Optional[int] = None) -> Dict:
+    """
+    Changes for ``user`` since ``token`` (everything when no token).
+
+    Returns a dict with ``sync_token``, ``has_more``, ``reset``,
+    ``changes`` (entity -> rows, non-empty entities only) and ``deleted``.
+    """
+    limit = limit or getattr(settings, 'SYNC_PAGE_SIZE', 500)
+    now = timezone.now()
+    until = now - timedelta(seconds=getattr(settings, 'SYNC_SETTLE_SECONDS', 2))
+
+    watermarks = decode_token(token, user.pk) if token else {}
+    reset = False
+    retention = timedelta(days=getattr(settings, 'SYNC_TOMBSTONE_RETENTION_DAYS', 90))
+    tombstone_mark = watermarks.get(TOMBSTONES)
+    if tombstone_mark and datetime.fromisoformat(tombstone_mark[0]) < now - retention:
+        # Deletes older than the retention window are gone; start over
+        watermarks, reset = {}, True
+
+    next_marks = dict(watermarks)
+    changes = {}
+    has_more = False
+    for entity in installed_entities():
+        queryset = entity.model.objects.filter(user=user, updated_at__lte=until)
+        rows = list(
+            _after(queryset, 'updated_at', watermarks.get(entity.name))
+            .order_by('updated_at', 'pk').values(*entity.fields)[:limit + 1]
+        )
+        if len(rows) > limit:
+            rows, has_more = rows[:limit], True
+        if rows:
+            changes[entity.name] = rows
+            next_marks[entity.name] = _watermark(rows[-1]['updated_at'], rows[-1]['id'])
+
+    deleted = []
+    truncated = False
+    if token and not reset:
+        tombstones = list(
+            _after(
+                SyncTombstone.objects.filter(user=user, deleted_at__lte=until),
+                'deleted_at', watermarks.get(TOMBSTONES)
+            ).order_by('deleted_at', 'pk').values_list(
+                'pk', 'entity', 'object_id', 'deleted_at'
+            )[:limit + 1]
+        )
+        if len(tombstones) > limit:
+            tombstones, truncated = tombstones[:limit], True
+        deleted = [{'entity': entity, 'id': object_id} for _, entity, object_id, _ in tombstones]
+        if tombstones:
+            next_marks[TOMBSTONES] = _watermark(tombstones[-1][3], tombstones[-1][0])
+
+    # Every delete up to ``until`` has been delivered (or a full sync reflects
+    # it). Move the mark up when it is missing or half-way to expiry, so idle
+    # clients are not reset, while the token stays stable between those moves.
+    mark = next_marks.get(TOMBSTONES)
+    if not truncated and (
+        mark is None or datetime.fromisoformat(mark[0]) < now - retention / 2
+    ):
+        next_marks[TOMBSTONES] = _watermark(until, 0)
+    has_more = has_more or truncated
+
+    next_token = token if token and next_marks == watermarks else encode_token(
+        user.pk, next_marks
+    )
+    return {
+        'sync_token': next_token,
+        'has_more': has_more,
+        'reset': reset,
+        'changes': changes,
+        'deleted': deleted,
+    }
@@ -0,0 +1,60 @@
+"""
+Models exposed through delta sync
+
+Each entity is read in (updated_at, pk) order through a per-user
+updated_at index. Entities whose app is not installed are skipped.
+"""
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+from django.apps import apps
+
+from emotions.export import EXPORT_FIELDS
+
+
+@dataclass(frozen=True)
+class SyncEntity:
+    name: str
+    model_label: str
+    fields: Tuple[str, ...]
+
+    @property
+    def model(self):
+        try:
+            return apps.get_model(self.model_label)
+        except LookupError:
+            return None
+
+
+ENTITIES = (
+    SyncEntity('emotions', 'emotions.Emotion', EXPORT_FIELDS),
+    SyncEntity('stories', 'stories.Story', (
+        'id', 'title', 'summary', 'story_type', 'emotion_tags', 'current_chapter',
+        'choices_made', 'reading_time', 'is_completed', 'created_at', 'updated_at',
+        'last_read_at',
+    )),
+    SyncEntity('story_chapters', 'stories.StoryChapter', (
+        'id', 'story', 'number', 'title', 'content', 'choice_id', 'choices',
+        'emotional_tone', 'created_at', 'updated_at',
+    )),
+    SyncEntity('music_recommendations', 'music.MusicRecommendation', (
+        'id', 'target_emotion', 'recommendation_type', 'track_id', 'track_name', 'artist',
+        'album', 'recommendation_score', 'recommendation_reason', 'user_rating',
+        'helped_mood', 'skipped', 'play_count', 'created_at', 'updated_at', 'played_at',
+    )),
+    SyncEntity('notifications', 'notifications.NotificationLog', (
+        'id', 'title', 'body', 'data', 'category', 'status', 'sent_at', 'read_at',
+        'created_at', 'updated_at',
+    )),
+)
+
+
+def installed_entities() -> List[SyncEntity]:
+    return [entity for entity in ENTITIES if entity.model is not None]
+
+
+def entity_for_model(model) -> Optional[SyncEntity]:
+    for entity in ENTITIES:
+        if entity.model is model:
+            return entity
+    return None
@@ -0,0 +1,79 @@
+import random
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test.utils import override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from emotions.models import Emotion
+from sync.views import SyncView
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Bytes per app open: full delta sync vs steady state vs a few edits'
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('--records', type=int, default=2000)
+        parser.add_argument('--edits', type=int, default=3)
+
+    def handle(self, *args, **options):
+        try:
+            with override_settings(SYNC_SETTLE_SECONDS=0), transaction.atomic():
+                self._run(options)
+                raise _Rollback()
+        except _Rollback:
+            pass
+
+    def _run(self, options):
+        user = get_user_model().objects.create(username='sync-bench', email='sync-bench@example.com')
+        rng = random.Random(11)
+        types = [value for value, _ in Emotion.EMOTION_TYPES]
+        Emotion.objects.bulk_create([
+            Emotion(user=user, emotion_type=rng.choice(types), intensity=rng.randint(1, 10),
+                    note='오늘 하루는 ' * rng.randint(1, 10))
+            for _ in range(options['records'])
+        ])
+
+        factory = APIRequestFactory()
+        view = SyncView.as_view()
+
+        def app_open(token=None, etag=None):
+            extra = {'HTTP_IF_NONE_MATCH': etag} if etag else {}
+            request = factory.get(
+                '/api/v1/sync/', {'sync_token': token} if token else {},
+                HTTP_HOST='localhost', **extra
+            )
+            force_authenticate(request, user=user)
+            response = view(request)
+            response.render()
+            return response
+
+        # Full sync, following has_more pages
+        token, etag, full_bytes, requests = None, None, 0, 0
+        while True:
+            response = app_open(token)
+            full_bytes += len(response.content)
+            requests += 1
+            token, etag = response.data['sync_token'], response['ETag']
+            if not response.data['has_more']:
+                break
+        self.stdout.write(f"full sync     {full_bytes:>9} bytes in {requests} requests")
+
+        response = app_open(token, etag)
+        if response.status_code != 304:
+            raise CommandError(f"Expected 304 in steady state, got {response.status_code}")
+        self.stdout.write(f"steady state  {len(response.content):>9} bytes (HTTP 304)")
+
+        for emotion in Emotion.objects.filter(user=user)[:options['edits']]:
+            emotion.intensity = 10
+            emotion.save()
+        response = app_open(token, etag)
+        self.stdout.write(
+            f"{options['edits']} edits       {len(response.content):>9} bytes (HTTP {response.status_code})"
+        )
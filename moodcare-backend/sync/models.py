@@ -0,0 +1,25 @@
+from django.db import models
+from django.conf import settings
+
+
+class SyncTombstone(models.Model):
+    """
+    Marker left behind when a synced object is deleted, so delta sync
+    can tell clients to drop it. Pruned after SYNC_TOMBSTONE_RETENTION_DAYS
+    (`manage.py prune_sync_tombstones`).
+    """
+    
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='sync_tombstones')
+    entity = models.CharField(max_length=50)
+    object_id = models.CharField(max_length=64)
+    deleted_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'sync_tombstones'
+        ordering = ['deleted_at', 'id']
+        indexes = [
+            models.Index(fields=['user', 'deleted_at', 'id']),
+        ]
+    
+    def __str__(self):
+        return f"{self.user_id} - {self.entity}:{self.object_id} ({self.deleted_at})"
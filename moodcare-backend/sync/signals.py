@@ -0,0 +1,33 @@
+"""
+Record tombstones when synced objects are deleted
+"""
+from django.contrib.auth import get_user_model
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete
+
+from .entities import entity_for_model, installed_entities
+from .models import SyncTombstone
+
+
+def connect_tombstone_signals():
+    for entity in installed_entities():
+        post_delete.connect(
+            record_tombstone, sender=entity.model, dispatch_uid=f'sync-tombstone-{entity.name}'
+        )
+
+
+def _deleting_user(origin) -> bool:
+    """True when the delete cascades from removing the user itself"""
+    User = get_user_model()
+    if isinstance(origin, QuerySet):
+        return origin.model is User
+    return isinstance(origin, User)
+
+
+def record_tombstone(sender, instance, origin=None, **kwargs):
+    entity = entity_for_model(sender)
+    if entity is None or _deleting_user(origin):
+        return
+    SyncTombstone.objects.create(
+        user_id=instance.user_id, entity=entity.name, object_id=str(instance.pk)
+    )
@@ -0,0 +1,34 @@
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .delta import InvalidSyncToken, collect_changes, token_etag
+
+
+class SyncView(APIView):
+    """
+    Delta sync for the mobile client.
+
+    GET ?sync_token=<token> returns only what changed since that token.
+    Omit the token for a full sync. Send the previous ETag in
+    If-None-Match to get an empty 304 when nothing changed. Repeat with
+    the returned token while ``has_more`` is true. ``reset`` means the
+    client must drop its local copy and apply the full data set it got.
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request):
+        token = request.query_params.get('sync_token') or None
+        try:
+            delta = collect_changes(request.user, token)
+        except InvalidSyncToken as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        etag = token_etag(delta['sync_token'])
+        headers = {'ETag': etag, 'Cache-Control': 'private, no-cache'}
+        if_none_match = request.headers.get('If-None-Match', '')
+        if not delta['has_more'] and etag in [tag.strip() for tag in if_none_match.split(',')]:
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        
+        return Response(delta, headers=headers)